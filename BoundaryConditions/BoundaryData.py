@@ -0,0 +1,222 @@
+import hashlib
+import logging as lg
+import numpy as np
+import pandas as pd
+import os
+import threading
+
+
+# Location of boundary condition data
+DATA_LOC = "./BoundaryConditions/"
+# Available data sets
+REGIONS = ['East', 'West', 'South', 'North']
+BUILDING_TYPES = ['FSH', 'REH', 'SAH', 'BAH']
+SLP_NAMES = ['PHH', 'L0', 'G0']
+# Types of reference weather (order of rows in reference weather data)
+WEATHER_TYPES = ['reference', 'winter_extreme', 'summer_extreme']
+
+# Registry of loaded data, key is (data set, name)
+_REGISTRY = {}
+_LOCK = threading.RLock()
+# Hashes of files, key is (path, modification time, size)
+_FILE_HASHES = {}
+
+
+def getData(dataSet, name, loader):
+    """ Get data from registry
+
+    The data is loaded once per process by calling the loader, afterwards
+    the registered data is returned. The data is shared by all users,
+    so it must not be modified.
+
+    Args:
+        dataSet (string): Name of data set (used for invalidation)
+        name (hashable): Name of data within data set
+        loader (function): Function without arguments, which returns the
+                           data if it isn't registered yet
+
+    Returns:
+        any: Registered data
+    """
+    key = (dataSet, name)
+    with _LOCK:
+        if key not in _REGISTRY:
+            lg.debug("Load boundary data {} {}".format(dataSet, name))
+            _REGISTRY[key] = loader()
+
+        return _REGISTRY[key]
+
+
+def invalidate(dataSet=None):
+    """ Remove data from registry, so it is loaded again on next request
+
+    Args:
+        dataSet (string): Name of data set to remove
+                          (Default: None -> all data is removed)
+    """
+    with _LOCK:
+        if dataSet is None:
+            _REGISTRY.clear()
+        else:
+            for key in [key for key in _REGISTRY if key[0] == dataSet]:
+                del _REGISTRY[key]
+
+
+def getFileHash(fileName):
+    """ Get hash of file content
+
+    The hash is kept as long as the file is not modified.
+
+    Args:
+        fileName (string): Location of file
+
+    Returns:
+        string: sha256 hash of file content
+    """
+    stat = os.stat(fileName)
+    fileKey = (os.path.abspath(fileName), stat.st_mtime_ns, stat.st_size)
+
+    if fileKey not in _FILE_HASHES:
+        fileHash = hashlib.sha256()
+        with open(fileName, 'rb') as dataFile:
+            for chunk in iter(lambda: dataFile.read(1 << 20), b''):
+                fileHash.update(chunk)
+        _FILE_HASHES[fileKey] = fileHash.hexdigest()
+
+    return _FILE_HASHES[fileKey]
+
+
+def preload(regions=REGIONS, buildingTypes=BUILDING_TYPES,
+            slpNames=SLP_NAMES):
+    """ Load boundary data in advance,
+    e.g. at start up of a long-lived service
+
+    Args:
+        regions ([string]): Regions of climate and weather data
+                            (Default: REGIONS)
+        buildingTypes ([string]): Types of reference buildings
+                                  (Default: BUILDING_TYPES)
+        slpNames ([string]): Names of standard load profiles
+                             (Default: SLP_NAMES)
+    """
+    for region in regions:
+        getClimate(region)
+        getReferenceWeather(region)
+    for bType in buildingTypes:
+        getBuildingData(bType)
+    for name in slpNames:
+        getSLP(name)
+    getHotWaterProfile()
+
+
+def _readOnly(array):
+    """ Mark numpy array as read-only, since registered data is shared
+
+    Args:
+        array (np array): Array to protect
+
+    Returns:
+        np array: Given array
+    """
+    array.setflags(write=False)
+
+    return array
+
+
+def getClimate(region):
+    """ Get standard climate data of region
+
+    Args:
+        region (string): Location (see REGIONS)
+
+    Returns:
+        dict: Standard values ('EgNorm [kWh/m^2]', 'ToutNorm [degC]')
+    """
+    def load():
+        climate = pd.read_hdf(DATA_LOC + "Weather/" + region + ".h5",
+                              'Standard')
+        return climate.Value.to_dict()
+
+    return getData('Climate', region, load)
+
+
+def getReferenceWeather(region):
+    """ Get test reference year data of region
+
+    Args:
+        region (string): Location (see REGIONS)
+
+    Returns:
+        dict: Reference weather
+                - 'data': hourly values
+                          (WEATHER_TYPES x hours x variables, float64)
+                - 'doy': day of year of each hour
+                - 'columns': names of variables
+                - 'T': hourly temperature of reference year as tuple
+    """
+    def load():
+        RefWeather = pd.read_hdf(DATA_LOC + "Weather/" + region + ".h5",
+                                 'Weather')
+        # ensure ref Weather time steps are hourly
+        if RefWeather.date_time.dt.freq != 'H':
+            # TODO: Catch -> Create hourly stepped ref Data
+            raise ValueError("Weather data time step must be one hour")
+
+        cols = RefWeather.reference.columns.to_list()
+        data = np.stack([RefWeather[refType][cols].to_numpy(np.float64)
+                         for refType in WEATHER_TYPES])
+
+        return {'data': _readOnly(data),
+                'doy': _readOnly(RefWeather.doy.to_numpy()),
+                'columns': cols,
+                'T': tuple(RefWeather.reference['T [degC]'].tolist())}
+
+    return getData('Weather', region, load)
+
+
+def getBuildingData(bType):
+    """ Get data of reference building type
+
+    Args:
+        bType (string): Building type (see BUILDING_TYPES)
+
+    Returns:
+        (pd DataFrame, pd DataFrame, pd DataFrame, pd DataFrame):
+            Geometry data, U-Values, g-Values and air renewal rates
+    """
+    def load():
+        bFile = (DATA_LOC + "Thermal/ReferenceBuildings/" + bType + ".h5")
+        with pd.HDFStore(bFile, 'r') as store:
+            return tuple(store[key] for key in ['Geo', 'U', 'g', 'n'])
+
+    return getData('Building', bType, load)
+
+
+def getSLP(name):
+    """ Get standard load profile
+
+    Args:
+        name (string): Name of SLP (see SLP_NAMES)
+
+    Returns:
+        pd DataFrame: SLP values (steps of day x (season, day type))
+    """
+    def load():
+        return pd.read_hdf(DATA_LOC + "Electrical/SLP/" + name + ".h5",
+                           key=name)
+
+    return getData('SLP', name, load)
+
+
+def getHotWaterProfile():
+    """ Get hot water day profile (PHH)
+
+    Returns:
+        np array: Factors of hot water demand for each hour of day
+    """
+    def load():
+        HWP = pd.read_hdf(DATA_LOC + "Thermal/HotWaterProfile/"
+                          "HotWaterDayProfile.h5", key='PHH')
+        return _readOnly(HWP.sort_values('Hour').fProportion.to_numpy())
+
+    return getData('HotWater', 'PHH', load)
@@ -0,0 +1,191 @@
+import datetime
+import functools
+import numpy as np
+
+
+# Abbreviations of German federal states
+STATES = ['BW', 'BY', 'BE', 'BB', 'HB', 'HH', 'HE', 'MV',
+          'NI', 'NW', 'RP', 'SL', 'SN', 'ST', 'SH', 'TH']
+# Holidays: name, date (month, day) or offset to easter sunday in days,
+#           states (None -> all states), first year, last year
+# (None -> unlimited)
+HOLIDAYS = [('Neujahr', (1, 1), None, None, None),
+            ('Heilige Drei Könige', (1, 6), ['BW', 'BY', 'ST'], None, None),
+            ('Internationaler Frauentag', (3, 8), ['BE'], 2019, None),
+            ('Internationaler Frauentag', (3, 8), ['MV'], 2023, None),
+            ('Karfreitag', -2, None, None, None),
+            ('Ostermontag', 1, None, None, None),
+            ('Tag der Arbeit', (5, 1), None, None, None),
+            ('Christi Himmelfahrt', 39, None, None, None),
+            ('Pfingstmontag', 50, None, None, None),
+            ('Fronleichnam', 60, ['BW', 'BY', 'HE', 'NW', 'RP', 'SL'],
+             None, None),
+            ('Mariä Himmelfahrt', (8, 15), ['SL'], None, None),
+            ('Weltkindertag', (9, 20), ['TH'], 2019, None),
+            ('Tag der Deutschen Einheit', (10, 3), None, 1990, None),
+            ('Reformationstag', (10, 31), ['BB', 'MV', 'SN', 'ST', 'TH'],
+             1990, None),
+            ('Reformationstag', (10, 31), ['HB', 'HH', 'NI', 'SH'],
+             2018, None),
+            ('Reformationstag', (10, 31), None, 2017, 2017),
+            ('Allerheiligen', (11, 1), ['BW', 'BY', 'NW', 'RP', 'SL'],
+             None, None),
+            ('1. Weihnachtsfeiertag', (12, 25), None, None, None),
+            ('2. Weihnachtsfeiertag', (12, 26), None, None, None),
+            ]
+# Buß- und Bettag (wednesday before 23rd November):
+# states, first year, last year
+REPENTANCE_DAY = [(None, None, 1994),
+                  (['SN'], 1995, None),
+                  ]
+# Days handled as saturday, if they are a work day (month, day)
+SATURDAY_DAYS = [(12, 24), (12, 31)]
+
+
+def _isValid(states, firstYear, lastYear, year, state):
+    """ Check if a holiday rule applies to given year and state
+
+    Args:
+        states (list / None): States of rule (None -> all states)
+        firstYear (int / None): First year of rule (None -> unlimited)
+        lastYear (int / None): Last year of rule (None -> unlimited)
+        year (int): Year
+        state (string): Abbreviation of federal state
+
+    Returns:
+        bool: True if rule applies
+    """
+    return ((states is None or state in states) and
+            (firstYear is None or year >= firstYear) and
+            (lastYear is None or year <= lastYear))
+
+
+def getEasterSunday(year):
+    """ Calculate date of easter sunday (gregorian calendar)
+
+    Args:
+        year (int): Year
+
+    Returns:
+        datetime.date: Date of easter sunday
+    """
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19*a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    j = (32 + 2*e + 2*i - h - k) % 7
+    m = (a + 11*h + 22*j) // 451
+    month, day = divmod(h + j - 7*m + 114, 31)
+
+    return datetime.date(year, month, day + 1)
+
+
+@functools.lru_cache(maxsize=None)
+def getHolidays(year, state='SN'):
+    """ Get all public holidays of a German federal state
+
+    Args:
+        year (int): Year
+        state (string): Abbreviation of federal state (see STATES)
+                        (Default: SN)
+
+    Returns:
+        tuple of datetime.date: Sorted dates of holidays
+    """
+    if state not in STATES:
+        raise ValueError("Unknown federal state {}, supported states are: {}"
+                         .format(state, ", ".join(STATES)))
+
+    easter = getEasterSunday(year)
+    holidays = set()
+    for _, date, states, firstYear, lastYear in HOLIDAYS:
+        if not _isValid(states, firstYear, lastYear, year, state):
+            continue
+        if isinstance(date, tuple):
+            holidays.add(datetime.date(year, *date))
+        else:
+            holidays.add(easter + datetime.timedelta(days=date))
+
+    for states, firstYear, lastYear in REPENTANCE_DAY:
+        if _isValid(states, firstYear, lastYear, year, state):
+            day = datetime.date(year, 11, 22)
+            holidays.add(day - datetime.timedelta(days=(day.weekday()-2) % 7))
+
+    return tuple(sorted(holidays))
+
+
+@functools.lru_cache(maxsize=None)
+def _getYearCalendar(year, state):
+    """ Calculate day types and seasons for all days of a year
+
+    Info to week days: Monday=0, Sunday=6.
+    SLP week days are corrected:
+        - Christmas Eve and New Years Eve are saturdays (if work day)
+        - Holidays are sundays
+
+    Args:
+        year (int): Year
+        state (string): Abbreviation of federal state
+
+    Returns:
+        dict of np arrays: Read-only day values (doy, weekDaySLP, summer,
+                           winter, intermediate)
+    """
+    days = np.arange(np.datetime64('{:04d}-01-01'.format(year)),
+                     np.datetime64('{:04d}-01-01'.format(year + 1)))
+    months = days.astype('datetime64[M]')
+    month = months.astype(np.int64) % 12 + 1
+    dom = (days - months).astype(np.int64) + 1
+    # 01.01.1970 was a thursday
+    weekDaySLP = (days.astype(np.int64) + 3) % 7
+
+    for sMonth, sDay in SATURDAY_DAYS:
+        mask = (month == sMonth) & (dom == sDay) & (weekDaySLP < 5)
+        weekDaySLP[mask] = 5
+    holidays = np.array(getHolidays(year, state), dtype='datetime64[D]')
+    weekDaySLP[(holidays - days[0]).astype(np.int64)] = 6
+
+    calendar = {'doy': np.arange(1, days.size + 1), 'weekDaySLP': weekDaySLP}
+    calendar['summer'] = (((month > 5) & (month < 9)) |
+                          ((month == 5) & (dom >= 15)) |
+                          ((month == 9) & (dom <= 14)))
+    calendar['winter'] = (((month >= 11) | (month < 3)) |
+                          ((month == 3) & (dom <= 20)))
+    calendar['intermediate'] = ~(calendar['summer'] | calendar['winter'])
+
+    for values in calendar.values():
+        values.setflags(write=False)
+
+    return calendar
+
+
+def getDayCalendar(days, state='SN'):
+    """ Get day types and seasons for given days
+
+    The calendar of each year is calculated only once and kept in memory,
+    so the values of many steps per day are just gathered from the
+    day values.
+
+    Args:
+        days (np datetime64 array): Sorted days (e.g. one entry per
+                                    simulation step)
+        state (string): Abbreviation of federal state (see STATES)
+                        (Default: SN)
+
+    Returns:
+        dict of np arrays: Values for each given day (doy, weekDaySLP,
+                           summer, winter, intermediate)
+    """
+    days = np.asarray(days, dtype='datetime64[D]')
+    years = days[[0, -1]].astype('datetime64[Y]').astype(np.int64) + 1970
+    calendars = [_getYearCalendar(year, state)
+                 for year in range(years[0], years[1] + 1)]
+    dayIdx = (days - np.datetime64('{:04d}-01-01'.format(years[0]))
+              ).astype(np.int64)
+
+    return {key: np.concatenate([calendar[key] for calendar in calendars]
+                                )[dayIdx]
+            for key in calendars[0].keys()}
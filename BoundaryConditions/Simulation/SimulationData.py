@@ -1,37 +1,67 @@
 
+import hashlib
+import json
 import numpy as np
 import numpy.matlib
+import os
 import pandas as pd
-import pvlib as pv
-from scipy.interpolate import interp1d
+import shutil
+import tempfile
+from SystemComponentsFast import (DAY_PROFILE_STEPS, get_steps_per_day,
+                                  solar_position)
 
-
-DOY_LEAPDAY = 60
+from BoundaryConditions.BoundaryData import (getData, getFileHash,
+                                             getHotWaterProfile,
+                                             getReferenceWeather, getSLP)
+from BoundaryConditions.Simulation.Calendar import getDayCalendar
 
 
-def _addHotwater(simData):
+DOY_LEAPDAY = 60
+# Order of seasons and day types for SLP day type code
+SLP_SEASONS = ['Winter', 'InterimPeriod', 'Summer']
+SLP_DAY_TYPES = ['WorkDay', 'Saturday', 'Sunday']
+# SLP used for the different agent types (name in sim data: SLP data file)
+SLP_PROFILES = {'PHH': 'PHH', 'BSLa': 'L0', 'BSLc': 'G0'}
+# SLP, which are modified by the dynamic sampling profile
+SLP_DYNAMIC = ['PHH', 'H0']
+# Resolution of day profiles (SLP data: 15 min) is DAY_PROFILE_STEPS,
+# which is shared with SystemComponentsFast (valid time steps)
+# Location used for solar position (Mittelpunkt Deutschland)
+LATITUDE = 51.164305
+LONGITUDE = 10.4541205
+# Location of cached simulation data
+SIM_DATA_CACHE_LOC = "./BoundaryConditions/Simulation/cache/"
+# must be increased, if the generation of simulation data is changed
+SIM_DATA_VERSION = 4
+# groups of simulation data, saved as float32 matrix
+SIM_DATA_GROUPS = ['SLP', 'Weather', 'SolarPosition']
+
+def _addHotwater(simData, stepsPerDay=DAY_PROFILE_STEPS):
     """ Calculate hot water demand profile in W
     All load values are modified by a daily profile.
     The profile values have to be scaled by each agents COC value.
 
     Args:
         simData (pandas data frame): Simulation time and data
+        stepsPerDay (int): Number of simulation steps per day
+                           (Default: DAY_PROFILE_STEPS)
 
     Returns:
         pandas data frame: simData complemented by hot water day profile factor
     """
     # all agents are using PHH profile,
     # since there is no statistic to business hot water demand available
-    HWP = pd.read_hdf("./BoundaryConditions/Thermal/HotWaterProfile/"
-                      "HotWaterDayProfile.h5", key='PHH')
+    # hourly profile -> day profile resolution -> simulation time step
+    profile = np.repeat(getHotWaterProfile(), DAY_PROFILE_STEPS // 24)
+    profile = _resampleDayProfile(profile[np.newaxis], stepsPerDay)[0]
     simData.insert(simData.shape[1], ('HWPfactor', ''),
-                   HWP.loc[simData[('time', '')].dt.hour,
-                           'fProportion'].values)
+                   profile[_getStepOfDay(simData[('time', '')],
+                                         stepsPerDay)])
 
     return simData
 
 
-def _addSLPdata(simData):
+def _addSLPdata(simData, profiles=None, stepsPerDay=DAY_PROFILE_STEPS):
     """ Add standard load profile for different agents to time data frame.
         The SLP is calculated for the time frame beginning at startDate
         and ending at endDate (inclusive). For each day a curve with
@@ -41,101 +71,144 @@ def _addSLPdata(simData):
           The PHH SLP is additionally modyfied according to BDEW
         by a dynamic sampling profile.
 
+        All profile curves are stacked into one table
+        (day type x 96 steps x profile), so the SLP data of all simulation
+        steps is taken from the table at once, by the day type code and
+        step of day. For other time steps than 15 min the table is
+        resampled (mean of longer steps / repetition for shorter steps).
+
     Args:
         simData (pandas data frame): Simulation time information
                                      (is created by getSimTime method)
+        profiles (dict): Mapping of SLP names used in simData to
+                         SLP data files (Default: None -> SLP_PROFILES)
+        stepsPerDay (int): Number of simulation steps per day
+                           (Default: DAY_PROFILE_STEPS)
 
     Returns:
         pandas data frame: Data frame with sim time and SLP data
     """
-    # prepare columns
-    cIdx = [('SLP', 'PHH'), ('SLP', 'BSLa'), ('SLP', 'BSLc')]
-    newData = pd.DataFrame(index=np.arange(simData.shape[0]), columns=cIdx)
-    # load SLP base data
-    PHH = pd.read_hdf("./BoundaryConditions/Electrical/SLP/PHH.h5",
-                      key='PHH')
-    G0 = pd.read_hdf("./BoundaryConditions/Electrical/SLP/G0.h5",
-                     key='G0')
-    L0 = pd.read_hdf("./BoundaryConditions/Electrical/SLP/L0.h5",
-                     key='L0')
-    # add SLP data
-    # Winter
-    mask = simData.winter & (simData.weekDaySLP < 5)
-    nDays = int(mask.sum() / 96)
-    newData.loc[mask, [('SLP', 'PHH'), ('SLP', 'BSLc'),
-                       ('SLP', 'BSLa')]] = np.tile(
-      np.array([PHH.Winter.WorkDay.values,
-                G0.Winter.WorkDay.values,
-                L0.Winter.WorkDay.values]), nDays).T
-    mask = simData.winter & (simData.weekDaySLP == 5)
-    nDays = int(mask.sum() / 96)
-    newData.loc[mask, [('SLP', 'PHH'), ('SLP', 'BSLc'),
-                       ('SLP', 'BSLa')]] = np.tile(
-      np.array([PHH.Winter.Saturday.values,
-                G0.Winter.Saturday.values,
-                L0.Winter.Saturday.values]), nDays).T
-    mask = simData.winter & (simData.weekDaySLP == 6)
-    nDays = int(mask.sum() / 96)
-    newData.loc[mask, [('SLP', 'PHH'), ('SLP', 'BSLc'),
-                       ('SLP', 'BSLa')]] = np.tile(
-      np.array([PHH.Winter.Sunday.values,
-                G0.Winter.Sunday.values,
-                L0.Winter.Sunday.values]), nDays).T
-    # Intermediate
-    mask = simData.intermediate & (simData.weekDaySLP < 5)
-    nDays = int(mask.sum() / 96)
-    newData.loc[mask, [('SLP', 'PHH'), ('SLP', 'BSLc'),
-                       ('SLP', 'BSLa')]] = np.tile(
-      np.array([PHH.InterimPeriod.WorkDay.values,
-                G0.InterimPeriod.WorkDay.values,
-                L0.InterimPeriod.WorkDay.values]), nDays).T
-    mask = simData.intermediate & (simData.weekDaySLP == 5)
-    nDays = int(mask.sum() / 96)
-    newData.loc[mask, [('SLP', 'PHH'), ('SLP', 'BSLc'),
-                       ('SLP', 'BSLa')]] = np.tile(
-      np.array([PHH.InterimPeriod.Saturday.values,
-                G0.InterimPeriod.Saturday.values,
-                L0.InterimPeriod.Saturday.values]), nDays).T
-    mask = simData.intermediate & (simData.weekDaySLP == 6)
-    nDays = int(mask.sum() / 96)
-    newData.loc[mask, [('SLP', 'PHH'), ('SLP', 'BSLc'),
-                       ('SLP', 'BSLa')]] = np.tile(
-      np.array([PHH.InterimPeriod.Sunday.values,
-                G0.InterimPeriod.Sunday.values,
-                L0.InterimPeriod.Sunday.values]), nDays).T
-    # Summer
-    mask = simData.summer & (simData.weekDaySLP < 5)
-    nDays = int(mask.sum() / 96)
-    newData.loc[mask, [('SLP', 'PHH'), ('SLP', 'BSLc'),
-                       ('SLP', 'BSLa')]] = np.tile(
-      np.array([PHH.Summer.WorkDay.values,
-                G0.Summer.WorkDay.values,
-                L0.Summer.WorkDay.values]), nDays).T
-    mask = simData.summer & (simData.weekDaySLP == 5)
-    nDays = int(mask.sum() / 96)
-    newData.loc[mask, [('SLP', 'PHH'), ('SLP', 'BSLc'),
-                       ('SLP', 'BSLa')]] = np.tile(
-      np.array([PHH.Summer.Saturday.values,
-                G0.Summer.Saturday.values,
-                L0.Summer.Saturday.values]), nDays).T
-    mask = simData.summer & (simData.weekDaySLP == 6)
-    nDays = int(mask.sum() / 96)
-    newData.loc[mask, [('SLP', 'PHH'), ('SLP', 'BSLc'),
-                       ('SLP', 'BSLa')]] = np.tile(
-      np.array([PHH.Summer.Sunday.values,
-                G0.Summer.Sunday.values,
-                L0.Summer.Sunday.values]), nDays).T
+    if profiles is None:
+        profiles = SLP_PROFILES
+
+    SLPtable = _resampleDayProfile(_getSLPtable(profiles.values()),
+                                   stepsPerDay)
+
+    # day type code: season x (Workday, Saturday, Sunday)
+    season = np.select([simData.winter, simData.intermediate, simData.summer],
+                       [0, 1, 2])
+    # (week days SLP: 0 - 4 -> Workday, 5 -> Saturday, 6 -> Sunday)
+    dayType = np.clip(simData.weekDaySLP.to_numpy() - 4, 0, 2)
+    dayCode = season * len(SLP_DAY_TYPES) + dayType
+    SLP = SLPtable[dayCode, _getStepOfDay(simData[('time', '')],
+                                          stepsPerDay)]
+
     # Dynamic sampling of PHH profile
-    newData[('SLP', 'PHH')] *= (- 3.92*1e-10*simData.doy**4 +
-                                3.2*1e-7*simData.doy**3 -
-                                7.02*1e-5*simData.doy**2 +
-                                2.1*1e-3*simData.doy + 1.24)
-    # merge data frames
-    simData = simData.join(newData.astype(np.float32))
+    doy = simData.doy.to_numpy()
+    fDynamic = (- 3.92*1e-10*doy**4 + 3.2*1e-7*doy**3 -
+                7.02*1e-5*doy**2 + 2.1*1e-3*doy + 1.24)
+
+    for idx, name in enumerate(profiles.keys()):
+        if profiles[name] in SLP_DYNAMIC:
+            simData[('SLP', name)] = (SLP[:, idx] * fDynamic
+                                      ).astype(np.float32)
+        else:
+            simData[('SLP', name)] = SLP[:, idx]
 
     return simData
 
 
+def _getSLPtable(profileNames):
+    """ Load SLP curves and stack them into one table
+
+    The table is kept in the boundary data registry.
+
+    Args:
+        profileNames ([string]): Names of SLP data files
+                                 (BoundaryConditions/Electrical/SLP)
+
+    Returns:
+        np array: SLP table (day type x 96 steps x profile, float32,
+                  read-only), the day type code is season * 3 + day type
+                  (see SLP_SEASONS, SLP_DAY_TYPES)
+    """
+    profileNames = tuple(profileNames)
+
+    def load():
+        curves = []
+        for name in profileNames:
+            SLP = getSLP(name)
+            curves.append([SLP[season][dayType].values
+                           for season in SLP_SEASONS
+                           for dayType in SLP_DAY_TYPES])
+
+        table = np.stack(curves, axis=-1).astype(np.float32)
+        table.setflags(write=False)
+
+        return table
+
+    return getData('SLP', ('table',) + profileNames, load)
+
+
+def _resampleDayProfile(profile, stepsPerDay):
+    """ Resample day profiles to simulation time step
+
+    For longer time steps the mean value of the profile steps is used,
+    for shorter time steps the values are repeated.
+
+    Args:
+        profile (np array): Day profiles (... x DAY_PROFILE_STEPS x ...),
+                            the steps of day are the second axis
+        stepsPerDay (int): Number of simulation steps per day
+
+    Returns:
+        np array: Day profiles (... x stepsPerDay x ...)
+    """
+    if stepsPerDay < DAY_PROFILE_STEPS:
+        shape = (profile.shape[:1] +
+                 (stepsPerDay, DAY_PROFILE_STEPS // stepsPerDay) +
+                 profile.shape[2:])
+        return profile.reshape(shape).mean(axis=2, dtype=profile.dtype)
+    if stepsPerDay > DAY_PROFILE_STEPS:
+        return np.repeat(profile, stepsPerDay // DAY_PROFILE_STEPS, axis=1)
+
+    return profile
+
+
+def _getStepOfDay(time, stepsPerDay):
+    """ Get number of step in day for each simulation step
+
+    Args:
+        time (pandas series): Time of simulation steps
+        stepsPerDay (int): Number of simulation steps per day
+
+    Returns:
+        np int array: Step of day
+    """
+    seconds = (time - time.dt.floor('D')).dt.total_seconds().to_numpy()
+
+    return (seconds * stepsPerDay // 86400).astype(np.int64)
+
+
+def _getStepsPerDay(timeStep=None):
+    """ Get number of simulation steps per day
+
+    The number of steps per day must be a divisor or multiple of
+    DAY_PROFILE_STEPS, so the day profiles can be resampled without
+    remainder. The same rule is enforced by
+    SystemComponentsFast.set_time_step.
+
+    Args:
+        timeStep (float): Time step [h]
+                          (Default: None -> time step of simulation,
+                           see SystemComponentsFast.set_time_step)
+
+    Returns:
+        int: Number of simulation steps per day
+    """
+    return get_steps_per_day(timeStep)
+
+
 def _cleanSimData(simData):
     """ Remove unnecessary columns
 
@@ -151,10 +224,39 @@ def _cleanSimData(simData):
     return simData
 
 
-def _getSimTime(startDate, endDate):
+def _getTimeRange(startDate, endDate, stepsPerDay=DAY_PROFILE_STEPS):
+    """ Get time of all simulation steps
+
+    Args:
+        startDate (string): Start date DD.MM.YYYY
+                            (start time is hard coded to 00:00)
+        endDate (string): End date DD.MM.YYYY
+                          (end day is not in time range)
+        stepsPerDay (int): Number of simulation steps per day
+                           (Default: DAY_PROFILE_STEPS)
+
+    Return:
+        pandas DatetimeIndex: Time of simulation steps
+    """
+    startDate = startDate.split(".")
+    startDate = "/".join([startDate[1], startDate[0], startDate[2]])
+    endDate = endDate.split(".")
+    endDate = "/".join([endDate[1], endDate[0], endDate[2]])
+
+    return pd.date_range(startDate, endDate,
+                         freq=pd.Timedelta(days=1) / stepsPerDay,
+                         closed='left')
+
+
+def _getSimTime(startDate, endDate, state='SN',
+                stepsPerDay=DAY_PROFILE_STEPS):
     """ Prepare a pandas dataframe for simulation course
     This function will add all time related informations
-    (Summer, Winter, day of year, hour of day, correct week days for SLP)
+    (Summer, Winter, day of year, correct week days for SLP)
+
+    The informations are taken from the day calendar (see Calendar.py),
+    which is calculated once per year and state and expanded to the
+    steps of each day.
 
     Info to pandas WeekDays: Monday=0, Sunday=6.
 
@@ -164,48 +266,25 @@ def _getSimTime(startDate, endDate):
         endDate (string): End date DD.MM.YYYY
                           (end day is not in time range, so end date
                            should be end date + 1 day)
+        state (string): Federal state, which determines the holidays
+                        (Default: SN)
+        stepsPerDay (int): Number of simulation steps per day
+                           (Default: DAY_PROFILE_STEPS)
 
     Return:
         pandas data frame: Time course and additional informations
                            for preparing boundary conditions of
                            a simulation run
     """
-    startDate = startDate.split(".")
-    startDate = "/".join([startDate[1], startDate[0], startDate[2]])
-    endDate = endDate.split(".")
-    endDate = "/".join([endDate[1], endDate[0], endDate[2]])
+    time = _getTimeRange(startDate, endDate, stepsPerDay)
+    calendar = getDayCalendar(time.values, state)
 
-    time = pd.date_range(startDate, endDate, freq='0.25H', closed='left')
-    doy = time.dayofyear
-    weekDaySLP = time.dayofweek
-
-    df = pd.DataFrame({('time', ''): time, 'doy': doy,
-                       'weekDaySLP': weekDaySLP})
-    # add relevant time periods
-    df['summer'] = (((time.month > 5) & (time.month < 9)) |
-                    ((time.month == 5) & (time.day >= 15)) |
-                    ((time.month == 9) & (time.day <= 14)))
-    df['winter'] = (((time.month >= 11) | (time.month < 3)) |
-                    ((time.month == 3) & (time.day <= 20)))
-    df['intermediate'] = ~(df['summer'] | df['winter'])
-    # correct week days of SLP days
-    # -> add Christmas Eve and New Years Eve to Sat if Week
-    mask = ((time.month == 12) &
-            ((time.day == 24) | (time.day == 31)) &
-            (df.weekDaySLP < 5))
-    df.loc[mask, 'weekDaySLP'] = 5
-    # load and check holidays and set them to sunday
-    holidays = pd.read_csv("./BoundaryConditions/Simulation/holydaysSN.csv",
-                           parse_dates=[0],
-                           dayfirst=True)
-
-    mask = pd.to_datetime(time.date).isin(holidays.date)
-    df.loc[mask, 'weekDaySLP'] = 6
+    df = pd.DataFrame({('time', ''): time, **calendar})
 
     return df
 
 
-def _getWeather(simData, region):
+def _getWeather(simData, region, seed=None):
     """Calculate temperature, irradiation and wind curve for
         given simulation time and region
 
@@ -223,31 +302,59 @@ def _getWeather(simData, region):
                            (determines climate / weather)
                            Supported regions:
                              East, West, South, North
+        seed {int} -- Seed for random weights of weather curves
+                      (default: {None} -> random weather)
 
     Returns:
         pandas data frame -- Simulation data extended by weather course
+                             (incl. daily mean temperature)
+    """
+    Weather, cols = _getWeatherRealisations(simData[('time', '')], region,
+                                            1, np.random.default_rng(seed))
+
+    for idx, col in enumerate(cols):
+        simData[('Weather', col)] = Weather[0, :, idx]
+
+    # daily mean temperature is calculated once for all simulation steps
+    day = simData[('time', '')].dt.floor('D').values
+    simData[('Weather', 'T mean [degC]')] = (
+        simData[('Weather', 'T [degC]')].groupby(day).transform('mean')
+        .values.astype(np.float32))
+
+    return simData
+
+
+def _getWeatherRealisations(time, region, nRealisations, rng):
+    """Calculate weather curves for given simulation time and region
+
+    See _getWeather for the generation of weather curves. All realisations
+    are calculated at once on hourly stepped arrays, the only loop is
+    done over the simulated years (since each year depends on the end of
+    the year before).
+
+    Arguments:
+        time {pandas series} -- Time of simulation steps
+        region {string} -- Location of simulation
+                           (determines climate / weather)
+        nRealisations {int} -- Number of weather curves to generate
+        rng {np.random.Generator} -- Random number generator
+
+    Returns:
+        (np array, [string]) -- Weather data
+                                (realisations x steps x variables, float32)
+                                and names of variables
     """
-    RefWeather = pd.read_hdf("./BoundaryConditions/Weather/" +
-                             region + ".h5", 'Weather')
-    cols = RefWeather.reference.columns
-
-    # at first create simulation weather data without interpolation
-    SimWeather = pd.DataFrame(columns=['t [s]'] + cols.to_list())
-
-    # ensure ref Weather time steps are hourly
-    if RefWeather.date_time.dt.freq != 'H':
-        # TODO: Catch -> Create hourly stepped ref Data
-        raise ValueError("Weather data time step must be one hour")
-
-    # Fill sim time in seconds hourly stepped
-    SimWeather['time'] = pd.date_range(simData[('time', '')].iloc[0],
-                                       simData[('time', '')].iloc[-1],
-                                       freq='H')
-    SimWeather['doy'] = SimWeather.time.dt.dayofyear
-    SimWeather['t [s]'] = ((SimWeather.time - SimWeather.time[0])
-                           .dt.total_seconds())
-    # get mask of all non leap year days once -> keep out doy 366
-    maskDoy = (SimWeather.doy >= 1) & (SimWeather.doy <= 365)
+    # ref data as array (reference, winter extreme, summer extreme)
+    RefWeather = getReferenceWeather(region)
+    cols = RefWeather['columns']
+    Ref = RefWeather['data']
+    refDoy = RefWeather['doy']
+
+    # simulation time hourly stepped
+    hours = pd.date_range(time.iloc[0], time.iloc[-1], freq='H')
+    doy = hours.dayofyear.to_numpy()
+    years, yearStart = np.unique(hours.year.to_numpy(), return_index=True)
+    yearEnd = np.append(yearStart[1:], hours.size)
 
     # one-time create weight function to get smooth transistions
     # between years or december extrapolation
@@ -256,102 +363,143 @@ def _getWeather(simData, region):
     wDay = wDay**10
     wDayInv = 1 - wDay
 
-    yearEnd = None
+    # leap days must be inter-/extrapolated,
+    # if last day of year is considered
+    isLeapFix = hours.is_leap_year[yearStart] & (doy[yearEnd-1] == 366)
+
+    # random weights, drawn in the same order as for single realisations
+    wYear = np.empty((nRealisations, years.size, 3))
+    wLeap = np.ones((nRealisations, years.size, 2))
+    for rNr in range(nRealisations):
+        for yNr in range(years.size):
+            wYear[rNr, yNr] = rng.random(3)
+            if isLeapFix[yNr]:
+                wLeap[rNr, yNr] = rng.random(2)
+    wYear /= wYear.sum(axis=2, keepdims=True)  # sum of weights must be 1
+    wLeap /= wLeap.sum(axis=2, keepdims=True)
+    # prepare shape for broadcasting (realisations x hours x variables)
+    wYear = wYear[:, :, :, np.newaxis, np.newaxis]
+    wLeap = wLeap[:, :, :, np.newaxis, np.newaxis]
+
+    SimWeather = np.full((nRealisations, hours.size, len(cols)), np.nan)
+
+    for yNr in range(years.size):
+        start = yearStart[yNr]
+        end = yearEnd[yNr]
+        yDoy = doy[start:end]
+
+        def dayIdx(day):
+            """ Get slice of hours for day of current year """
+            return slice(start + np.searchsorted(yDoy, day),
+                         start + np.searchsorted(yDoy, day, side='right'))
 
-    # Split up Eg data generation into linked doy sequences
-    for year in range(SimWeather.time.dt.year.min(),
-                      SimWeather.time.dt.year.max()+1):
         # for now ignore the possibility of leap year
-        maskY = ((SimWeather.time.dt.year == year) & maskDoy)
-        # get start and end Idx for current year
-        doyStart = SimWeather.doy[(SimWeather.time.dt.year == year).idxmax()]
-        startY = (RefWeather.doy == doyStart).idxmax()
-        endY = startY + maskY.sum()-1
-
-        # get weighting factors
-        w = np.random.random(3)
-        w /= w.sum()  # sum of all factors must be 1
+        # -> ref data is used continuously, doy 366 is filled later
+        endY = dayIdx(365).stop
+        startRef = np.argmax(refDoy == yDoy[0])
+        refIdx = slice(startRef, startRef + endY - start)
 
         # Calculate simulation data
-        SimWeather.loc[maskY, cols] = (
-          RefWeather.reference.loc[startY:endY, cols]*w[0] +
-          RefWeather.winter_extreme.loc[startY:endY, cols]*w[1] +
-          RefWeather.summer_extreme.loc[startY:endY, cols]*w[2]
-          ).values
+        SimWeather[:, start:endY] = (Ref[0, refIdx] * wYear[:, yNr, 0] +
+                                     Ref[1, refIdx] * wYear[:, yNr, 1] +
+                                     Ref[2, refIdx] * wYear[:, yNr, 2])
 
         # get smooth transition if there is a year before
-        if yearEnd is not None:
-            mask_new = maskY & (SimWeather.doy == 1)
-            SimWeather.loc[mask_new, cols] = (
-                    wDay * yearEnd +
-                    wDayInv * SimWeather.loc[maskY, cols].values[:lenDay])
+        if yNr > 0:
+            Last = SimWeather[:, start-1:start]
+            SimWeather[:, start:start+lenDay] = (
+                wDay * Last + wDayInv * SimWeather[:, start:start+lenDay])
 
         # leap day treatment
-        if SimWeather.time[maskY].dt.is_leap_year.any():
-            # update year mask
-            maskY = SimWeather.time.dt.year == year
-            # handle different cases
-            doyEnd = SimWeather.doy[maskY].max()
-
-            # there is missing data, only if last day of year is considered
-            if doyEnd == 366:
-                # prepare
-                doyStart = SimWeather.doy[maskY].min()
-                # random weights for inter-/extrapolation
-                w = np.random.random(2)
-                w /= w.sum()
-
-                # two cases:
-                # 1. Start before leap -> interpolate leap
-                # 2. Start after leap -> extrapolate end pf year
-                if doyStart < DOY_LEAPDAY:
-                    # move data beginning from leap day
-                    mask_new = maskY & ((SimWeather.doy >= DOY_LEAPDAY+1) &
-                                        (SimWeather.doy <= 366))
-                    mask_old = maskY & ((SimWeather.doy >= DOY_LEAPDAY) &
-                                        (SimWeather.doy <= 365))
-                    SimWeather.loc[mask_new, cols] = (
-                        SimWeather.loc[mask_old, cols].values)
-                    # interpolate leap day data with surrounding days
-                    # leap day has March 1st for know -> add Feb 28th
-                    mask_new = maskY & (SimWeather.doy == DOY_LEAPDAY)
-                    mask_old = maskY & (SimWeather.doy == DOY_LEAPDAY-1)
-                    New = (w[0] * SimWeather.loc[mask_new, cols].values +
-                           w[1] * SimWeather.loc[mask_old, cols].values)
-                    Last = SimWeather.loc[mask_old, cols].values[-1]
-                    # first transition
-                    SimWeather.loc[mask_new, cols] = (wDay*Last + wDayInv*New)
-                    # second transition -> new is now old
-                    mask_old = maskY & (SimWeather.doy == DOY_LEAPDAY+1)
-                    New = SimWeather.loc[mask_old, cols].values[-1]
-                    Last = SimWeather.loc[mask_new, cols].values
-                    SimWeather.loc[mask_old, cols] = (wDayInv*Last + wDay*New)
-                else:
-                    # just add missing data to last day of year
-                    # since information is missing
-                    # for time before doyStart,
-                    # the last two known days will be extrapolated
-                    mask_new = maskY & (SimWeather.doy == 366)
-                    mask_old_1 = maskY & (SimWeather.doy == 364)
-                    mask_old_2 = maskY & (SimWeather.doy == 365)
-                    # scale new temperature in relation to
-                    # last temperature of day before
-                    Last = SimWeather.loc[mask_old_2, cols].values[-1]
-                    New = (w[0] * SimWeather.loc[mask_old_1, cols].values +
-                           w[1] * SimWeather.loc[mask_old_2, cols].values)
-                    SimWeather.loc[mask_new, cols] = (wDay*Last + wDayInv*New)
-        # set year Flag
-        yearEnd = SimWeather.loc[maskY, cols].values[-1]
-
-    # go threw simulated weather data and interpolate it for simData
-    simTime = (simData[('time', '')] -
-               simData[('time', '')][0]).dt.total_seconds()
-    for col in cols:
-        fWeather = interp1d(SimWeather['t [s]'], SimWeather[col], 'linear',
-                            bounds_error=False, fill_value='extrapolate')
-        simData[('Weather', col)] = fWeather(simTime).astype(np.float32)
+        if isLeapFix[yNr]:
+            w = (wLeap[:, yNr, 0], wLeap[:, yNr, 1])
+            # two cases:
+            # 1. Start before leap -> interpolate leap
+            # 2. Start after leap -> extrapolate end pf year
+            if yDoy[0] < DOY_LEAPDAY:
+                leapDay = dayIdx(DOY_LEAPDAY)
+                dayBefore = dayIdx(DOY_LEAPDAY-1)
+                dayAfter = dayIdx(DOY_LEAPDAY+1)
+                # move data beginning from leap day
+                SimWeather[:, dayAfter.start:end] = (
+                    SimWeather[:, leapDay.start:end-lenDay].copy())
+                # interpolate leap day data with surrounding days
+                # leap day has March 1st for know -> add Feb 28th
+                New = (w[0] * SimWeather[:, leapDay] +
+                       w[1] * SimWeather[:, dayBefore])
+                Last = SimWeather[:, dayBefore.stop-1:dayBefore.stop]
+                # first transition
+                SimWeather[:, leapDay] = wDay*Last + wDayInv*New
+                # second transition -> new is now old
+                New = SimWeather[:, dayAfter.stop-1:dayAfter.stop]
+                Last = SimWeather[:, leapDay]
+                SimWeather[:, dayAfter] = wDayInv*Last + wDay*New
+            else:
+                # just add missing data to last day of year
+                # since information is missing
+                # for time before doyStart,
+                # the last two known days will be extrapolated
+                day365 = dayIdx(365)
+                Last = SimWeather[:, day365.stop-1:day365.stop]
+                New = (w[0] * SimWeather[:, dayIdx(364)] +
+                       w[1] * SimWeather[:, day365])
+                SimWeather[:, dayIdx(366)] = wDay*Last + wDayInv*New
+
+    # interpolate all variables of simulated weather data at once
+    tWeather = (hours - hours[0]).total_seconds().to_numpy()
+    simTime = (time - time.iloc[0]).dt.total_seconds().to_numpy()
+    # linear interpolation, outside of hourly data
+    # the first / last interval is extrapolated
+    if hours.size < 2:
+        raise ValueError("Simulation time must cover at least one hour")
+    idxHi = np.clip(np.searchsorted(tWeather, simTime), 1, hours.size - 1)
+    idxLo = idxHi - 1
+    xLo = tWeather[idxLo, np.newaxis]
+    slope = ((SimWeather[:, idxHi] - SimWeather[:, idxLo]) /
+             (tWeather[idxHi, np.newaxis] - xLo))
+
+    Weather = slope*(simTime[:, np.newaxis] - xLo) + SimWeather[:, idxLo]
+
+    return Weather.astype(np.float32), cols
+
+
+def getWeatherRealisations(startDate, endDate, region, nRealisations,
+                           seed=None, timeStep=None):
+    """ Generate an ensemble of weather curves for a simulation run
+
+    Each realisation is generated in the same way as the weather data of
+    getSimData. With the same seed, the first realisation is equal to the
+    weather data of getSimData.
 
-    return simData
+    Args:
+        startDate (string): Start date DD.MM.YYYY
+                            (start time is hard coded to 00:00)
+        endDate (string): End date DD.MM.YYYY
+                          (end day is not in time range, so end date
+                           should be end date + 1 day)
+        region (string): Location of simulation (determines climate / weather)
+                         Supported regions:
+                            East, West, South, North
+        nRealisations (int): Number of weather curves to generate
+        seed (int): Seed for generation of weather data
+                    (Default: None -> random weather)
+        timeStep (float): Time step [h]
+                          (Default: None -> time step of simulation,
+                           see SystemComponentsFast.set_time_step)
+
+    Returns:
+        (np array, [string]): Weather data
+                              (realisations x steps x variables, float32)
+                              and names of variables
+    """
+    if nRealisations < 1:
+        raise ValueError("Number of realisations must be greater than 0")
+
+    time = pd.Series(_getTimeRange(startDate, endDate,
+                                   _getStepsPerDay(timeStep)))
+
+    return _getWeatherRealisations(time, region, nRealisations,
+                                   np.random.default_rng(seed))
 
 
 def _getSolarPosition(simData, latitude, longitude):
@@ -367,28 +515,97 @@ def _getSolarPosition(simData, latitude, longitude):
         pandas data frame: Data frame with sim data
 
     """
-    # TODO: calculation assumes UTC-time if not localized
-    solarPosition = pv.solarposition.get_solarposition(
-                                   simData[('time', '')],
-                                   latitude,
-                                   longitude
-                               )
-
-    simData[('SolarPosition',
-             'elevation [degree]')] = (solarPosition
-                                       .elevation
-                                       .values
-                                       .astype(np.float32))
-    simData[('SolarPosition',
-             'azimuth [degree]')] = (solarPosition
-                                     .azimuth
-                                     .values
-                                     .astype(np.float32) + 180.)
+    elevation, azimuth = _getSolarPositions(simData[('time', '')].values,
+                                            [latitude], [longitude])
+
+    simData[('SolarPosition', 'elevation [degree]')] = elevation[0, :]
+    simData[('SolarPosition', 'azimuth [degree]')] = azimuth[0, :]
 
     return simData
 
 
-def getSimData_df(startDate, endDate, region):
+def _getSolarPositions(time, latitudes, longitudes):
+    """ Get position of sun for several locations
+
+    Args:
+        time (np datetime64 array): Time of simulation steps
+        latitudes (list of float): Latitude of each location in
+                                   decimal degrees
+        longitudes (list of float): Longitude of each location in
+                                    decimal degrees
+
+    Returns:
+        np float32 arrays: Elevation and azimuth (+ 180 degree)
+                           in degree (locations x steps)
+    """
+    # TODO: calculation assumes UTC-time if not localized
+    unixTime = (np.asarray(time, dtype='datetime64[s]')
+                .astype(np.int64).astype(np.float64))
+    elevation, azimuth = solar_position(unixTime,
+                                        [float(lat) for lat in latitudes],
+                                        [float(lon) for lon in longitudes])
+    azimuth += np.float32(180.)
+
+    return elevation, azimuth
+
+
+def getSolarPositions(startDate, endDate, latitudes, longitudes,
+                      timeStep=None):
+    """ Get position of sun for many locations (e.g. one per cell)
+    in one call
+
+    Args:
+        startDate (string): Start date DD.MM.YYYY
+                            (start time is hard coded to 00:00)
+        endDate (string): End date DD.MM.YYYY
+                          (end day is not in time range, so end date
+                           should be end date + 1 day)
+        latitudes (list of float): Latitude of each location in
+                                   decimal degrees
+        longitudes (list of float): Longitude of each location in
+                                    decimal degrees
+        timeStep (float): Time step [h]
+                          (Default: None -> time step of simulation,
+                           see SystemComponentsFast.set_time_step)
+
+    Returns:
+        np float32 arrays: Elevation and azimuth in degree
+                           (locations x steps), the columns of solar position
+                           in the simulation data are equal to the row of
+                           the corresponding location
+    """
+    time = _getTimeRange(startDate, endDate, _getStepsPerDay(timeStep))
+
+    return _getSolarPositions(time.values, latitudes, longitudes)
+
+
+def getPeriodSteps(startDate, endDate, period='M', timeStep=None):
+    """ Get number of simulation steps of each calendar period,
+    e.g. for monthly totals of history memories
+    (see SystemComponentsFast.Recorder)
+
+    Args:
+        startDate (string): Start date DD.MM.YYYY
+        endDate (string): End date DD.MM.YYYY
+                          (end day is not in time range)
+        period (string): Calendar period as pandas period alias,
+                         e.g. 'D', 'W', 'M', 'Q' or 'Y' (Default: 'M')
+        timeStep (float): Time step [h]
+                          (Default: None -> time step of simulation,
+                           see SystemComponentsFast.set_time_step)
+
+    Returns:
+        [int]: Number of simulation steps of each period
+               (first and last period may be incomplete)
+    """
+    time = _getTimeRange(startDate, endDate, _getStepsPerDay(timeStep))
+    periods = pd.Series(1, index=time.to_period(period))
+
+    return periods.groupby(level=0).size().tolist()
+
+
+def getSimData_df(startDate, endDate, region, seed=None, state='SN',
+                  timeStep=None):
     """ Get all boundary condition data needed for a simulation run
 
     Args:
@@ -400,19 +617,25 @@ def getSimData_df(startDate, endDate, region):
         region (string): Location of simulation (determines climate / weather)
                          Supported regions:
                             East, West, South, North
+        seed (int): Seed for generation of weather data
+                    (Default: None -> random weather)
+        state (string): Federal state, which determines the holidays
+                        (Default: SN)
+        timeStep (float): Time step [h]
+                          (Default: None -> time step of simulation,
+                           see SystemComponentsFast.set_time_step)
 
     Returns:
         pandas data frame: All simulation data needed
     """
-    data = _getSimTime(startDate, endDate)
-    data = _addSLPdata(data)
-    data = _addHotwater(data)
-    data = _getWeather(data, region)
-
-    # Mittelpunkt Deutschland
-    latitude = 51.164305
-    longitude = 10.4541205
-    data = _getSolarPosition(data, latitude, longitude)
+    stepsPerDay = _getStepsPerDay(timeStep)
+
+    data = _getSimTime(startDate, endDate, state, stepsPerDay)
+    data = _addSLPdata(data, stepsPerDay=stepsPerDay)
+    data = _addHotwater(data, stepsPerDay)
+    data = _getWeather(data, region, seed)
+
+    data = _getSolarPosition(data, LATITUDE, LONGITUDE)
     data = _cleanSimData(data)
 
     data.columns = pd.MultiIndex.from_tuples(data.columns)
@@ -420,9 +643,108 @@ def getSimData_df(startDate, endDate, region):
     return data
 
 
-def getSimData(startDate, endDate, region):
+def _getSimDataKey(startDate, endDate, region, seed, state, stepsPerDay):
+    """ Get key of simulation data, which changes with all parameters and
+    source files of the data generation
+
+    Args:
+        startDate (string): Start date DD.MM.YYYY
+        endDate (string): End date DD.MM.YYYY
+        region (string): Location of simulation
+        seed (int): Seed for generation of weather data
+        state (string): Federal state, which determines the holidays
+        stepsPerDay (int): Number of simulation steps per day
+
+    Returns:
+        string: Key of simulation data
+    """
+    sources = (["./BoundaryConditions/Weather/" + region + ".h5",
+                "./BoundaryConditions/Thermal/HotWaterProfile/"
+                "HotWaterDayProfile.h5",
+                "./BoundaryConditions/Simulation/Calendar.py"] +
+               ["./BoundaryConditions/Electrical/SLP/" + name + ".h5"
+                for name in SLP_PROFILES.values()])
+
+    parameter = {'start': startDate, 'end': endDate, 'region': region,
+                 'seed': seed, 'state': state, 'stepsPerDay': stepsPerDay,
+                 'version': SIM_DATA_VERSION,
+                 'location': [LATITUDE, LONGITUDE],
+                 'SLP': SLP_PROFILES,
+                 'sources': [getFileHash(source) for source in sources]}
+
+    return hashlib.sha256(json.dumps(parameter, sort_keys=True)
+                          .encode()).hexdigest()
+
+
+def _loadSimData(cacheDir):
+    """ Load cached simulation data
+
+    The data is memory mapped (read-only), so all processes using the
+    same simulation data share the same memory pages.
+
+    Args:
+        cacheDir (string): Location of cached data
+
+    Returns:
+        int / np float (arrays): see getSimData
+    """
+    with open(os.path.join(cacheDir, 'columns.json'), 'r') as columnFile:
+        columns = json.load(columnFile)
+
+    time = pd.Series(np.load(os.path.join(cacheDir, 'time.npy')))
+    HWP = np.load(os.path.join(cacheDir, 'HWPfactor.npy'), mmap_mode='r')
+    groups = [pd.DataFrame(np.load(os.path.join(cacheDir, group + '.npy'),
+                                   mmap_mode='r'),
+                           columns=columns[group], copy=False)
+              for group in SIM_DATA_GROUPS]
+
+    return (time.size, time, groups[0], HWP, groups[1], groups[2])
+
+
+def _saveSimData(cacheDir, data):
+    """ Save simulation data to cache
+
+    Each group of data is saved as float32 matrix in column major order,
+    so each column is contiguous. The data is written to a temporary
+    directory first, so a parallel process never sees incomplete data.
+
+    Args:
+        cacheDir (string): Location of cached data
+        data (pandas data frame): Simulation data (see getSimData_df)
+    """
+    os.makedirs(SIM_DATA_CACHE_LOC, exist_ok=True)
+    tmpDir = tempfile.mkdtemp(dir=SIM_DATA_CACHE_LOC)
+
+    np.save(os.path.join(tmpDir, 'time.npy'), data[('time', '')].values)
+    np.save(os.path.join(tmpDir, 'HWPfactor.npy'),
+            data.HWPfactor.to_numpy(dtype=np.float32))
+    columns = {}
+    for group in SIM_DATA_GROUPS:
+        columns[group] = data[group].columns.to_list()
+        np.save(os.path.join(tmpDir, group + '.npy'),
+                np.asfortranarray(data[group].to_numpy(dtype=np.float32)))
+
+    with open(os.path.join(tmpDir, 'columns.json'), 'w') as columnFile:
+        json.dump(columns, columnFile)
+
+    try:
+        os.rename(tmpDir, cacheDir)
+    except OSError:
+        # data was saved by another process in the meantime
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+
+def getSimData(startDate, endDate, region, seed=None, state='SN',
+               timeStep=None, useCache=True):
     """ Get all boundary condition data needed for a simulation run
 
+    If a seed is given, the data is reproducible and thus cached
+    (see SIM_DATA_CACHE_LOC). The key of the cached data includes all
+    parameters and the content of all source files, so changed boundary
+    data results in a new cache entry. Cached data is always returned
+    memory mapped and read-only, also directly after it was generated.
+    Without cache (no seed or useCache=False) writable data is returned.
+
     Args:
         startDate (string): Start date DD.MM.YYYY
                             (start time is hard coded to 00:00)
@@ -432,12 +754,37 @@ def getSimData(startDate, endDate, region):
         region (string): Location of simulation (determines climate / weather)
                          Supported regions:
                             East, West, South, North
+        seed (int): Seed for generation of weather data
+                    (Default: None -> random weather)
+        state (string): Federal state, which determines the holidays
+                        (Default: SN)
+        timeStep (float): Time step [h]
+                          (Default: None -> time step of simulation,
+                           see SystemComponentsFast.set_time_step)
+        useCache (bool): Use cached data, if a seed is given
+                         (Default: True)
 
     Returns:
         int / np float (arrays): nSteps, time, SLP_PHH, SLP_BSLa, SLP_BSLc,
                                  HWP, T, Eg, Ws
     """
-    data = getSimData_df(startDate, endDate, region)
+    stepsPerDay = _getStepsPerDay(timeStep)
+
+    useCache = useCache and (seed is not None)
+    if useCache:
+        cacheDir = os.path.join(SIM_DATA_CACHE_LOC,
+                                _getSimDataKey(startDate, endDate, region,
+                                               seed, state, stepsPerDay))
+        if os.path.isdir(cacheDir):
+            return _loadSimData(cacheDir)
+
+    data = getSimData_df(startDate, endDate, region, seed, state,
+                         24. / stepsPerDay)
+
+    if useCache:
+        _saveSimData(cacheDir, data)
+        # same (read-only) data as on a cache hit
+        return _loadSimData(cacheDir)
 
     return (data.time.size, data.time,
             data.SLP,
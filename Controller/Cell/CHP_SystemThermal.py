@@ -27,6 +27,11 @@ class CtrlDefault(CtrlTemplate):
     def step(self, StorageState, *args):
         """ Default controller strategy
 
+        The same strategy is available natively as StorageController
+        of SystemComponentsFast (rule_controller of the thermal systems),
+        which should be preferred, since no python call is needed
+        for each step.
+
         Arguments:
             StorageState {float} -- Relative charge of thermal storage (0 to 1)
 
@@ -47,6 +52,43 @@ class CtrlDefault(CtrlTemplate):
         return (CHPstate, BoilerState)
 
 
+class CtrlDefaultBatch(CtrlDefault):
+    def __init__(self, nSteps=4):
+        """ Default controller strategy, which is only called
+        every nSteps steps by the thermal system
+
+        The thermal system calls step_batch earlier, if the storage
+        reaches a critical level.
+
+        Arguments:
+            nSteps {int} -- Number of steps the decision is kept
+                            (default: {4}, which corresponds to 1h)
+        """
+        super().__init__()
+        if nSteps < 1:
+            raise ValueError("Number of steps must be greater than 0")
+
+        self.nSteps = nSteps
+
+    def step_batch(self, Observation):
+        """ Get operational states of CHP and Boiler for the next steps
+
+        Arguments:
+            Observation {np.ndarray} -- Buffer with relative charge of
+                                        thermal storage, cell state and
+                                        ambient values (float32, 14 values).
+                                        The buffer is reused by the thermal
+                                        system, copy it to keep the values.
+
+        Returns:
+            np.ndarray -- Operational states of CHP and Boiler
+                          (nSteps x 2, True => running)
+        """
+        states = self.step(float(Observation[0]))
+
+        return np.tile(states, (self.nSteps, 1))
+
+
 class CtrlSmartSimple(CtrlTemplate):
     def __init__(self, capacity: int, batchSize: int,
                  epsStart: float, epsMin: float, epsDecay: int, cMax: float,
@@ -377,7 +419,7 @@ class CtrlSmartSimple(CtrlTemplate):
     def step(self, StorageState, CellState, Ambient):
         # prepare boundary conditions
         gen_e, load_e, gen_t, load_t, contrib_e, contrib_t, fuel = CellState
-        Eg, solEl, solAz, Tout, Tmean = Ambient
+        Eg, solEl, solAz, Ws, Tout, Tmean = Ambient
         state = np.array([StorageState,
                          gen_t, load_t, Tmean], dtype=np.float32)
 
@@ -783,7 +825,7 @@ class CtrlSmart(CtrlTemplate):
     def step(self, StorageState, CellState, Ambient):
         # prepare boundary conditions
         gen_e, load_e, gen_t, load_t, contrib_e, contrib_t, fuel = CellState
-        Eg, solEl, solAz, Tout = Ambient
+        Eg, solEl, solAz, Ws, Tout, Tmean = Ambient
         state = np.array([StorageState, gen_e, load_e, gen_t, load_t,
                           contrib_e, contrib_t, fuel,
                           Eg, solEl, solAz, Tout], dtype=np.float32)
@@ -93,9 +93,9 @@ def getSaveDataFrame():
 def saveParameter(saveLoc, cell, PLCparameter):
     nAgents = 0
     pPV = 0
-    for building in cell.buildings:
+    for building in cell.iter_buildings():
         nAgents += building.n_agents
-        if building.pv:
+        if building.has_pv():
             pPV += 1
 
     pPV = pPV / cell.n_buildings * 100.
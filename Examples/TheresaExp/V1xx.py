@@ -20,8 +20,7 @@ nSteps, time, SLP, HWP, Weather, Solar, cell = getDefaultCellData(start, end)
 cell = addTheresaSystem(cell, nSteps)
 
 # %%
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # %%
 ts = cell.get_theresa_system()
@@ -3,16 +3,89 @@
     Statistics and boundary conditions used are documented in
     TODO: Source Final Report
 """
+import bisect
+import hashlib
+import json
 import numpy as np
-import pandas as pd
 import logging as lg
-from SystemComponentsFast import Agent, Building, Cell, SepBSLagent
+import math
+import os
+import shutil
+import tempfile
+import SystemComponentsFast
+from SystemComponentsFast import (Agent, Building, Cell, RecordingRule,
+                                  ReferenceYear, SepBSLagent,
+                                  get_memory_sizes, set_seed)
+from BoundaryConditions.BoundaryData import (DATA_LOC, getBuildingData,
+                                             getClimate, getData, getFileHash,
+                                             getReferenceWeather)
 
 
 lg.basicConfig(level=lg.WARNING)
 
+# states of reference buildings
+M_STATES = ['original', 'modernised']
+AIR_STATES = ['VentilationFree', 'VentilationMech']
+# supply temperatures of heatpumps for different classes of buildings
+HP_SUPPLY_TEMPERATURES = {"class_1": {'original': 75, 'modernised': 65},
+                          "class_2": {'original': 70, 'modernised': 60},
+                          "class_3": {'original': 55, 'modernised': 45},
+                          "class_4": {'original': 45, 'modernised': 40},
+                          "class_5": {'original': 37, 'modernised': 32}}
+HP_SEAS_PERF_FAC = 3.5
+# lognormal distribution of electrical CHP power [MW],
+# powers outside of limits [W] are dismissed
+CHP_POWER_MU = -4.894316543131761
+CHP_POWER_SIGMA = 1.281345974473205
+CHP_POWER_LIMITS = (3000., 6000.)
+# proportion of samples within the limits
+CHP_POWER_ACCEPTANCE = 0.19
+# Location of cached generic cells
+CELL_CACHE_LOC = "./GenericModel/cache/"
+# must be increased, if the generation of cells is changed
+# outside of this file and the rust extension
+CELL_CACHE_VERSION = 2
+# limits of cell cache, the least recently used cells are removed first
+CELL_CACHE_MAX_SIZE = 2 * 1024**3  # [Byte]
+CELL_CACHE_MAX_CELLS = 256
+# bytes of a history value, a period length of a recorder and a
+# building area with its U-Value
+HIST_VALUE_SIZE = 4
+PERIOD_LENGTH_SIZE = np.dtype(np.uintp).itemsize
+AREA_UV_SIZE = 8
+# number of storages of building heating systems
+N_STORAGES = {'heatpump': 1, 'chp': 2}
+
+
+def _getAgentTypes(shape, pAgent, pPHH, pAgriculture, rng):
+    """ Get random types of agents for all possible agent places
 
-def _addAgents(building, pAgent, pPHH, pAgriculture):
+    Args:
+        shape (tuple): Shape of agent places (e.g. buildings x max. agents)
+        pAgent (float32): Probability that agents is created
+                          (Corresponds to the propotion of agents on
+                           max. possible Agents in Building(s))
+        pPHH (float32): Proportion of PHH agents in Building
+        pAgriculture (float32): Proportion of BSL agents which are
+                                agricultural
+        rng (np.random.Generator): Random number generator
+
+    Returns:
+        np int8 array: Agent types (0: PHH, 1: BSLa, 2: BSLc,
+                       -1: no agent)
+    """
+    hasAgent = rng.random(shape) <= pAgent
+    isPHH = rng.random(shape) <= pPHH
+    isAgriculture = rng.random(shape) <= pAgriculture
+
+    aTypes = np.where(isPHH, 0, np.where(isAgriculture, 1, 2)
+                      ).astype(np.int8)
+    aTypes[~hasAgent] = -1
+
+    return aTypes
+
+
+def _addAgents(building, pAgent, pPHH, pAgriculture, rng=None):
     """ Add agents to building
 
     Args:
@@ -23,33 +96,80 @@ def _addAgents(building, pAgent, pPHH, pAgriculture):
         pPHH (float32): Proportion of PHH agents in Building
         pAgriculture (float32): Proportion of BSL agents which are
                                 agricultural
+        rng (np.random.Generator): Random number generator
+                                   (Default: None -> new unseeded generator)
 
     Returns:
         Building: Building object with agents
     """
-    for aNr in range(building.n_max_agents):
-        if np.random.random() > pAgent:
-            continue
+    if rng is None:
+        rng = np.random.default_rng()
 
-        # determine agent type
-        if np.random.random() <= pPHH:
-            aType = 0
-        else:
-            if np.random.random() <= pAgriculture:
-                aType = 1
-            else:
-                aType = 2
-
-        agent = Agent(aType)
-        building.add_agent(agent)
+    for aType in _getAgentTypes(building.n_max_agents, pAgent, pPHH,
+                                pAgriculture, rng):
+        if aType >= 0:
+            building.add_agent(Agent(int(aType)))
 
     return building
 
 
-def _addBuildings(cell, nBuilding, pBuilding, pDHN, t_ref, Geo, U, g, n,
-                  pAgent, pPHH, pAgriculture, pPV, pHP, hist=0):
+def _getBuildingTables(Geo, U, g, n, classNames):
+    """ Resolve parameters of a building type for all combinations of
+    age class, modernisation state and ventilation method
+
+    Args:
+        Geo (pd DataFrame): Geometry data of building type
+        U (pd DataFrame): U-Values of building type
+        g (pd DataFrame): Solar factors for building type
+        n (pd DataFrame): Infiltration rates of building type
+        classNames ([string]): Names of age classes
+
+    Returns:
+        dict: np arrays of parameters
+                - 'UValues': classes x M_STATES x areas
+                - 'DeltaU', 'g', 'Infiltration', 'tSupply':
+                  classes x M_STATES
+                - 'Ventilation': classes x M_STATES x AIR_STATES
+    """
+    areaNames = Geo.loc['Areas'].index
+    tables = {'UValues': [], 'DeltaU': [], 'g': [], 'Infiltration': [],
+              'Ventilation': [], 'tSupply': []}
+
+    for cName in classNames:
+        for key in tables.keys():
+            tables[key].append([])
+        for mState in M_STATES:
+            # for Air infiltration/ventilation consider new buildings
+            if cName == 'class_5':
+                infState = 'new'
+            else:
+                infState = mState
+
+            tables['UValues'][-1].append(
+                U.loc[('UValues', areaNames), (cName, mState)].values)
+            tables['DeltaU'][-1].append(U.loc[('DeltaU', ''),
+                                              (cName, mState)])
+            tables['g'][-1].append(g.loc[mState, cName])
+            tables['Infiltration'][-1].append(n.loc['Infiltration',
+                                                    infState])
+            tables['Ventilation'][-1].append([n.loc[airState, infState]
+                                              for airState in AIR_STATES])
+            tables['tSupply'][-1].append(
+                HP_SUPPLY_TEMPERATURES.get(cName, {}).get(mState, np.nan))
+
+    return {key: np.array(table, dtype=np.float32)
+            for key, table in tables.items()}
+
+
+def _addBuildings(cell, nBuilding, pBuilding, pDHN, refYear, Geo, U, g, n,
+                  pAgent, pPHH, pAgriculture, pPV, pHP, hist=0,
+                  rng=None):
     """ Add Buildings of one type to cell
 
+    All random attributes of the buildings are drawn at once and the
+    parameters of each building are taken from precomputed tables.
+    The buildings are created by the cell in one call.
+
     Args:
         cell (Cell): Cell where to add buildings
         nBuilding (uint32): Number of buildings to add
@@ -58,8 +178,8 @@ def _addBuildings(cell, nBuilding, pBuilding, pDHN, t_ref, Geo, U, g, n,
                           ventilation method
         pDHN (float32): Proportion of buildings connected
                         to the district heating network
-        t_ref ([float]): Reference temperature curve for ragion of buildings
-                         as list [degC]
+        refYear (ReferenceYear): Reference temperatures for region of
+                                 buildings (shared by heatpump designs)
         Geo (pd DataFrame): Geometry data of building type
         U (pd DataFrame): U-Values of building type
         g (pd DataFrame): Solar factors for building type
@@ -74,106 +194,116 @@ def _addBuildings(cell, nBuilding, pBuilding, pDHN, t_ref, Geo, U, g, n,
         pHP (dict): Mapping of proportion factor for heatpumps
                                    in each building class (0 to 1)
         hist (int): Size of history for power balance of buildings, pv etc.
+        rng (np.random.Generator): Random number generator
+                                   (Default: None -> new unseeded generator)
     """
+    if rng is None:
+        rng = np.random.default_rng()
+
     pClass = np.array(pBuilding['Class'])
     pModern = np.array(pBuilding['Modern'])
     pAirMech = np.array(pBuilding['AirMech'])
 
     # generate names for all age classes of specific building type
     classNames = ['class_' + str(Nr+1) for Nr in range(pClass.size)]
+    pHPclass = np.array([pHP[cName] for cName in classNames])
     # get cumulative probabilities for vectorized class mapping
     pClass = pClass.cumsum()
 
-    for Nr in range(nBuilding):
-        p = np.random.random()
-        # get building age class
-        classIdx = (p <= pClass).argmax()
-        # get modernisation state
-        if np.random.random() <= pModern[classIdx]:
-            mState = 'modernised'
-        else:
-            mState = 'original'
-        # get ventilation state
-        if np.random.random() <= pAirMech[classIdx]:
-            airState = 'VentilationMech'
-        else:
-            airState = 'VentilationFree'
-        # for Air infiltration/ventilation consider new buildings
-        if classNames[classIdx] == 'class_5':
-            infState = 'new'
-        else:
-            infState = mState
-
-        isAtDHN = np.random.random() <= pDHN
-
-        # create a_uv_array
-        a_uv_values = np.array([Geo.loc['Areas'].values.T[0],
-                                U.loc[('UValues', Geo.loc['Areas'].index),
-                                      (classNames[classIdx], mState)].values.T
-                                ]).T
-
-        # create building
-        # effective heat capacity with fixed C_eff of 15. (Wh)/(m^3K)
-        building = Building(Geo.loc['nUnits'].values.astype(np.uint32)[0][0],
-                            Geo.loc[('A_living', ''), 'Value'], a_uv_values,
-                            U.loc[('DeltaU', ''),
-                                  (classNames[classIdx], mState)],
-                            n.loc['Infiltration', infState],
-                            n.loc[airState, infState],
-                            (Geo.loc['cp_effective'] *
-                             Geo.loc['Volume']).Value,
-                            g.loc[mState, classNames[classIdx]],
-                            Geo.loc[('Volume')].values.astype(np.uint32)[0][0],
-                            isAtDHN, cell.t_out_n, hist
-                            )
-        # Create and add agents
-        _addAgents(building, pAgent, pPHH, pAgriculture)
-        # add PV to buildings
-        if np.random.random() <= pPV:
-            building.add_dimensioned_pv(cell.eg, hist)
-
-        # add heatpump to building
-        if pHP[classNames[classIdx]] > np.random.random():
-            # supply temperatures for different classes of buildings
-            classTemperatures = {"class_1": {'original': 75, 'modernised': 65},
-                                 "class_2": {'original': 70, 'modernised': 60},
-                                 "class_3": {'original': 55, 'modernised': 45},
-                                 "class_4": {'original': 45, 'modernised': 40},
-                                 "class_5": {'original': 37, 'modernised': 32}}
-            # supply temperature
-            t_supply = classTemperatures[classNames[classIdx]][mState]
-
-            seas_perf_fac = 3.5
-
-            if building.q_hln < 5000 or building.q_hln > 80000:
-                lg.warning("for this building no heatpump data is available, "
-                           "maximum heat load is {:.2f}W"
-                           .format(building.q_hln))
-            # differentiate by installed power
-            else:
-                building.add_dimensioned_heatpump(seas_perf_fac,
-                                                  t_supply,
-                                                  t_ref,
-                                                  cell.t_out_n,
-                                                  hist)
-                lg.debug("installed {:.2f}W thermal heatpump generation"
-                         .format(building.q_hln))
-
-        # add building to cell
-        cell.add_building(building)
+    tables = _getBuildingTables(Geo, U, g, n, classNames)
+    nMaxAgents = Geo.loc['nUnits'].values.astype(np.uint32)[0][0]
+
+    # random attributes of all buildings
+    classIdx = (rng.random(nBuilding)[:, np.newaxis] <= pClass).argmax(axis=1)
+    mIdx = (rng.random(nBuilding) <= pModern[classIdx]).astype(int)
+    airIdx = (rng.random(nBuilding) <= pAirMech[classIdx]).astype(int)
+    isAtDHN = rng.random(nBuilding) <= pDHN
+    aTypes = _getAgentTypes((nBuilding, nMaxAgents), pAgent, pPHH,
+                            pAgriculture, rng)
+    hasPV = rng.random(nBuilding) <= pPV
+    hasHP = pHPclass[classIdx] > rng.random(nBuilding)
+
+    tSupply = np.where(hasHP, tables['tSupply'][classIdx, mIdx],
+                       np.nan).astype(np.float32)
+
+    # create buildings
+    # effective heat capacity with fixed C_eff of 15. (Wh)/(m^3K)
+    first = cell.add_buildings_from_arrays(
+        nMaxAgents, Geo.loc[('A_living', ''), 'Value'],
+        Geo.loc['Areas'].values.T[0].tolist(),
+        np.ascontiguousarray(tables['UValues'][classIdx, mIdx]),
+        tables['DeltaU'][classIdx, mIdx],
+        tables['Infiltration'][classIdx, mIdx],
+        tables['Ventilation'][classIdx, mIdx, airIdx],
+        (Geo.loc['cp_effective'] * Geo.loc['Volume']).Value.item(),
+        tables['g'][classIdx, mIdx],
+        Geo.loc[('Volume')].values.astype(np.uint32)[0][0],
+        isAtDHN, aTypes, hasPV, tSupply, HP_SEAS_PERF_FAC, refYear, hist)
+
+    lg.debug("added {} buildings starting at position {}, {} with heatpump"
+             .format(nBuilding, first, hasHP.sum()))
 
     return cell
 
 
-def addCHPtoCellBuildings(cell, pCHP, hist=0):
+def _sampleCHPPowers(instPower_el, rng):
+    """ Sample electrical CHP powers until installed power is reached
+
+    The powers are drawn from a lognormal distribution truncated
+    to CHP_POWER_LIMITS. The samples are generated in batches,
+    which are large enough to reach the installed power in most cases.
+    Hence more random numbers are drawn than by single samples and
+    seeded cells differ from cells generated with single samples.
+
+    Args:
+        instPower_el (float): Electrical power to install [W]
+        rng (np.random.Generator): Random number generator
+
+    Returns:
+        np array: Electrical powers of CHP [W]
+                  (sum is at least instPower_el)
+    """
+    if instPower_el <= 0:
+        return np.empty(0)
+
+    lowLim, upLim = CHP_POWER_LIMITS
+    # ... and make sure to match cell demand
+    nMin = int(np.ceil(instPower_el / upLim))
+    samples = []
+    _sum = 0.
+    while _sum < instPower_el:
+        powers_el = rng.lognormal(CHP_POWER_MU, CHP_POWER_SIGMA,
+                                  int(nMin / CHP_POWER_ACCEPTANCE) + 16)
+        powers_el *= 1000000.  # MW to W
+        powers_el = powers_el[(powers_el >= lowLim) & (powers_el <= upLim)]
+        samples.append(powers_el)
+        _sum += powers_el.sum()
+
+    powers_el = np.concatenate(samples)
+    nPowers = np.searchsorted(np.cumsum(powers_el), instPower_el) + 1
+
+    return powers_el[:nPowers]
+
+
+def addCHPtoCellBuildings(cell, pCHP, hist=0, rng=None):
     """Add CHP to buildings
 
+    Each CHP is added to the building, whose heat load fits best
+    to the thermal power of the CHP (the first building, if several fit
+    equally well). To find this building fast, the candidates are kept
+    sorted by their best matching thermal power.
+
     Args:
         cell (Cell): cell where CHPs shall be added
         pCHP (float32): percentage of electricity production delivered by CHP
         hist (int): Size of history for power balance/energy level of chp,
                     storage etc. (Default: 0)
+        rng (np.random.Generator): Random number generator
+                                   (Default: None -> new unseeded generator)
     """
+    if rng is None:
+        rng = np.random.default_rng()
+
     # default thermal-to-electrical factor
     th_el = 2.
     # default full run time in h
@@ -184,50 +314,49 @@ def addCHPtoCellBuildings(cell, pCHP, hist=0):
     upLim = 0.25
     lowLim = 0.45
 
-    # this is maybe not the fastest way to do this, could be moved to rust
     # get electricity consumption of cell
-    buildings_q_hln = []
     electricalDemand = cell.get_electrical_demand()
-    for idx, building in enumerate(cell.buildings):
-        if not building.has_heating_system():
-            buildings_q_hln.append((idx, building.q_hln))
+    # candidates sorted by best matching thermal power,
+    # equal powers are sorted by position of building
+    candidates = sorted((q_hln*relPow, idx, q_hln)
+                        for idx, q_hln in
+                        zip(*cell.get_unheated_heat_loads()))
+    bestPowers = [candidate[0] for candidate in candidates]
 
     # installed power gets scaled by hours/year
     instPower_el = electricalDemand * pCHP / full
 
-    # generate CHP powers from ...
-    # ... distribution:
-    mu = -4.894316543131761
-    sigma = 1.281345974473205
-    _sum = 0
-    # ... and make sure to match cell demand
-    powers_el = []
-    while _sum < instPower_el:
-        powers_el.append(np.random.lognormal(mu, sigma)*1000000.)  # MW to W
-        if powers_el[-1] < 3000 or powers_el[-1] > 6000:
-            powers_el.pop()
-            continue
-        _sum += powers_el[-1]
-    # convert to thermal power by thermal-to-electrical factor
-    powers_th = [power*th_el for power in powers_el]
+    # generate CHP powers and convert to thermal power
+    # by thermal-to-electrical factor
+    powers_th = (_sampleCHPPowers(instPower_el, rng) * th_el).tolist()
 
     # find first building with matching heat need
     instPower_th = 0
     for power in powers_th:
-        L_idx, B_idx_q_hln = min(enumerate(buildings_q_hln),
-                                 key=lambda Lidx_Bidx_qhln:
-                                 abs(Lidx_Bidx_qhln[1][1]*relPow-power))
-        idx = B_idx_q_hln[0]
-        q_hln = B_idx_q_hln[1]
+        if not candidates:
+            lg.warning("no building without heating system left, "
+                       "remaining chp are dismissed")
+            break
+        # closest candidates are next to insertion point, the first
+        # building of candidates with the same power is the lower one
+        pos = bisect.bisect_left(bestPowers, power)
+        if pos > 0:
+            lower = bisect.bisect_left(bestPowers, bestPowers[pos-1])
+            if pos == len(bestPowers):
+                pos = lower
+            else:
+                # equally close candidates are chosen by position
+                # of building, as by a scan over all buildings
+                lowerDist = abs(bestPowers[lower] - power)
+                upperDist = abs(bestPowers[pos] - power)
+                if (lowerDist, candidates[lower][1]) < (upperDist,
+                                                        candidates[pos][1]):
+                    pos = lower
+        _, idx, q_hln = candidates[pos]
 
         # add chp to building if difference is below threshold
         if upLim < power/q_hln < lowLim:
-            # get building
-            building = cell.buildings[idx]
-            # add chp
-            building.add_dimensioned_chp(hist)
-            # write back to buildings vec
-            cell.update_building(idx, building)
+            cell.add_dimensioned_chp(idx, hist)
             # keep track of already installed power
             instPower_th += power
             # ToDo: What if building already has e.g. heat pump?
@@ -236,7 +365,8 @@ def addCHPtoCellBuildings(cell, pCHP, hist=0):
                                                             q_hln,
                                                             power/q_hln))
             # prevent doubling
-            del buildings_q_hln[L_idx]
+            del candidates[pos]
+            del bestPowers[pos]
         else:
             lg.warning("for chp with thermal power {:.2f}W closest "
                        "building had {:.2f}W maximum heat load."
@@ -253,7 +383,7 @@ def addCHPtoCellBuildings(cell, pCHP, hist=0):
              .format(instPower_th/2*5000/(electricalDemand)))
 
 
-def addSepBSLAgents(cell, nAgents, pAgriculture, pPV, hist=0):
+def addSepBSLAgents(cell, nAgents, pAgriculture, pPV, hist=0, rng=None):
     """ Add separate BSL Agent to cell
 
     Args:
@@ -264,17 +394,22 @@ def addSepBSLAgents(cell, nAgents, pAgriculture, pPV, hist=0):
         pPV (float32): Proportion of bsl agents with PV plants
         hist (int): Size of history for power balance of bsl agents, pv etc.
                     (Default: 0)
+        rng (np.random.Generator): Random number generator
+                                   (Default: None -> new unseeded generator)
     """
+    if rng is None:
+        rng = np.random.default_rng()
+
     for Nr in range(nAgents):
         # get agent type
-        if np.random.random() < pAgriculture:
+        if rng.random() < pAgriculture:
             aType = 1
         else:
             aType = 2
 
         agent = SepBSLagent(aType, hist)
 
-        if np.random.random() <= pPV:
+        if rng.random() <= pPV:
             agent.add_dimensioned_pv(cell.eg, hist)
 
         cell.add_sep_bsl_agent(agent)
@@ -355,21 +490,383 @@ def _checkParameter(UValues, parameterSet):
                          .format(failedParameter, parameterSet['type']))
 
 
+def _getReferenceYear(region):
+    """ Get reference year of region for heatpump dimensioning
+
+    The reference year is registered like the boundary data, hence the
+    memoized heatpump designs are shared by all cells of a region.
+
+    Args:
+        region (string): Location of cell
+
+    Returns:
+        ReferenceYear: Reference temperatures of region
+    """
+    return getData('ReferenceYear', region,
+                   lambda: ReferenceYear(getReferenceWeather(region)['T']))
+
+
 def _loadBuildingData(bType):
-    bFile = './BoundaryConditions/Thermal/ReferenceBuildings/' + bType + '.h5'
-    Geo = pd.read_hdf(bFile, key='Geo')
-    U = pd.read_hdf(bFile, key='U')
-    g = pd.read_hdf(bFile, key='g')
-    n = pd.read_hdf(bFile, key='n')
+    # data is shared by boundary data registry -> must not be modified
+    return getBuildingData(bType)
+
 
-    return (Geo, U, g, n)
+def _toJSON(value):
+    """ Convert numpy values of generation parameters for the cache key
+
+    Args:
+        value (any): Value, which isn't supported by json
+
+    Returns:
+        any: Value as python type
+    """
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    if isinstance(value, RecordingRule):
+        return value.__getstate__().hex()
+
+    raise TypeError("Parameter of type {} can't be part of cell cache key"
+                    .format(type(value).__name__))
+
+
+def _getCellKey(parameter, bTypes, region):
+    """ Get key of generated cell, which changes with all parameters and
+    source files of the generation
+
+    Args:
+        parameter (dict): All arguments of generateGenericCell
+        bTypes ([string]): Used reference building types
+        region (string): Location of cell
+
+    Returns:
+        string: Key of cell
+    """
+    sources = ([DATA_LOC + "Weather/" + region + ".h5", __file__,
+                SystemComponentsFast.__file__] +
+               [DATA_LOC + "Thermal/ReferenceBuildings/" + bType + ".h5"
+                for bType in sorted(set(bTypes))])
+
+    key = {'parameter': parameter, 'version': CELL_CACHE_VERSION,
+           'sources': [getFileHash(source) for source in sources]}
+
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=_toJSON)
+                          .encode()).hexdigest()
+
+
+def _removeFile(fileName):
+    try:
+        os.remove(fileName)
+    except OSError:
+        # already removed by another process
+        pass
+
+
+def _loadCachedCell(cellKey):
+    """ Load generated cell from cache
+
+    Args:
+        cellKey (string): Key of cell (see _getCellKey)
+
+    Returns:
+        Cell: Cached cell or None, if the cell isn't cached
+    """
+    fileName = os.path.join(CELL_CACHE_LOC, cellKey + ".bin")
+    if not os.path.isfile(fileName):
+        return None
+
+    try:
+        cell = Cell.load(fileName)
+    except (OSError, ValueError) as error:
+        # e.g. state of outdated format version
+        lg.warning("Cached cell {} can't be loaded and is removed: {}"
+                   .format(cellKey, error))
+        _removeFile(fileName)
+        return None
+
+    try:
+        # mark cell as recently used
+        os.utime(fileName)
+    except OSError:
+        pass
+
+    return cell
+
+
+def _evictCachedCells():
+    """ Remove least recently used cells,
+    until the cache limits are met (see CELL_CACHE_MAX_SIZE and
+    CELL_CACHE_MAX_CELLS)
+    """
+    cachedCells = []
+    for entry in os.scandir(CELL_CACHE_LOC):
+        if not entry.name.endswith(".bin"):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        cachedCells.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+    # most recently used first
+    cachedCells.sort(reverse=True)
+    cacheSize = 0
+    for nr, (_, cellSize, fileName) in enumerate(cachedCells):
+        cacheSize += cellSize
+        if (nr >= CELL_CACHE_MAX_CELLS) or (cacheSize > CELL_CACHE_MAX_SIZE):
+            lg.debug("remove cached cell {}".format(fileName))
+            _removeFile(fileName)
+
+
+def _saveCachedCell(cellKey, cell):
+    """ Save generated cell to cache
+
+    The cell is written to a temporary file first,
+    so a parallel process never loads an incomplete cell.
+
+    Args:
+        cellKey (string): Key of cell (see _getCellKey)
+        cell (Cell): Generated cell (before simulation)
+    """
+    os.makedirs(CELL_CACHE_LOC, exist_ok=True)
+    tmpFile, tmpName = tempfile.mkstemp(suffix=".tmp", dir=CELL_CACHE_LOC)
+    os.close(tmpFile)
+
+    try:
+        # the cell isn't simulated yet, so there is no history to save
+        cell.save(tmpName, False)
+        os.replace(tmpName, os.path.join(CELL_CACHE_LOC, cellKey + ".bin"))
+    except OSError as error:
+        lg.warning("Cell {} can't be cached: {}".format(cellKey, error))
+        _removeFile(tmpName)
+        return
+
+    _evictCachedCells()
+
+
+def clearCellCache():
+    """ Remove all cached generic cells
+    """
+    shutil.rmtree(CELL_CACHE_LOC, ignore_errors=True)
+
+
+def _getMinVecCapacity(itemSize):
+    """ Get capacity of a rust vector after the first allocation
+
+    Args:
+        itemSize (int): Bytes of an item
+
+    Returns:
+        int: Min. capacity of vector
+    """
+    return 4 if itemSize <= 1024 else 1
+
+
+def _getVecCapacity(nItems, itemSize):
+    """ Get capacity of a rust vector, after items are added one by one
+
+    Args:
+        nItems (int): Number of items
+        itemSize (int): Bytes of an item
+
+    Returns:
+        int: Capacity of vector
+    """
+    if nItems == 0:
+        return 0
+
+    return max(_getMinVecCapacity(itemSize),
+               2**math.ceil(math.log2(nItems)))
+
+
+def _getExpectedAgentCapacity(nMaxAgents, pAgent, agentSize):
+    """ Get expected capacity of the agent vector of a building
+
+    Args:
+        nMaxAgents (int): Max. possible agents in building
+        pAgent (float32): Probability that agents is created
+        agentSize (int): Bytes of an agent
+
+    Returns:
+        float: Expected capacity
+    """
+    return sum(math.comb(nMaxAgents, nAgents) * pAgent**nAgents *
+               (1. - pAgent)**(nMaxAgents - nAgents) *
+               _getVecCapacity(nAgents, agentSize)
+               for nAgents in range(nMaxAgents + 1))
+
+
+def _getHistoryBytes(recording, hist, entity, position, component, quantity):
+    """ Get bytes of a history memory of a generated cell
+
+    Args:
+        recording ([RecordingRule]): Recording spec or None
+        hist (int): Size of history (see generateGenericCell)
+        entity (string): Type of entity: "cell", "building" or "sep_bsl"
+        position (int): Position of entity in cell
+        component (string): Name of component
+        quantity (string): Name of quantity
+
+    Returns:
+        int: Bytes of history memory
+    """
+    if recording is None:
+        return hist * HIST_VALUE_SIZE
+
+    # last matching rule decides (see Cell.set_recording)
+    for rule in reversed(recording):
+        if rule.selects(entity, position, component, quantity):
+            break
+    else:
+        return 0
+
+    steps = hist if rule.size is None else rule.size
+    if not rule.record or steps == 0:
+        return 0
+    if rule.recorder is None or rule.recorder.mode == 'raw':
+        return steps * HIST_VALUE_SIZE
+
+    nBytes = rule.recorder.get_size(steps) * HIST_VALUE_SIZE
+    if rule.recorder.periods is not None:
+        nBytes += len(rule.recorder.periods) * PERIOD_LENGTH_SIZE
+
+    return nBytes
+
+
+def _getEquipmentHistoryBytes(recording, hist, entity, position, equipment):
+    """ Get bytes of all history memories of an equipment
+
+    Args:
+        recording ([RecordingRule]): Recording spec or None
+        hist (int): Size of history (see generateGenericCell)
+        entity (string): Type of entity: "cell", "building" or "sep_bsl"
+        position (int): Position of entity in cell
+        equipment (string): Key of Cell.history_names, e.g. "building"
+
+    Returns:
+        int: Bytes of history memories
+    """
+    return sum(_getHistoryBytes(recording, hist, entity, position,
+                                component, quantity)
+               for component, quantity in Cell.history_names()[equipment])
+
+
+def estimateCellMemory(nBuildings, pAgents, pPVplants, pHeatpumps, pCHP,
+                       pBTypes, nSepBSLAgents, hist=0, recording=None):
+    """ Estimate the memory of a generic cell before it is generated
+
+    The estimate uses the same parts as Cell.memory_report and the
+    expected numbers of agents, heatpumps etc. of the generation
+    (see generateGenericCell for the parameters).
+    It is an upper estimate for the heatpumps, since buildings
+    with a heat load out of the heatpump data range get no heatpump.
+    The number of CHP depends on the electrical demand of the generated
+    cell, hence it is roughly estimated with pCHP as proportion of the
+    buildings without heatpump.
+
+    Args:
+        nBuildings (dict): Mapping of Number of buildings to building type
+        pAgents (dict): Mapping of probability for Agents to building type
+        pPVplants (float32): Proportion of buildings with PV-Plants
+        pHeatpumps (dict): Mapping of proportion factor for heatpumps
+                           in each building class
+        pCHP (float32): Proportion of electricity produced by chp
+        pBTypes (dict): Dictionary of proportions for all reference building
+                        types
+        nSepBSLAgents (uint32): Number of separate BSL agents
+        hist (int): Size of history (Default: 0)
+        recording ([RecordingRule]): Recording spec (Default: None)
+
+    Returns:
+        dict: Estimated bytes of "cell", "sub_cells", "buildings", "agents",
+              "heating_systems", "storages", "histories" and "total"
+    """
+    sizes = get_memory_sizes()
+    report = dict.fromkeys(['cell', 'sub_cells', 'buildings', 'agents',
+                            'heating_systems', 'storages', 'histories'], 0.)
+
+    report['cell'] = sizes['Cell'] - sizes['ThermalSystem']
+    report['heating_systems'] = sizes['ThermalSystem']
+    report['histories'] = _getEquipmentHistoryBytes(recording, hist, 'cell',
+                                                    0, 'cell')
+
+    nBuildingsCell = 0
+    buildingCapacity = 0
+    buildingSize = sizes['Building'] - sizes['HeatingSystem']
+    for key in pBTypes.keys():
+        bType = pBTypes[key]['type']
+        nBuilding = nBuildings[bType]
+        if nBuilding == 0:
+            continue
+        Geo, _, _, _ = _loadBuildingData(bType)
+        nMaxAgents = int(Geo.loc['nUnits'].values.astype(np.uint32)[0][0])
+        nAreas = len(Geo.loc['Areas'].values.T[0])
+
+        pClass = np.array(pBTypes[bType]['Class'])
+        pHP = sum(pClass[nr] * pHeatpumps['class_' + str(nr+1)]
+                  for nr in range(pClass.size))
+        equipment = {'pv': pPVplants, 'heatpump': pHP,
+                     'chp': pCHP * (1. - pHP)}
+
+        report['buildings'] += nBuilding * (buildingSize +
+                                            nAreas * AREA_UV_SIZE)
+        report['agents'] += (nBuilding * sizes['Agent'] *
+                             _getExpectedAgentCapacity(nMaxAgents,
+                                                       pAgents[bType],
+                                                       sizes['Agent']))
+        report['heating_systems'] += nBuilding * sizes['HeatingSystem']
+        for system, nStorages in N_STORAGES.items():
+            storages = (nBuilding * equipment[system] * nStorages *
+                        sizes['GenericStorage'])
+            report['heating_systems'] -= storages
+            report['storages'] += storages
+
+        # without recording spec all buildings have the same histories
+        positions = (range(nBuildingsCell, nBuildingsCell + nBuilding)
+                     if recording is not None else [0])
+        nPositions = len(positions)
+        for position in positions:
+            nBytes = _getEquipmentHistoryBytes(recording, hist, 'building',
+                                               position, 'building')
+            for name, pEquipment in equipment.items():
+                if pEquipment > 0:
+                    nBytes += pEquipment * _getEquipmentHistoryBytes(
+                        recording, hist, 'building', position, name)
+            report['histories'] += nBytes * nBuilding / nPositions
+
+        # buildings of each type are reserved at once
+        nBuildingsCell += nBuilding
+        if nBuildingsCell > buildingCapacity:
+            buildingCapacity = max(nBuildingsCell, 2 * buildingCapacity,
+                                   _getMinVecCapacity(sizes['Building']))
+
+    report['buildings'] += ((buildingCapacity - nBuildingsCell) *
+                            sizes['Building'])
+
+    report['agents'] += (_getVecCapacity(nSepBSLAgents,
+                                         sizes['SepBSLagent']) *
+                         sizes['SepBSLagent'])
+    positions = (range(nSepBSLAgents)
+                 if recording is not None else [0] * (nSepBSLAgents > 0))
+    for position in positions:
+        nBytes = _getEquipmentHistoryBytes(recording, hist, 'sep_bsl',
+                                           position, 'sep_bsl')
+        if pPVplants > 0:
+            nBytes += pPVplants * _getEquipmentHistoryBytes(
+                recording, hist, 'sep_bsl', position, 'pv')
+        report['histories'] += nBytes * nSepBSLAgents / len(positions)
+
+    report = {part: int(round(nBytes)) for part, nBytes in report.items()}
+    report['total'] = sum(report.values())
+
+    return report
 
 
 def generateGenericCell(nBuildings, pAgents, pPHHagents,
                         pAgriculture, pDHN, pPVplants,
                         pHeatpumps, pCHP, pBTypes,
                         nSepBSLAgents, pAgricultureBSLsep,
-                        region, hist=0):
+                        region, hist=0, seed=None, useCache=False,
+                        recording=None):
     """ Create a cell of a generic energy system
 
     The default cell consists of 4 ref. building types:
@@ -385,6 +882,13 @@ def generateGenericCell(nBuildings, pAgents, pPHHagents,
     For BSL agents located in buildings a phh like thermal
     profile is assumed.
 
+    If a seed is given and useCache is set, the generated cell is
+    cached (see CELL_CACHE_LOC). The key of a cached cell includes all
+    parameters and the content of all source files, so changed
+    building data or generation code results in a new cache entry.
+    The least recently used cells are removed, if the cache exceeds
+    CELL_CACHE_MAX_SIZE or CELL_CACHE_MAX_CELLS.
+
     Available Age classes:
       - Class 1: Before 1948
       - Class 2: 1948 - 1978
@@ -427,6 +931,17 @@ def generateGenericCell(nBuildings, pAgents, pPHHagents,
                          Supported regions:
                             East, West, South, North
         hist (int): Size of history for power balance of cells, buildings etc.
+        seed (int): Seed for all random decisions of the generation as well
+                    as for the random streams of the created entities.
+                    With the same seed, the same cell is generated.
+                    (Default: None -> random cell)
+        useCache (bool): Use cached cell, if a seed is given
+                         (Default: False)
+        recording ([RecordingRule]): Recording spec, which selects the
+                                     histories to create with size hist
+                                     (see Cell.set_recording)
+                                     (Default: None -> all histories
+                                      are created, if hist > 0)
 
     Returns:
         Cell: Generic energy system cell
@@ -461,34 +976,75 @@ def generateGenericCell(nBuildings, pAgents, pPHHagents,
         raise ValueError("Unknown region, supported regions are {}"
                          .format(supportedRegions))
 
-    # load region climate data (standard temperature and irradiation)
-    climate = pd.read_hdf("./BoundaryConditions/Weather/" + region + ".h5",
-                          'Standard')
-
-    # init cell
-    cell = Cell(climate.loc['EgNorm [kWh/m^2]', 'Value'],
-                climate.loc['ToutNorm [degC]', 'Value'],
-                hist)
-
-    # get reference temperatrue once
-    t_ref = pd.read_hdf('BoundaryConditions/Weather/{}.h5'.format(region),
-                        key='Weather').reference['T [degC]'].tolist()
-
-    # init buildings and agents
-    for key in pBTypes.keys():
-        bType = pBTypes[key]['type']
-        Geo, U, g, n = _loadBuildingData(bType)
-
-        _checkParameter(U, pBTypes[key])
-
-        _addBuildings(cell, nBuildings[bType], pBTypes[bType], pDHN[bType],
-                      t_ref, Geo, U, g, n,
-                      pAgents[bType], pPHHagents[bType], pAgriculture[bType],
-                      pPVplants, pHeatpumps, hist)
+    useCache = useCache and (seed is not None)
+    if useCache:
+        cellKey = _getCellKey({'nBuildings': nBuildings, 'pAgents': pAgents,
+                               'pPHHagents': pPHHagents,
+                               'pAgriculture': pAgriculture, 'pDHN': pDHN,
+                               'pPVplants': pPVplants,
+                               'pHeatpumps': pHeatpumps, 'pCHP': pCHP,
+                               'pBTypes': pBTypes,
+                               'nSepBSLAgents': nSepBSLAgents,
+                               'pAgricultureBSLsep': pAgricultureBSLsep,
+                               'region': region, 'hist': hist, 'seed': seed,
+                               'recording': recording},
+                              [pBType['type'] for pBType in pBTypes.values()],
+                              region)
+        cell = _loadCachedCell(cellKey)
+        if cell is not None:
+            # same state of random streams as after generation
+            set_seed(None)
+            return cell
 
-    # init sep BSL agents
-    addSepBSLAgents(cell, nSepBSLAgents, pAgricultureBSLsep, pPVplants, hist)
-
-    addCHPtoCellBuildings(cell, pCHP, hist)
+    # load region climate data (standard temperature and irradiation)
+    climate = getClimate(region)
+
+    rng = np.random.default_rng(seed)
+    # random streams of rust entities are numbered in order of creation
+    set_seed(seed)
+
+    try:
+        # with a recording spec, histories are only created as specified
+        recordingHist = hist
+        if recording is not None:
+            hist = 0
+
+        # init cell
+        cell = Cell(climate['EgNorm [kWh/m^2]'],
+                    climate['ToutNorm [degC]'],
+                    hist)
+
+        # get reference temperatrue once
+        refYear = _getReferenceYear(region)
+
+        # init buildings and agents
+        for key in pBTypes.keys():
+            bType = pBTypes[key]['type']
+            Geo, U, g, n = _loadBuildingData(bType)
+
+            _checkParameter(U, pBTypes[key])
+
+            _addBuildings(cell, nBuildings[bType], pBTypes[bType],
+                          pDHN[bType], refYear, Geo, U, g, n,
+                          pAgents[bType], pPHHagents[bType],
+                          pAgriculture[bType], pPVplants, pHeatpumps, hist,
+                          rng)
+
+        # init sep BSL agents
+        addSepBSLAgents(cell, nSepBSLAgents, pAgricultureBSLsep, pPVplants,
+                        hist, rng)
+
+        addCHPtoCellBuildings(cell, pCHP, hist, rng)
+
+        if recording is not None:
+            nRecorded = cell.set_recording(recording, recordingHist)
+            lg.debug("recording {} histories of cell".format(nRecorded))
+    finally:
+        # entities created later on get independent random streams again,
+        # even if the generation failed
+        set_seed(None)
+
+    if useCache:
+        _saveCachedCell(cellKey, cell)
 
     return cell
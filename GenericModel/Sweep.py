@@ -0,0 +1,340 @@
+""" Run parameter sweeps of generic cells in a process pool
+
+    Each parameter set describes one generic cell (see
+    Design.generateGenericCell) and its simulation period.
+    The cells are generated and simulated in worker processes,
+    the results are returned as soon as a run is finished.
+"""
+import concurrent.futures as cf
+from concurrent.futures.process import BrokenProcessPool
+import itertools
+import logging as lg
+import os
+import time
+import numpy as np
+from SystemComponentsFast import Cell, get_time_step, set_time_step, simulate
+from BoundaryConditions.Simulation.SimulationData import getSimData
+from GenericModel.Design import generateGenericCell
+
+
+# parameters of generateGenericCell
+GENERATION_PARAMETERS = ['nBuildings', 'pAgents', 'pPHHagents',
+                         'pAgriculture', 'pDHN', 'pPVplants', 'pHeatpumps',
+                         'pCHP', 'pBTypes', 'nSepBSLAgents',
+                         'pAgricultureBSLsep', 'region']
+# parameters of simulation period
+SIMULATION_PARAMETERS = ['start', 'end']
+# optional parameters and their defaults
+# (weatherSeed None -> seed of cell is used)
+DEFAULT_PARAMETERS = {'seed': None, 'weatherSeed': None, 'state': 'SN',
+                      'hist': 0}
+
+
+def getParameterGrid(baseParameters, **variations):
+    """ Get all combinations of varied parameters
+
+    Example:
+        getParameterGrid(base, pPVplants=[0.1, 0.2],
+                         pBTypes=[PBTYPES_NOW, PBTYPES_2030],
+                         seed=[1, 2, 3])
+
+    Args:
+        baseParameters (dict): Parameters, which are the same for all sets
+        **variations (list): Values of each varied parameter
+
+    Returns:
+        [dict]: Parameter sets
+    """
+    names = list(variations.keys())
+    parameterSets = []
+    for values in itertools.product(*variations.values()):
+        parameterSet = dict(baseParameters)
+        parameterSet.update(zip(names, values))
+        parameterSets.append(parameterSet)
+
+    return parameterSets
+
+
+def _completeParameterSet(parameterSet):
+    """ Check parameter set and add defaults of optional parameters
+
+    Args:
+        parameterSet (dict): Parameters of generic cell and simulation
+
+    Returns:
+        dict: Complete parameter set
+    """
+    known = GENERATION_PARAMETERS + SIMULATION_PARAMETERS
+    missing = [name for name in known if name not in parameterSet]
+    unknown = [name for name in parameterSet
+               if name not in known and name not in DEFAULT_PARAMETERS]
+    if missing:
+        raise ValueError("Missing parameters: {}".format(", ".join(missing)))
+    if unknown:
+        raise ValueError("Unknown parameters: {}".format(", ".join(unknown)))
+
+    parameterSet = dict(DEFAULT_PARAMETERS, **parameterSet)
+    if parameterSet['weatherSeed'] is None:
+        parameterSet['weatherSeed'] = parameterSet['seed']
+
+    return parameterSet
+
+
+def _getSimDataArgs(parameterSet, timeStep):
+    """ Get arguments of getSimData for a parameter set
+
+    Args:
+        parameterSet (dict): Complete parameter set
+        timeStep (float): Time step [h]
+
+    Returns:
+        tuple: Arguments of getSimData
+    """
+    return (parameterSet['start'], parameterSet['end'],
+            parameterSet['region'], parameterSet['weatherSeed'],
+            parameterSet['state'], timeStep)
+
+
+def _prepareSimData(parameterSets, timeStep):
+    """ Generate simulation data of all reproducible parameter sets once
+
+    The data is cached and memory mapped by the workers,
+    so all workers share the same boundary data.
+
+    Args:
+        parameterSets ([dict]): Complete parameter sets
+        timeStep (float): Time step [h]
+    """
+    simDataArgs = set(_getSimDataArgs(parameterSet, timeStep)
+                      for parameterSet in parameterSets
+                      if parameterSet['weatherSeed'] is not None)
+    for args in simDataArgs:
+        lg.debug("prepare simulation data {}".format(args))
+        getSimData(*args)
+
+
+def _initWorker(timeStep):
+    """ Initialise worker process
+
+    Args:
+        timeStep (float): Time step of simulation [h]
+    """
+    set_time_step(timeStep)
+
+
+def _getMetrics(gen_e, load_e, gen_t, load_t, timeStep):
+    """ Calculate summary metrics of a simulated cell
+
+    Args:
+        gen_e (np array): Electrical generation of cell [W]
+        load_e (np array): Electrical load of cell [W]
+        gen_t (np array): Thermal generation of cell [W]
+        load_t (np array): Thermal load of cell [W]
+        timeStep (float): Time step [h]
+
+    Returns:
+        dict: Summary metrics
+    """
+    toMWh = timeStep * 1e-6
+    selfSupply_e = np.minimum(gen_e, load_e).sum()
+    residual_e = load_e - gen_e
+
+    return {'gen_e [MWh]': gen_e.sum() * toMWh,
+            'load_e [MWh]': load_e.sum() * toMWh,
+            'gen_t [MWh]': gen_t.sum() * toMWh,
+            'load_t [MWh]': load_t.sum() * toMWh,
+            'max residual load_e [kW]': residual_e.max() * 1e-3,
+            'max feed-in_e [kW]': -residual_e.min() * 1e-3,
+            'max load_t [kW]': load_t.max() * 1e-3,
+            'self sufficiency_e [-]': (selfSupply_e / load_e.sum()
+                                       if load_e.sum() > 0 else 0.),
+            'self consumption_e [-]': (selfSupply_e / gen_e.sum()
+                                       if gen_e.sum() > 0 else 0.),
+            }
+
+
+def _runParameterSet(parameterSet, keepHistory, setupCell):
+    """ Generate and simulate the cell of a parameter set (worker process)
+
+    Only the power balance of the whole cell is recorded,
+    by adding the generated cell as sub cell to a recording main cell.
+
+    Args:
+        parameterSet (dict): Complete parameter set
+        keepHistory (bool): Return power balance curves of cell
+        setupCell (function): Function called with the generated cell and
+                              number of steps before the simulation
+                              (None -> cell is simulated as generated)
+
+    Returns:
+        dict: Result (see runSweep)
+    """
+    result = {'parameter': parameterSet, 'metrics': None, 'history': None,
+              'error': None}
+    try:
+        startTime = time.perf_counter()
+        timeStep = get_time_step()
+        nSteps, _, SLP, HWP, Weather, Solar = getSimData(
+            *_getSimDataArgs(parameterSet, timeStep))
+
+        generationStart = time.perf_counter()
+        cell = generateGenericCell(
+            *[parameterSet[name] for name in GENERATION_PARAMETERS],
+            hist=parameterSet['hist'], seed=parameterSet['seed'])
+        if setupCell is not None:
+            setupCell(cell, nSteps)
+        generationTime = time.perf_counter() - generationStart
+
+        mainCell = Cell(cell.eg, cell.t_out_n, nSteps)
+        mainCell.add_cell(cell)
+        simulate(mainCell, nSteps, SLP, HWP, Weather, Solar)
+
+        history = {name: np.array(getattr(mainCell, name).get_memory(),
+                                  dtype=np.float32)
+                   for name in ['gen_e', 'load_e', 'gen_t', 'load_t']}
+        result['metrics'] = _getMetrics(**history, timeStep=timeStep)
+        result['metrics']['generation time [s]'] = generationTime
+        result['metrics']['run time [s]'] = time.perf_counter() - startTime
+        if keepHistory:
+            result['history'] = history
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except BaseException as error:
+        # panics of rust components are raised as BaseException
+        lg.exception("Run of parameter set failed")
+        result['error'] = "{}: {}".format(type(error).__name__, error)
+
+    return result
+
+
+def _runPool(jobs, nWorkers, timeStep, keepHistory, setupCell, crashed):
+    """ Run parameter sets in a new process pool
+
+    Args:
+        jobs ([(int, dict)]): Numbers and complete parameter sets
+        nWorkers (int): Number of worker processes
+        timeStep (float): Time step [h]
+        keepHistory (bool): Return power balance curves of cell
+        setupCell (function): see runSweep
+        crashed ([int]): Numbers of parameter sets, which were not finished
+                         because a worker process crashed, are appended
+                         (in order of submission)
+
+    Yields:
+        (int, dict): Number of parameter set and result
+    """
+    with cf.ProcessPoolExecutor(nWorkers, initializer=_initWorker,
+                                initargs=(timeStep,)) as pool:
+        futures = {pool.submit(_runParameterSet, parameterSet, keepHistory,
+                               setupCell): number
+                   for number, parameterSet in jobs}
+        try:
+            for future in cf.as_completed(futures):
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    continue
+                yield futures[future], result
+        finally:
+            # don't wait for queued runs, if the sweep is stopped early
+            for future in futures:
+                future.cancel()
+
+    crashed.extend(number for future, number in futures.items()
+                   if isinstance(future.exception(), BrokenProcessPool))
+
+
+def runSweep(parameterSets, nWorkers=None, keepHistory=False,
+             setupCell=None, timeStep=None, maxRetries=1):
+    """ Generate and simulate generic cells for many parameter sets
+    in a process pool
+
+    A parameter set is a dict with all arguments of generateGenericCell
+    (except hist) and the simulation period:
+        - 'start', 'end': Period of simulation DD.MM.YYYY (see getSimData)
+    Optional parameters (see DEFAULT_PARAMETERS):
+        - 'seed': Seed of cell generation
+        - 'weatherSeed': Seed of weather data (Default: seed of cell),
+                         if given the simulation data is generated once
+                         and shared by all workers (memory mapped cache)
+        - 'state': Federal state, which determines the holidays
+        - 'hist': Size of history of cell entities
+
+    The results are yielded as soon as a run is finished, so the order
+    differs from the order of parameter sets. When a worker process
+    crashes, the unfinished parameter sets are run again. The parameter
+    sets which were running during the crash are run one at a time,
+    to find the set causing the crash.
+
+    Args:
+        parameterSets ([dict]): Parameter sets (see getParameterGrid)
+        nWorkers (int): Number of worker processes
+                        (Default: None -> number of processors)
+        keepHistory (bool): Return power balance curves of each cell
+                            (Default: False)
+        setupCell (function): Module level function called with the
+                              generated cell and number of steps before the
+                              simulation, e.g. to add a wind turbine
+                              (Default: None)
+        timeStep (float): Time step [h]
+                          (Default: None -> time step of simulation,
+                           see SystemComponentsFast.set_time_step)
+        maxRetries (int): Number of retries of a parameter set,
+                          whose worker process crashed (Default: 1)
+
+    Yields:
+        (int, dict): Number of parameter set and result:
+            - 'parameter': Complete parameter set
+            - 'metrics': Summary metrics (see _getMetrics) or None
+            - 'history': Power balance curves of cell (gen_e, load_e,
+                         gen_t, load_t) [W] or None
+            - 'error': Error message or None
+    """
+    parameterSets = [_completeParameterSet(parameterSet)
+                     for parameterSet in parameterSets]
+    if timeStep is None:
+        timeStep = get_time_step()
+    if nWorkers is None:
+        nWorkers = os.cpu_count()
+
+    _prepareSimData(parameterSets, timeStep)
+
+    pending = list(range(len(parameterSets)))
+    suspects = []
+    nCrashes = [0] * len(parameterSets)
+    while pending or suspects:
+        if pending:
+            numbers, pending = pending, []
+            poolSize = min(nWorkers, len(numbers))
+        else:
+            numbers, suspects = suspects[:1], suspects[1:]
+            poolSize = 1
+
+        crashed = []
+        yield from _runPool([(number, parameterSets[number])
+                             for number in numbers],
+                            poolSize, timeStep, keepHistory, setupCell,
+                            crashed)
+        if not crashed:
+            continue
+
+        if poolSize == 1 and len(numbers) == 1:
+            # crash is caused by this parameter set
+            number = crashed[0]
+            nCrashes[number] += 1
+            if nCrashes[number] > maxRetries:
+                lg.error("Worker crashed {} times for parameter set {}"
+                         .format(nCrashes[number], number))
+                yield number, {'parameter': parameterSets[number],
+                               'metrics': None, 'history': None,
+                               'error': "Worker process crashed"}
+            else:
+                suspects.insert(0, number)
+        else:
+            # parameter sets are started in order of submission,
+            # so the first unfinished ones were running during the crash
+            lg.warning("Worker process crashed, {} parameter sets are "
+                       "run again".format(len(crashed)))
+            nRunning = poolSize + 1
+            suspects.extend(crashed[:nRunning])
+            pending = crashed[nRunning:]
@@ -1,14 +1,21 @@
 import logging as lg
 import numpy as np
+from SystemComponentsFast import get_time_step
 
 lg.basicConfig(level=lg.WARNING)
 
 
+# entity types of index tables returned by Cell.get_history_matrices
+ENTITY_BUILDING = 0
+ENTITY_SEP_BSL = 1
+ENTITY_CELL = 2
+
+
 def getCellsPVgeneration(cell):
     """ Calculate the complete electrical power generated by a cells PV plants
         (Cell + Buildings) over a complete simulation run, for each time step.
 
-    If the hist-Size of pv plants differ, the data must be handled with caution
+    Raises ValueError, if the record sizes of the PV plants differ.
 
     Args:
         cell {Cell} -- Cell for which the pv power is calculated
@@ -16,38 +23,19 @@ def getCellsPVgeneration(cell):
     Returns:
         np array -- Curve of cells PV power [W]
     """
-    PV = None
-
-    if cell.pv is not None:
-        if cell.pv.gen_e is None:
-            lg.warning("The pv plant of cell has no history record")
-        else:
-            PV = np.array(cell.pv.gen_e.get_memory())
-
-    for bNr, building in enumerate(cell.buildings):
-        if building.pv is not None:
-            if building.pv.gen_e is None:
-                lg.warning("The pv plant of building {} "
-                           "has no history record".format(bNr))
-            else:
-                if PV is None:
-                    PV = np.array(building.pv.gen_e.get_memory())
-                else:
-                    bPV = np.array(building.pv.gen_e.get_memory())
-                    if PV.size != bPV.size:
-                        lg.warning("Record size for pv plant of building {} "
-                                   "is different from other sizes, "
-                                   "data is ignored".format(bNr))
-                    else:
-                        PV += bPV
+    PV = cell.sum_history('pv gen_e', [ENTITY_BUILDING, ENTITY_CELL])
+
+    if PV is None:
+        lg.warning("No pv plant with history record found in cell")
 
     return PV
 
+
 def getCellsCHPgeneration(cell):
     """ Calculate the complete electrical power generated by a cells CHP system
-        (Cell + Buildings) over a complete simulation run, for each time step.
+        (Buildings) over a complete simulation run, for each time step.
 
-    If the hist-Size of chp systems differ, the data must be handled with caution
+    Raises ValueError, if the record sizes of the CHP systems differ.
 
     Args:
         cell {Cell} -- Cell for which the chp power is calculated
@@ -55,41 +43,19 @@ def getCellsCHPgeneration(cell):
     Returns:
         np array -- Curve of cells CHP power [W]
     """
-    CHP = None
-
-    # if cell.chp is not None:
-    #     if cell.chp.gen_e is None:
-    #         lg.warning("The chp system of cell has no history record")
-    #     else:
-    #         CHP = np.array(cell.chp.gen_e.get_memory())
-
-    for bNr, building in enumerate(cell.buildings):
-        chp = building.get_chp_system()
-        if chp is not None:
-            if chp.gen_e is None:
-                lg.warning("The chp system of building {} "
-                           "has no history record".format(bNr))
-            else:
-                if CHP is None:
-                    CHP = np.array(chp.gen_e.get_memory())
-                else:
-                    bCHP = np.array(chp.gen_e.get_memory())
-                    if CHP.size != bCHP.size:
-                        lg.warning("Record size for chp system of building {} "
-                                   "is different from other sizes, "
-                                   "data is ignored".format(bNr))
-                    else:
-                        CHP += bCHP
+    CHP = cell.sum_history('chp gen_e')
 
-    return CHP
+    if CHP is None:
+        lg.warning("No chp system with history record found in cell")
 
+    return CHP
 
 
 def getCellsHPgeneration(cell):
     """ Calculate the complete thermal power generated by a cells heatpumps
     (Buildings) over a complete simulation run, for each time step.
 
-    If the hist-Size of heatpump differ, the data must be handled with caution
+    Raises ValueError, if the record sizes of the heatpumps differ.
 
     Args:
         cell {Cell} -- Cell for which the heatpump power is calculated
@@ -97,26 +63,10 @@ def getCellsHPgeneration(cell):
     Returns:
         np array -- Curve of cells heatpump power [W]
     """
-    HP = None
-
-    for bNr, building in enumerate(cell.buildings):
-        if building.heatpump is not None:
-            if building.heatpump.heatpump.gen_t is None:
-                lg.warning("The heatpump of building {} "
-                           "has no history record".format(bNr))
-            else:
-                if HP is None:
-                    HP = np.array(building.heatpump.heatpump.
-                                  gen_t.get_memory())
-                else:
-                    bHP = np.array(building.heatpump.heatpump.
-                                   gen_t.get_memory())
-                    if HP.size != bHP.size:
-                        lg.warning("Record size for heatpump of building {} "
-                                   "is different from other sizes, "
-                                   "data is ignored".format(bNr))
-                    else:
-                        HP += bHP
+    HP = cell.sum_history('heatpump gen_t')
+
+    if HP is None:
+        lg.warning("No heatpump with history record found in cell")
 
     return HP
 
@@ -125,7 +75,7 @@ def getCellsHPconsumption(cell):
     """ Calculate the complete electrical power consumed by a cells heatpumps
     (Buildings) over a complete simulation run, for each time step.
 
-    If the hist-Size of heatpump differ, the data must be handled with caution
+    Raises ValueError, if the record sizes of the heatpumps differ.
 
     Args:
         cell {Cell} -- Cell for which the heatpump power is calculated
@@ -133,26 +83,10 @@ def getCellsHPconsumption(cell):
     Returns:
         np array -- Curve of cells heatpump power [W]
     """
-    HP = None
-
-    for bNr, building in enumerate(cell.buildings):
-        if building.heatpump is not None:
-            if building.heatpump.heatpump.con_e is None:
-                lg.warning("The heatpump of building {} "
-                           "has no history record".format(bNr))
-            else:
-                if HP is None:
-                    HP = np.array(building.heatpump.heatpump.
-                                  con_e.get_memory())
-                else:
-                    bHP = np.array(building.heatpump.heatpump.
-                                   con_e.get_memory())
-                    if HP.size != bHP.size:
-                        lg.warning("Record size for heatpump of building {} "
-                                   "is different from other sizes, "
-                                   "data is ignored".format(bNr))
-                    else:
-                        HP += bHP
+    HP = cell.sum_history('heatpump con_e')
+
+    if HP is None:
+        lg.warning("No heatpump with history record found in cell")
 
     return HP
 
@@ -160,6 +94,8 @@ def getCellsHPconsumption(cell):
 def getBuildingsThermalBalance(cell, subCells=True):
     """ Get thermal load and generation of each building in given cell.
 
+    Raises ValueError, if the record sizes of the buildings differ.
+
     Arguments:
         cell {Cell} -- Cell for which the pv power is calculated
 
@@ -170,63 +106,21 @@ def getBuildingsThermalBalance(cell, subCells=True):
     Returns:
         (np array, np array) -- Curve of cells PV power [W]
     """
-    gen = None
-    load = None
-
-    # at first collect sub cell balances
-    if subCells:
-        for scNr, sc in enumerate(cell.sub_cells):
-            new_gen, new_load = getBuildingsThermalBalance(sc, subCells)
-            # it's enough to check one array for existence
-            if new_gen is None:
-                lg.warning("No records found in sub cell {}".format(scNr))
-                continue
-
-            if gen is not None:
-                gen += np.array(new_gen)
-                load += np.array(new_load)
-            else:
-                if gen.size == len(new_gen):
-                    gen = np.array(new_gen)
-                    load = np.array(new_load)
-                else:
-                    lg.warning("Record size of sub cell {} "
-                               "is different from other sizes, "
-                               "data is ignored".format(scNr))
-
-    for bNr, building in enumerate(cell.buildings):
-        if building.gen_t is None:
-            lg.warning("Building {} has no history record.".format(bNr))
-            continue
-
-        if gen is not None:
-            new_gen = np.array(building.gen_t.get_memory())
-            if gen.size == new_gen.size:
-                gen += new_gen
-                load += np.array(building.load_t.get_memory())
-            else:
-                lg.warning("Record size of building {} "
-                           "is different from other sizes, "
-                           "data is ignored".format(bNr))
-        else:
-            gen = np.array(building.gen_t.get_memory())
-            load = np.array(building.load_t.get_memory())
+    gen = cell.sum_history('building gen_t', sub_cells=subCells)
+    load = cell.sum_history('building load_t', sub_cells=subCells)
+
+    if gen is None:
+        lg.warning("No building with history record found in cell")
 
     return (gen, load)
 
 
-def cumulativeEnergy(array):
+def cumulativeEnergy(array, time_step=None):
     # Meant to stack quantity in a data array with time steps from the
     # simulation
+    # (time_step in h, if None the time step of the simulation is used)
 
-    time_step = 0.25
-
-    data_list = list()
-    total = 0
-    for power_value in array:
-        total += power_value * time_step
-        data_list.append(total)
-
-    stacked_array = np.array(data_list)
+    if time_step is None:
+        time_step = get_time_step()
 
-    return stacked_array
+    return np.cumsum(np.asarray(array) * time_step)
@@ -121,7 +121,7 @@ def buildingTemperature(building, time, T, retFig=False):
                          (default: {False})
     """
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=time, y=building.temperature_hist.get_memory(),
+    fig.add_trace(go.Scatter(x=time, y=np.asarray(building.temperature_hist),
                              line={'color': COL_CON,
                                    'width': 1},
                              name="building",
@@ -156,10 +156,10 @@ def cellPowerBalance(cell, time, retFig=False):
                          (default: {False})
     """
     # get data
-    gen_e = np.array(cell.gen_e.get_memory()) * 1e-6
-    gen_t = np.array(cell.gen_t.get_memory()) * 1e-6
-    load_e = np.array(cell.load_e.get_memory()) * 1e-6
-    load_t = np.array(cell.load_t.get_memory()) * 1e-6
+    gen_e = np.asarray(cell.gen_e) * 1e-6
+    gen_t = np.asarray(cell.gen_t) * 1e-6
+    load_e = np.asarray(cell.load_e) * 1e-6
+    load_t = np.asarray(cell.load_t) * 1e-6
     # calculate balance
     bal_e = gen_e - load_e
     bal_t = gen_t - load_t
@@ -233,10 +233,10 @@ def cellEnergyBalance(cell, time):
     """
     dt = time.diff().dt.seconds / 3600.  # time difference in h
     # get data
-    gen_e = np.array(cell.gen_e.get_memory()) * 1e-6
-    gen_t = np.array(cell.gen_t.get_memory()) * 1e-6
-    load_e = np.array(cell.load_e.get_memory()) * 1e-6
-    load_t = np.array(cell.load_t.get_memory()) * 1e-6
+    gen_e = np.asarray(cell.gen_e) * 1e-6
+    gen_t = np.asarray(cell.gen_t) * 1e-6
+    load_e = np.asarray(cell.load_e) * 1e-6
+    load_t = np.asarray(cell.load_t) * 1e-6
     # calculate energy
     # assume first time step length is equal to first known step
     gen_e[0] = gen_e[0] * dt[1]
@@ -322,7 +322,7 @@ def chargeState(storage, time, retFig=False):
     """
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=time,
-                             y=np.array(storage.charge_hist.get_memory())*1e-3,
+                             y=np.asarray(storage.charge_hist)*1e-3,
                              line={'color': COL_BAL,
                                    'width': 1},
                              name="charge",
@@ -346,7 +346,7 @@ def runningState(utility, time, retFig=False):
             utility: chp or heatpump etc.
             time (pd series of datetime): Time
     """
-    states = np.array(utility.gen_t.get_memory()).astype(bool).astype(int)
+    states = np.asarray(utility.gen_t).astype(bool).astype(int)
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=time,
@@ -383,10 +383,10 @@ def heatpumpSystemOperation(heatpump_system, time, retFig=False):
                         shared_xaxes=True,
                         vertical_spacing=0.02)
     # first electrical consumption and thermal generation
-    gen_t_hp = np.array(heatpump_system.heatpump.gen_t.get_memory())*1e-3
-    con_e = np.array(heatpump_system.heatpump.con_e.get_memory())*1e-3
-    gen_t_b = np.array(heatpump_system.boiler.gen_t.get_memory())*1e-3
-    charge = np.array(heatpump_system.storage.charge_hist.get_memory())*1e-3
+    gen_t_hp = np.asarray(heatpump_system.heatpump.gen_t)*1e-3
+    con_e = np.asarray(heatpump_system.heatpump.con_e)*1e-3
+    gen_t_b = np.asarray(heatpump_system.boiler.gen_t)*1e-3
+    charge = np.asarray(heatpump_system.storage.charge_hist)*1e-3
 
     fig.add_trace(go.Scatter(x=time,
                              y=con_e,
@@ -516,7 +516,7 @@ def EnergyGenerationChart(time, unit, *data):
 
         # add the trace with that color to the figure
         fig.add_trace(go.Scatter(
-                      x=time, y=np.array(dataset[EnergyType])*1e-6,
+                      x=time, y=np.asarray(dataset[EnergyType])*1e-6,
                       hoverinfo='x+y',
                       mode='lines',
                       line=dict(width=1, color=unitColors[EnergyType]),
@@ -1,10 +1,14 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 use rand::Rng;
 use rand_distr::{Distribution, Beta, Gamma, Normal, FisherF};
 
+use crate::misc::random::{self, EntityRng};
+use crate::misc::serialization::{self, Stateful};
+
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct Agent {
     a_type: usize,  // 0: PHH, 1: BSLa, 2: BSLc
     #[pyo3(get)]
@@ -13,6 +17,11 @@ pub struct Agent {
     demand_apv: f32,
     #[pyo3(get)]
     hw_demand: f32,  // mean yearly hot water demand in [W]
+    rng: EntityRng,  // random stream of agent
+}
+
+impl Stateful for Agent {
+    const KIND: &'static str = "Agent";
 }
 
 #[pymethods]
@@ -38,7 +47,8 @@ impl Agent {
         let mut agent = Agent {a_type: a_type,
                                coc: 0.,
                                demand_apv: 0.,
-                               hw_demand: 0.
+                               hw_demand: 0.,
+                               rng: random::new_stream(),
                                };
         agent.get_apv_demand();
         agent.get_coc();
@@ -50,6 +60,22 @@ impl Agent {
         self.coc = new_coc;
         self.get_yearly_hot_water_demand();
     }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 macro_rules! sample_coc {
@@ -70,21 +96,20 @@ impl Agent {
     /// Determine between PHH and BSL, since they have different
     /// underlying statistics
     fn get_apv_demand(&mut self) {
-        let mut rng = rand::thread_rng();
-
-        let rnd: f32 = rng.gen();
+        let rnd: f32 = self.rng.gen();
 
-        self.demand_apv = rng.gen_range(0.8..=1.2);
+        self.demand_apv = self.rng.gen_range(0.8..=1.2);
 
         if self.a_type == 0 {
             if rnd < 0.7 {
                 let dist = Normal::new(0.3, 0.025).unwrap();
-                self.demand_apv *= dist.sample(&mut rng);
+                self.demand_apv *= dist.sample(&mut self.rng);
                 return ();
             }
         }
         let dist = FisherF::new(7.025235971695065, 2205.596792511838).unwrap();
-        self.demand_apv *= dist.sample(&mut rng) * 0.299704041191481 + 0.1;
+        self.demand_apv *= dist.sample(&mut self.rng) * 0.299704041191481 +
+                           0.1;
     }
 
     /// Get COC factor of agent
@@ -92,16 +117,15 @@ impl Agent {
     /// underlying statistics
     fn get_coc(&mut self) {
         let mut coc: f32 = 0.;
-        let mut rng = rand::thread_rng();
 
         if self.a_type == 0 {
             // Beta distribution with a, b
             let dist = Beta::new(3.944677863332723, 2.638609989052125).unwrap();
-            sample_coc!(dist, rng, coc, 5.);
+            sample_coc!(dist, self.rng, coc, 5.);
         } else {
             // Gamma sistribution with shape, scale
             let dist = Gamma::new(1.399147113755027, 1.876519590091970).unwrap();
-            sample_coc!(dist, rng, coc, 1.);
+            sample_coc!(dist, self.rng, coc, 1.);
         }
 
         if coc < 1. {
@@ -130,9 +154,8 @@ impl Agent {
     ///
     /// # Returns
     /// * f32: agents hot water demand [W]
-    fn get_hot_water_demand(&self, hw_profile: &f32) -> f32 {
-        let mut rng = rand::thread_rng();
-        let r_f: f32 = rng.gen_range(0.8..=1.2);
+    fn get_hot_water_demand(&mut self, hw_profile: &f32) -> f32 {
+        let r_f: f32 = self.rng.gen_range(0.8..=1.2);
 
         self.hw_demand * r_f * hw_profile
     }
@@ -145,16 +168,24 @@ impl Agent {
     ///
     /// # Returns
     /// * (f32, f32): Currend electrical and thermal power demand [W]
-    pub fn step(&self, slp_data: &[f32; 3], hw_profile: &f32) -> (f32, f32) {
-        let mut rng = rand::thread_rng();
-
+    pub fn step(&mut self, slp_data: &[f32; 3], hw_profile: &f32)
+    -> (f32, f32)
+    {
         let electrical = self.coc * slp_data[self.a_type] *
-                         rng.gen_range(0.8..=1.2);
+                         self.rng.gen_range(0.8..=1.2);
         let thermal = self.get_hot_water_demand(hw_profile);
 
         (electrical, thermal)
     }
 
+    /// Replace random stream of agent
+    ///
+    /// # Arguments
+    /// * rng (EntityRng): New random stream
+    pub fn reseed(&mut self, rng: EntityRng) {
+        self.rng = rng;
+    }
+
     // Access to attributes
     pub fn coc(&self) -> &f32 {
         &self.coc
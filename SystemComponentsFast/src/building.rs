@@ -1,17 +1,27 @@
 // external
 use pyo3::prelude::*;
+use pyo3::exceptions::PyIndexError;
+use serde::{Deserialize, Serialize};
+use std::mem::size_of;
 use log::error;
 
 use crate::{agent, save_e, save_t};
 use crate::components::{controller, pv};
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistNames, HistOwner, HistView,
+                               HistVisitor, Recorded};
+use crate::misc::memory_report::MemoryReport;
+use crate::misc::random::StreamSeeder;
+use crate::misc::reference_year::ReferenceYear;
+use crate::misc::time_step::get_time_step;
 
 use crate::thermal_systems::building::{heatpump_system, chp_system};
+use crate::thermal_systems::storage_controller::StorageController;
 
 use crate::misc::ambient::AmbientParameters;
+use crate::misc::serialization::{self, Stateful};
 
 
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 enum HeatingSystem {
     ChpSystem(chp_system::BuildingChpSystem),
     HeatpumpSystem(heatpump_system::BuildingHeatpumpSystem),
@@ -67,7 +77,7 @@ impl HeatingSystem {
 
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct Building {
     #[pyo3(get)]
     pub agents: Vec<agent::Agent>,
@@ -99,19 +109,63 @@ pub struct Building {
     #[pyo3(get)]
     controller: controller::Controller,
     #[pyo3(get)]
-    pv: Option<pv::PV>,
+    pub pv: Option<pv::PV>,
     heating_system: Option<HeatingSystem>,
+    // function pointer isn't serialized, it's restored by heating system
+    #[serde(skip, default = "Building::default_heat_building")]
     heat_building: fn(&mut Building, &f32, &f32, &f32) -> (f32, f32, f32),
-    #[pyo3(get)]
-    gen_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
-    gen_t: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
-    load_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
-    load_t: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
-    temperature_hist: Option<hist_memory::HistMemory>,
+    pub gen_e: Option<hist_memory::HistMemory>,
+    pub gen_t: Option<hist_memory::HistMemory>,
+    pub load_e: Option<hist_memory::HistMemory>,
+    pub load_t: Option<hist_memory::HistMemory>,
+    pub temperature_hist: Option<hist_memory::HistMemory>,
+}
+
+impl Stateful for Building {
+    const KIND: &'static str = "Building";
+
+    fn restore(&mut self) {
+        if self.heating_system.is_some() {
+            self.heat_building = Building::get_hs_generation;
+        }
+    }
+}
+
+impl Recorded for Building {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("building", "gen_e", &mut self.gen_e);
+        visitor("building", "gen_t", &mut self.gen_t);
+        visitor("building", "load_e", &mut self.load_e);
+        visitor("building", "load_t", &mut self.load_t);
+        visitor("building", "temperature_hist", &mut self.temperature_hist);
+        if let Some(pv) = &mut self.pv {
+            pv.visit_histories(visitor);
+        }
+        match &mut self.heating_system {
+            Some(HeatingSystem::ChpSystem(system)) => {
+                system.visit_histories(visitor);
+            },
+            Some(HeatingSystem::HeatpumpSystem(system)) => {
+                system.visit_histories(visitor);
+            },
+            None => {},
+        }
+    }
+}
+
+impl HistOwner for Building {}
+
+impl Building {
+    /// Add names of the own history memories visited by visit_histories
+    /// (without the pv plant or heating system)
+    ///
+    /// # Arguments
+    /// * names (&mut HistNames): Names (component, quantity)
+    pub fn own_history_names(names: &mut HistNames) {
+        names.extend([("building", "gen_e"), ("building", "gen_t"),
+                      ("building", "load_e"), ("building", "load_t"),
+                      ("building", "temperature_hist")]);
+    }
 }
 
 /// Class simulate buildings energy demand
@@ -142,10 +196,11 @@ impl Building {
     ///                  region of building [°C]
     /// * hist (usize): Size of history memory (0 for no memory)
     #[new]
-    fn new(n_max_agents: u32, a_living:f32,
-           areas_uv: Vec<[f32; 2]>, delta_u: f32,
-           n_infiltration: f32, n_ventilation: f32, cp_eff: f32, g: f32,
-           volume: f32, is_at_dhn: bool, t_out_n: f32, hist: usize) -> Self {
+    pub fn new(n_max_agents: u32, a_living:f32,
+               areas_uv: Vec<[f32; 2]>, delta_u: f32,
+               n_infiltration: f32, n_ventilation: f32, cp_eff: f32, g: f32,
+               volume: f32, is_at_dhn: bool, t_out_n: f32, hist: usize)
+    -> Self {
         // check parameter
         if n_max_agents <= 0 {
             panic!("Number of max. Agents must be greater than 0");
@@ -232,7 +287,7 @@ impl Building {
         building
     }
 
-    fn add_agent(&mut self, agent: agent::Agent) {
+    pub fn add_agent(&mut self, agent: agent::Agent) {
         if self.n_agents + 1 <= self.n_max_agents {
             self.agents.push(agent);
             self.n_agents += 1;
@@ -289,7 +344,7 @@ impl Building {
     /// * Eg (f32): Mean annual global irradiation
     ///             for simulated region [kWh/m^2]
     /// * hist (usize): Size of history memory for pv plant (0 for no memory)
-    fn add_dimensioned_pv(&mut self, eg: f32, hist: usize) {
+    pub fn add_dimensioned_pv(&mut self, eg: f32, hist: usize) {
         let mut sum_coc = 0.;
         let mut sum_apv_demand = 0.;
         let mut n_agents = 0;
@@ -315,25 +370,19 @@ impl Building {
         }
     }
 
-    fn add_dimensioned_heatpump(&mut self,
-                                seas_perf_fac: f32,
-                                t_supply: f32,
-                                t_ref: Vec<f32>,
-                                t_out_n: f32,
-                                hist: usize)
+    pub fn add_dimensioned_heatpump(&mut self,
+                                    seas_perf_fac: f32,
+                                    t_supply: f32,
+                                    t_ref: Vec<f32>,
+                                    t_out_n: f32,
+                                    hist: usize)
     {
-        self.add_heatpump(
-            heatpump_system::BuildingHeatpumpSystem
-                ::new(self.q_hln,
-                      seas_perf_fac,
-                      t_supply,
-                      t_ref,
-                      self.heat_lim_temperature,
-                      t_out_n,
-                      hist));
+        self.add_reference_year_heatpump(seas_perf_fac, t_supply,
+                                         &ReferenceYear::new(t_ref),
+                                         t_out_n, hist);
     }
 
-    fn add_dimensioned_chp(&mut self, hist: usize)
+    pub fn add_dimensioned_chp(&mut self, hist: usize)
     {
         self.add_chp(
             chp_system::BuildingChpSystem::new(self.q_hln,
@@ -341,6 +390,27 @@ impl Building {
                                                hist));
     }
 
+    /// Set rule based controller of the chp system of building in place
+    /// (building.chp_system returns a copy, hence its controller
+    /// can't be set there)
+    ///
+    /// # Arguments
+    /// * controller (StorageController): New controller
+    ///
+    /// # Returns
+    /// * bool: Controller was set, false if building has no chp system
+    pub fn set_rule_controller(&mut self, controller: StorageController)
+    -> bool
+    {
+        match &mut self.heating_system {
+            Some(HeatingSystem::ChpSystem(system)) => {
+                system.set_rule_controller(controller);
+                true
+            },
+            _ => false,
+        }
+    }
+
     fn get_chp_system(&self) -> Option<chp_system::BuildingChpSystem>
     {
         match &self.heating_system {
@@ -369,20 +439,129 @@ impl Building {
         }
     }
 
-    fn replace_agent(&mut self, agent_pos: usize, agent: agent::Agent){
-        if agent_pos > (self.n_agents - 1) as usize {
-            error!("Agent position exceeds number of available Agents. \
-                   Max. possiblie agent position is {}",
-                   self.n_agents - 1);
-        } else {
-            self.agents[agent_pos] = agent;
+    /// Replace agent of building
+    ///
+    /// # Arguments
+    /// * agent_pos (usize): Position of agent in building
+    /// * agent (Agent): New agent
+    ///
+    /// # Returns
+    /// * PyResult<()>: IndexError for an invalid position
+    fn replace_agent(&mut self, agent_pos: usize, agent: agent::Agent)
+        -> PyResult<()>
+    {
+        match self.agents.get_mut(agent_pos) {
+            Some(old_agent) => {
+                *old_agent = agent;
+                Ok(())
+            },
+            None => Err(PyIndexError::new_err(
+                        format!("Agent position {} exceeds number of \
+                                 available agents ({})",
+                                agent_pos, self.n_agents))),
         }
     }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |building| &building.gen_e, "building", "gen_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |building| &building.gen_t, "building", "gen_t")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn load_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |building| &building.load_e, "building", "load_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn load_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |building| &building.load_t, "building", "load_t")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn temperature_hist(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |building| &building.temperature_hist, "building", "temperature_hist")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 impl Building {
-    const TIME_STEP: f32 = 0.25;  // h
-    const N: f32 = 1. * 24. / Building::TIME_STEP;
+    /// Get size of inline heating system of a building
+    pub fn heating_system_size() -> usize {
+        size_of::<Option<HeatingSystem>>()
+    }
+
+    /// Add bytes held by building to memory report
+    /// (without history memories)
+    ///
+    /// # Arguments
+    /// * report (&mut MemoryReport): Report of cell
+    pub fn add_memory_usage(&self, report: &mut MemoryReport) {
+        let system_size = Building::heating_system_size();
+        report.buildings += size_of::<Building>() - system_size +
+                            self.areas_uv.capacity() * size_of::<[f32; 2]>();
+        report.agents += self.agents.capacity() * size_of::<agent::Agent>();
+        report.heating_systems += system_size;
+        match &self.heating_system {
+            Some(HeatingSystem::ChpSystem(system)) => {
+                system.add_memory_usage(report);
+            },
+            Some(HeatingSystem::HeatpumpSystem(system)) => {
+                system.add_memory_usage(report);
+            },
+            None => {},
+        }
+    }
+
+    /// Add heatpump system dimensioned with a shared reference year
+    ///
+    /// # Arguments
+    /// * seas_perf_fac (f32): Minimum allowed seasonal performance factor
+    /// * t_supply (f32): Supply temperature [°C]
+    /// * reference_year (&ReferenceYear): Reference year of region
+    /// * t_out_n (f32): Norm outside temperature [°C]
+    /// * hist (usize): Size of history memory (0 for no memory)
+    pub fn add_reference_year_heatpump(&mut self, seas_perf_fac: f32,
+                                       t_supply: f32,
+                                       reference_year: &ReferenceYear,
+                                       t_out_n: f32, hist: usize)
+    {
+        self.add_heatpump(
+            heatpump_system::BuildingHeatpumpSystem
+                ::with_reference_year(self.q_hln,
+                                      seas_perf_fac,
+                                      t_supply,
+                                      reference_year,
+                                      self.heat_lim_temperature,
+                                      t_out_n,
+                                      hist));
+    }
+
     /// Calculate normed heating load Q_HLN of a building [W]
     ///
     /// The calculation is done in reference to the simplified method
@@ -436,6 +615,12 @@ impl Building {
     /// * (f32, f32, f32): (electrical generation/load = 0.,
     ///                     thermal generation,
     ///                     fuel used = 0.)
+    fn default_heat_building()
+    -> fn(&mut Building, &f32, &f32, &f32) -> (f32, f32, f32)
+    {
+        Building::get_dhn_generation
+    }
+
     fn get_dhn_generation(&mut self, sh_power_request: &f32,
                           thermal_load_hw: &f32, _t_out: &f32)
     -> (f32, f32, f32)
@@ -511,8 +696,7 @@ impl Building {
     /// # Returns
     /// * f32: Space heating demand [W]
     fn get_space_heating_demand(&mut self, q_in: &f32, t_out: &f32) -> f32 {
-        // TODO: variable step size
-        let quot_c_dt = self.cp_eff / 0.25;  // step size 0.25h
+        let quot_c_dt = self.cp_eff / get_time_step();
 
         self.temperature = 1. / (quot_c_dt + self.res_u_trans) *
                            (q_in + self.res_u_trans * t_out +
@@ -548,10 +732,59 @@ impl Building {
           (0.05 * self.q_hln / self.a_living + 10.34).min(17.).max(9.5);
     }
 
+    pub fn a_living(&self) -> &f32 {
+        &self.a_living
+    }
+
+    pub fn has_pv(&self) -> bool {
+        self.pv.is_some()
+    }
+
+    pub fn is_self_supplied_t(&self) -> &bool {
+        &self.is_self_supplied_t
+    }
+
+    pub fn n_agents(&self) -> &u32 {
+        &self.n_agents
+    }
+
+    pub fn n_max_agents(&self) -> &u32 {
+        &self.n_max_agents
+    }
+
     pub fn q_hln(&self) -> &f32 {
         &self.q_hln
     }
 
+    /// Replace random streams of all agents in building
+    ///
+    /// # Arguments
+    /// * seeder (&mut StreamSeeder): Source of new random streams
+    pub fn reseed(&mut self, seeder: &mut StreamSeeder) {
+        for agent in self.agents.iter_mut() {
+            agent.reseed(seeder.next_stream());
+        }
+    }
+
+    /// Access to chp system of building without copying it
+    pub fn chp_system(&self) -> Option<&chp_system::BuildingChpSystem>
+    {
+        match &self.heating_system {
+            Some(HeatingSystem::ChpSystem(system)) => Some(system),
+            _ => None,
+        }
+    }
+
+    /// Access to heatpump system of building without copying it
+    pub fn hp_system(&self)
+    -> Option<&heatpump_system::BuildingHeatpumpSystem>
+    {
+        match &self.heating_system {
+            Some(HeatingSystem::HeatpumpSystem(system)) => Some(system),
+            _ => None,
+        }
+    }
+
 
     /// Calculate and return current power consumption and generation
     ///
@@ -578,7 +811,7 @@ impl Building {
         self.update_mean_t_out(&amb.t_out);
 
         // calculate loads
-        self.agents.iter().for_each(|agent: &agent::Agent| {
+        self.agents.iter_mut().for_each(|agent: &mut agent::Agent| {
             let (sub_load_e, sub_load_t) = agent.step(slp_data, hw_profile);
             electrical_load += sub_load_e;
             thermal_load_hw += sub_load_t;
@@ -645,7 +878,7 @@ impl Building {
         // thermal heat needed for heating up the building in one time step
         // or overhang of thermal energy (then heat_up is negative)
         heat_up = self.cp_eff * (self.nominal_temperature -
-                                 self.temperature) / Building::TIME_STEP;
+                                 self.temperature) / get_time_step();
 
         if self.temperature < *t_out {
             heat_loss = 0.;
@@ -666,8 +899,8 @@ impl Building {
     /// # Arguments
     /// * t_out (&f32): Outside temperature [degC]
     fn update_mean_t_out(&mut self, t_out: &f32) {
+        let n = 24. / get_time_step();
         self.mean_outside_temperature =
-          (Building::N - 1.) / (Building::N) * self.mean_outside_temperature +
-          1. / Building::N * t_out;
+          (n - 1.) / n * self.mean_outside_temperature + 1. / n * t_out;
     }
 }
\ No newline at end of file
@@ -1,19 +1,37 @@
 // external
 use pyo3::prelude::*;
+use pyo3::class::iter::PyIterProtocol;
+use pyo3::exceptions::{PyIndexError, PyRuntimeError, PyValueError};
+use pyo3::types::{PyBytes, PyDict};
+use serde::{Deserialize, Serialize};
+use rayon::prelude::*;
 use std::collections::HashMap;
-use log::error;
+use std::mem::size_of;
+use std::sync::Arc;
+use log::{error, warn};
+use numpy::{PyReadonlyArray1, PyReadonlyArray2};
 
-use crate::{building, sep_bsl_agent, save_e, save_t};
+use crate::{agent, building, sep_bsl_agent, save_e, save_t};
 use crate::components::pv;
 use crate::components::solarthermal;
 use crate::components::wind;
-use crate::misc::{hist_memory};
+use crate::misc::hist_memory::{self, HistEntity, HistMatrix, HistNames,
+                               HistOwner, HistSum, HistView, HistVisitor,
+                               Recorded, Recorder, RowVisitor};
 use crate::misc::ambient::AmbientParameters;
 use crate::misc::cell_manager::CellManager;
+use crate::misc::memory_report::MemoryReport;
+use crate::misc::random::StreamSeeder;
+use crate::misc::recording::{self, RecordingRule};
+use crate::misc::reference_year::ReferenceYear;
+use crate::thermal_systems::building::chp_system::BuildingChpSystem;
+use crate::thermal_systems::building::heatpump_system::BuildingHeatpumpSystem;
 use crate::thermal_systems::cell::{chp_system_thermal, theresa_system};
+use crate::thermal_systems::storage_controller::StorageController;
+use crate::misc::serialization::{self, Stateful};
 
 
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 enum ThermalSystem {
     ChpSystem(chp_system_thermal::CellChpSystemThermal),
     TheresaSystem(theresa_system::TheresaSystem),
@@ -29,25 +47,201 @@ impl ThermalSystem {
     /// * amb (&AmbientParameters): Current Ambient Measurements
     ///
     /// # Returns
-    /// * (f32, f32, f32): Resulting electrical and thermal power
-    ///                    and fuel used by system [W]
+    /// * PyResult<(f32, f32, f32)>: Resulting electrical and thermal power
+    ///                              and fuel used by system [W] or error
+    ///                              of python controller
     fn step(&mut self, thermal_demand: &f32, cell_state: &CellManager,
             amb: &AmbientParameters)
-    -> (f32, f32, f32)
+    -> PyResult<(f32, f32, f32)>
     {
         match self {
             ThermalSystem::ChpSystem(system) => system.step(thermal_demand,
                                                             cell_state,
                                                             amb),
             ThermalSystem::TheresaSystem(system) =>
-                system.step(thermal_demand),
+                Ok(system.step(thermal_demand)),
             //_ => (0., 0., 0.)
         }
     }
 }
 
+/// Lightweight handle to a building of a cell
+///
+/// The handle only keeps a reference to the cell and the position
+/// of the building. All values are read directly from the cell,
+/// so no building data is copied.
 #[pyclass]
-#[derive(Clone)]
+pub struct BuildingHandle {
+    cell: Py<Cell>,
+    #[pyo3(get)]
+    idx: usize,
+}
+
+#[pymethods]
+impl BuildingHandle {
+    #[getter]
+    fn a_living(&self, py: Python) -> PyResult<f32> {
+        self.with_building(py, |building| *building.a_living())
+    }
+
+    #[getter]
+    fn gen_e(&self, py: Python) -> PyResult<Option<HistView>> {
+        self.history(py, |building| &building.gen_e, "gen_e")
+    }
+
+    #[getter]
+    fn gen_t(&self, py: Python) -> PyResult<Option<HistView>> {
+        self.history(py, |building| &building.gen_t, "gen_t")
+    }
+
+    #[getter]
+    fn load_e(&self, py: Python) -> PyResult<Option<HistView>> {
+        self.history(py, |building| &building.load_e, "load_e")
+    }
+
+    #[getter]
+    fn load_t(&self, py: Python) -> PyResult<Option<HistView>> {
+        self.history(py, |building| &building.load_t, "load_t")
+    }
+
+    #[getter]
+    fn temperature_hist(&self, py: Python) -> PyResult<Option<HistView>> {
+        self.history(py, |building| &building.temperature_hist,
+                     "temperature_hist")
+    }
+
+    #[getter]
+    fn is_at_dhn(&self, py: Python) -> PyResult<bool> {
+        self.with_building(py, |building| building.is_at_dhn)
+    }
+
+    #[getter]
+    fn is_self_supplied_t(&self, py: Python) -> PyResult<bool> {
+        self.with_building(py, |building| *building.is_self_supplied_t())
+    }
+
+    #[getter]
+    fn n_agents(&self, py: Python) -> PyResult<u32> {
+        self.with_building(py, |building| *building.n_agents())
+    }
+
+    #[getter]
+    fn n_max_agents(&self, py: Python) -> PyResult<u32> {
+        self.with_building(py, |building| *building.n_max_agents())
+    }
+
+    #[getter]
+    fn q_hln(&self, py: Python) -> PyResult<f32> {
+        self.with_building(py, |building| *building.q_hln())
+    }
+
+    /// Get copy of referenced building
+    fn get(&self, py: Python) -> PyResult<building::Building> {
+        self.with_building(py, |building| building.clone())
+    }
+
+    fn has_chp(&self, py: Python) -> PyResult<bool> {
+        self.with_building(py, |building| building.chp_system().is_some())
+    }
+
+    fn has_heating_system(&self, py: Python) -> PyResult<bool> {
+        self.with_building(py, |building| {
+            building.chp_system().is_some() | building.hp_system().is_some()
+        })
+    }
+
+    fn has_heatpump(&self, py: Python) -> PyResult<bool> {
+        self.with_building(py, |building| building.hp_system().is_some())
+    }
+
+    fn has_pv(&self, py: Python) -> PyResult<bool> {
+        self.with_building(py, |building| building.has_pv())
+    }
+}
+
+impl BuildingHandle {
+    /// Call function with the referenced building of the cell
+    ///
+    /// # Arguments
+    /// * py (Python): Python GIL token
+    /// * f (FnOnce(&Building) -> T): Function called with the building
+    ///
+    /// # Returns
+    /// * PyResult<T>: Result of function, RuntimeError if the cell is
+    ///                borrowed (e.g. while it is simulated) or
+    ///                IndexError if the building doesn't exist anymore
+    ///                (e.g. after __setstate__)
+    fn with_building<T>(&self, py: Python,
+                        f: impl FnOnce(&building::Building) -> T)
+    -> PyResult<T>
+    {
+        let cell = self.cell.try_borrow(py).map_err(|_| {
+            PyRuntimeError::new_err("Cell is already borrowed \
+                                     (e.g. while it is simulated)")
+        })?;
+        match cell.buildings.get(self.idx) {
+            Some(building) => Ok(f(building)),
+            None => Err(PyIndexError::new_err(
+                        format!("Building position {} exceeds number of \
+                                 available buildings ({})",
+                                self.idx, cell.buildings.len()))),
+        }
+    }
+
+    /// Get view of a building history, that reads from the cell
+    ///
+    /// # Arguments
+    /// * py (Python): Python GIL token
+    /// * memory (fn): Selects the history memory of the building
+    /// * quantity (&str): Name of the history quantity
+    ///
+    /// # Returns
+    /// * PyResult<Option<HistView>>: View or None, if there is no memory
+    ///                               (errors see with_building)
+    fn history(&self, py: Python,
+               memory: fn(&building::Building)
+                          -> &Option<hist_memory::HistMemory>,
+               quantity: &'static str) -> PyResult<Option<HistView>>
+    {
+        if !self.with_building(py, |building| memory(building).is_some())? {
+            return Ok(None);
+        }
+
+        Ok(Some(HistView::new(py, self.cell.clone_ref(py),
+                              HistEntity::Building(self.idx), "building",
+                              quantity)))
+    }
+}
+
+/// Iterator over handles of all buildings in a cell
+#[pyclass]
+pub struct BuildingIter {
+    cell: Py<Cell>,
+    idx: usize,
+    n: usize,
+}
+
+#[pyproto]
+impl PyIterProtocol for BuildingIter {
+    fn __iter__(slf: PyRef<Self>) -> PyRef<Self> {
+        slf
+    }
+
+    fn __next__(mut slf: PyRefMut<Self>) -> Option<BuildingHandle> {
+        if slf.idx < slf.n {
+            let py = slf.py();
+            let handle = BuildingHandle {cell: slf.cell.clone_ref(py),
+                                         idx: slf.idx};
+            slf.idx += 1;
+            Some(handle)
+        } else {
+            None
+        }
+    }
+}
+
+#[pyclass]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct Cell {
     #[pyo3(get)]
     sub_cells: Vec<Cell>,
@@ -73,16 +267,59 @@ pub struct Cell {
     wind: Option<wind::Wind>,
     thermal_system: Option<ThermalSystem>,
     state: CellManager,
-    #[pyo3(get)]
+    // optional thread pool for parallel calculation of cell entities
+    // not serialized, loaded cells are calculated serial
+    #[serde(skip)]
+    thread_pool: Option<Arc<rayon::ThreadPool>>,
     gen_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
     gen_t: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
     load_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
     load_t: Option<hist_memory::HistMemory>,
 }
 
+impl Stateful for Cell {
+    const KIND: &'static str = "Cell";
+
+    fn restore(&mut self) {
+        for sub_cell in self.sub_cells.iter_mut() {
+            sub_cell.restore();
+        }
+        for building in self.buildings.iter_mut() {
+            building.restore();
+        }
+    }
+}
+
+impl Recorded for Cell {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        self.visit_cell_histories(visitor);
+        for building in self.buildings.iter_mut() {
+            building.visit_histories(visitor);
+        }
+        for agent in self.sep_bsl_agents.iter_mut() {
+            agent.visit_histories(visitor);
+        }
+        for sub_cell in self.sub_cells.iter_mut() {
+            sub_cell.visit_histories(visitor);
+        }
+    }
+}
+
+impl HistOwner for Cell {
+    fn visit_entity_histories(&mut self, entity: &HistEntity,
+                              visitor: &mut HistVisitor)
+    {
+        match entity {
+            HistEntity::Own => self.visit_cell_histories(visitor),
+            HistEntity::Building(idx) => {
+                if let Some(building) = self.buildings.get_mut(*idx) {
+                    building.visit_histories(visitor);
+                }
+            }
+        }
+    }
+}
+
 #[pymethods]
 impl Cell {
     ///  Create cell to simulate a energy grid segment
@@ -126,6 +363,7 @@ impl Cell {
               wind: None,
               thermal_system: None,
               state: CellManager::new(),
+              thread_pool: None,
               gen_e: gen_e,
               gen_t: gen_t,
               load_e: load_e,
@@ -138,6 +376,137 @@ impl Cell {
         self.n_buildings += 1;
     }
 
+    /// Create buildings of one type with their agents, PV plants and
+    /// heatpumps and add them to cell
+    ///
+    /// All random decisions are made before (e.g. vectorized in python),
+    /// here only the entities are created. For each building the entities
+    /// are created in the same order as by single creation (building,
+    /// agents, PV, heatpump), so the random streams are the same.
+    ///
+    /// # Arguments
+    /// * n_max_agents (u32): Number of max. possible agents per building
+    /// * a_living (f32): Buildings living space [m^2]
+    /// * areas (Vec<f32>): Building areas [m^2]
+    /// * u_values (PyReadonlyArray2<f32>): U-Values of areas for each
+    ///                                     building [W/(m^2 K)]
+    ///                                     (buildings x areas)
+    /// * delta_u (PyReadonlyArray1<f32>): Offset for U-Value correction
+    ///                                    of each building [W/(m^2 K)]
+    /// * n_infiltration (PyReadonlyArray1<f32>): Air infiltration rate of
+    ///                                           each building [1/h]
+    /// * n_ventilation (PyReadonlyArray1<f32>): Air infiltration rate due
+    ///                                          ventilation of each
+    ///                                          building [1/h]
+    /// * cp_eff (f32): Effective heat storage coefficient of
+    ///                 buildings [Wh/K]
+    /// * g (PyReadonlyArray1<f32>): Solar factor of windows of
+    ///                              each building [-]
+    /// * volume (f32): Inner building Volume [m^3]
+    /// * is_at_dhn (PyReadonlyArray1<bool>): Connection of each building
+    ///                                       to district heating network
+    /// * agent_types (PyReadonlyArray2<i8>): Type of agents
+    ///                                       (0: PHH, 1: BSLa, 2: BSLc,
+    ///                                        negative: no agent)
+    ///                                       (buildings x n_max_agents)
+    /// * has_pv (PyReadonlyArray1<bool>): Add dimensioned PV to building
+    /// * hp_t_supply (PyReadonlyArray1<f32>): Supply temperature of
+    ///                                        heatpump for each building
+    ///                                        [degC] (NaN: no heatpump)
+    /// * seas_perf_fac (f32): Seasonal performance factor of heatpumps
+    /// * reference_year (ReferenceYear): Reference temperatures of region
+    /// * hist (usize): Size of history memory (0 for no memory)
+    ///
+    /// # Returns
+    /// * usize: Position of first added building in cell
+    fn add_buildings_from_arrays(&mut self, n_max_agents: u32, a_living: f32,
+                                 areas: Vec<f32>,
+                                 u_values: PyReadonlyArray2<f32>,
+                                 delta_u: PyReadonlyArray1<f32>,
+                                 n_infiltration: PyReadonlyArray1<f32>,
+                                 n_ventilation: PyReadonlyArray1<f32>,
+                                 cp_eff: f32,
+                                 g: PyReadonlyArray1<f32>,
+                                 volume: f32,
+                                 is_at_dhn: PyReadonlyArray1<bool>,
+                                 agent_types: PyReadonlyArray2<i8>,
+                                 has_pv: PyReadonlyArray1<bool>,
+                                 hp_t_supply: PyReadonlyArray1<f32>,
+                                 seas_perf_fac: f32,
+                                 reference_year: ReferenceYear,
+                                 hist: usize) -> PyResult<usize>
+    {
+        let u_values = u_values.as_array();
+        let agent_types = agent_types.as_array();
+        let (delta_u, n_infiltration, n_ventilation, g) =
+            (delta_u.as_array(), n_infiltration.as_array(),
+             n_ventilation.as_array(), g.as_array());
+        let (is_at_dhn, has_pv, hp_t_supply) =
+            (is_at_dhn.as_array(), has_pv.as_array(), hp_t_supply.as_array());
+
+        let n_buildings = u_values.nrows();
+        if u_values.ncols() != areas.len() {
+            return Err(PyValueError::new_err(format!(
+                "Got U-Values for {} areas, but {} areas",
+                u_values.ncols(), areas.len())));
+        }
+        if agent_types.nrows() != n_buildings ||
+           agent_types.ncols() != n_max_agents as usize {
+            return Err(PyValueError::new_err(
+                "Shape of agent types must be (buildings x n_max_agents)"));
+        }
+        for len in [delta_u.len(), n_infiltration.len(), n_ventilation.len(),
+                    g.len(), is_at_dhn.len(), has_pv.len(),
+                    hp_t_supply.len()].iter() {
+            if *len != n_buildings {
+                return Err(PyValueError::new_err(format!(
+                    "All building parameters must have {} values \
+                     (number of buildings)", n_buildings)));
+            }
+        }
+
+        let first_idx = self.buildings.len();
+        self.buildings.reserve(n_buildings);
+
+        for b_nr in 0..n_buildings {
+            let areas_uv: Vec<[f32; 2]> =
+                areas.iter()
+                     .zip(u_values.row(b_nr).iter())
+                     .map(|(area, u)| [*area, *u])
+                     .collect();
+            let mut building = building::Building::new(
+                n_max_agents, a_living, areas_uv, delta_u[b_nr],
+                n_infiltration[b_nr], n_ventilation[b_nr], cp_eff, g[b_nr],
+                volume, is_at_dhn[b_nr], self.t_out_n, hist);
+
+            for a_type in agent_types.row(b_nr).iter() {
+                if *a_type >= 0 {
+                    building.add_agent(agent::Agent::new(*a_type as usize));
+                }
+            }
+
+            if has_pv[b_nr] {
+                building.add_dimensioned_pv(self.eg, hist);
+            }
+
+            if !hp_t_supply[b_nr].is_nan() {
+                let q_hln = *building.q_hln();
+                if q_hln < 5000. || q_hln > 80000. {
+                    warn!("for this building no heatpump data is available, \
+                           maximum heat load is {:.2}W", q_hln);
+                } else {
+                    building.add_reference_year_heatpump(
+                        seas_perf_fac, hp_t_supply[b_nr], &reference_year,
+                        self.t_out_n, hist);
+                }
+            }
+
+            self.add_building(building);
+        }
+
+        Ok(first_idx)
+    }
+
     fn add_cell(&mut self, cell:Cell) {
         self.sub_cells.push(cell);
         self.n_cells += 1;
@@ -195,6 +564,151 @@ impl Cell {
         }
     }
 
+    /// Get copy of a single building, without copying all
+    /// buildings of cell (as cell.buildings does)
+    ///
+    /// # Arguments
+    /// * building_idx (usize): Position of building in cell
+    ///
+    /// # Returns
+    /// * Building: Copy of building
+    fn building(&self, building_idx: usize) -> PyResult<building::Building>
+    {
+        match self.buildings.get(building_idx) {
+            Some(building) => Ok(building.clone()),
+            None => Err(PyIndexError::new_err(
+                        format!("Building position {} exceeds number of \
+                                 available buildings ({})",
+                                building_idx, self.n_buildings))),
+        }
+    }
+
+    /// Get lightweight handle to a single building of cell
+    ///
+    /// The handle reads the building data directly from the cell,
+    /// hence nothing is copied.
+    ///
+    /// # Arguments
+    /// * building_idx (usize): Position of building in cell
+    ///
+    /// # Returns
+    /// * BuildingHandle: Handle to building
+    fn building_handle(slf: PyRef<Self>, building_idx: usize)
+    -> PyResult<BuildingHandle>
+    {
+        if building_idx >= slf.buildings.len() {
+            return Err(PyIndexError::new_err(
+                        format!("Building position {} exceeds number of \
+                                 available buildings ({})",
+                                building_idx, slf.n_buildings)));
+        }
+        Ok(BuildingHandle {cell: slf.into(), idx: building_idx})
+    }
+
+    /// Iterate over lightweight handles of all buildings in cell
+    ///
+    /// # Returns
+    /// * BuildingIter: Iterator over building handles
+    fn iter_buildings(slf: PyRef<Self>) -> BuildingIter
+    {
+        let n = slf.buildings.len();
+        BuildingIter {cell: slf.into(), idx: 0, n: n}
+    }
+
+    /// Get maximum heat loads of all buildings without heating system
+    /// (e.g. candidates for CHP placement)
+    ///
+    /// # Returns
+    /// * (Vec<usize>, Vec<f32>): Positions of buildings in cell and
+    ///                           their maximum heat load [W]
+    fn get_unheated_heat_loads(&self) -> (Vec<usize>, Vec<f32>)
+    {
+        self.buildings.iter()
+                      .enumerate()
+                      .filter(|(_, building)|
+                              building.chp_system().is_none() &&
+                              building.hp_system().is_none())
+                      .map(|(idx, building)| (idx, *building.q_hln()))
+                      .unzip()
+    }
+
+    /// Add CHP system to a building of cell in place,
+    /// without copying the building
+    ///
+    /// # Arguments
+    /// * building_idx (usize): Position of building in cell
+    /// * hist (usize): Size of history memory (0 for no memory)
+    fn add_dimensioned_chp(&mut self, building_idx: usize, hist: usize)
+    -> PyResult<()>
+    {
+        match self.buildings.get_mut(building_idx) {
+            Some(building) => {
+                building.add_dimensioned_chp(hist);
+                Ok(())
+            },
+            None => Err(PyIndexError::new_err(
+                        format!("Building position {} exceeds number of \
+                                 available buildings ({})",
+                                building_idx, self.n_buildings))),
+        }
+    }
+
+    /// Set rule based controller of chp systems of buildings in place
+    ///
+    /// Example (boiler as primary generator in all buildings):
+    ///     cell.set_rule_controller(StorageController(boiler_priority=True))
+    ///
+    /// # Arguments
+    /// * controller (StorageController): Controller, which is copied
+    ///                                   to each chp system
+    /// * building_idx (Option<usize>): Position of building in cell
+    ///                                 (default: None -> all buildings)
+    ///
+    /// # Returns
+    /// * PyResult<usize>: Number of changed chp systems
+    ///                    (IndexError for an invalid position)
+    #[args(building_idx = "None")]
+    fn set_rule_controller(&mut self, controller: StorageController,
+                           building_idx: Option<usize>) -> PyResult<usize>
+    {
+        let n_buildings = self.n_buildings;
+        let buildings = match building_idx {
+            None => &mut self.buildings[..],
+            Some(idx) => match self.buildings.get_mut(idx..=idx) {
+                Some(buildings) => buildings,
+                None => return Err(PyIndexError::new_err(
+                            format!("Building position {} exceeds number \
+                                     of available buildings ({})",
+                                    idx, n_buildings))),
+            },
+        };
+
+        Ok(buildings.iter_mut()
+                    .filter(|building| {
+                        building.set_rule_controller(controller.clone())
+                    })
+                    .count())
+    }
+
+    /// Get copy of a single sub cell, without copying all
+    /// sub cells of cell (as cell.sub_cells does)
+    ///
+    /// # Arguments
+    /// * cell_idx (usize): Position of sub cell in cell
+    ///
+    /// # Returns
+    /// * Cell: Copy of sub cell
+    fn sub_cell(&self, cell_idx: usize) -> PyResult<Cell>
+    {
+        match self.sub_cells.get(cell_idx) {
+            Some(sub_cell) => Ok(sub_cell.clone()),
+            None => Err(PyIndexError::new_err(
+                        format!("Sub cell position {} exceeds number of \
+                                 available sub cells ({})",
+                                cell_idx, self.n_cells))),
+        }
+    }
+
     /// # Returns
     /// PyResult<f32>: Mean yearly electrical cell demand [Wh]
     fn get_electrical_demand(&self) -> PyResult<f32>
@@ -217,6 +731,182 @@ impl Cell {
         Ok(coc*1e6)  // coc is mean yearly demand per 1000 kWh -> * 1e3 * 1e3
     }
 
+    /// Collect histories of all cell components in one call
+    ///
+    /// For each quantity the histories of all corresponding components are
+    /// combined into one matrix (components x steps). Components without
+    /// history are skipped, therefore an index table is returned for each
+    /// matrix, which maps the rows to the entities of this cell:
+    ///     column 0: entity type
+    ///         0: building (position in cell.buildings)
+    ///         1: separate BSL agent (position in cell.sep_bsl_agents)
+    ///         2: cell itself (position is always 0)
+    ///     column 1: position of entity
+    ///
+    /// Sub cells are not included, their histories can be collected
+    /// by calling this method on them. To sum up a quantity including
+    /// sub cells use sum_history(). A ValueError is raised, if the
+    /// record sizes of a quantity differ (e.g. by different recording
+    /// modes).
+    ///
+    /// Available quantities:
+    ///     - "building gen_e", "building load_e",
+    ///       "building gen_t", "building load_t", "building temperature"
+    ///     - "pv gen_e" (buildings, separate BSL agents and cell)
+    ///     - "sep_bsl gen_e", "sep_bsl load_e"
+    ///     - "heatpump gen_t", "heatpump con_e", "heatpump cop"
+    ///     - "chp gen_e", "chp gen_t"
+    ///
+    /// # Arguments
+    /// * quantities (Vec<&str>): Quantities to collect, if None all
+    ///                           available quantities are collected
+    ///                           (default: None)
+    ///
+    /// # Returns
+    /// * dict: Mapping of quantity to (float32 matrix, uint32 index table)
+    #[args(quantities = "None")]
+    fn get_history_matrices(&self, py: Python,
+                            quantities: Option<Vec<&str>>)
+    -> PyResult<PyObject>
+    {
+        let quantities = quantities.unwrap_or_else(|| {
+            Cell::HISTORY_QUANTITIES.to_vec()
+        });
+
+        let histories = PyDict::new(py);
+        for quantity in quantities {
+            let mut matrix = HistMatrix::new();
+            let mut result = Ok(());
+            let mut add_row = |entity: u32, position: usize,
+                               hist: &Option<hist_memory::HistMemory>| {
+                if result.is_ok() {
+                    result = matrix.add_row(entity, position, hist);
+                }
+            };
+            self.visit_quantity(quantity, &mut add_row)?;
+            result?;
+            histories.set_item(quantity, matrix.to_py_arrays(py)?)?;
+        }
+
+        Ok(histories.to_object(py))
+    }
+
+    /// Sum up the histories of a quantity for each time step
+    ///
+    /// The summation is done without collecting the single histories
+    /// (see get_history_matrices() for available quantities).
+    ///
+    /// # Arguments
+    /// * quantity (&str): Quantity to sum up
+    /// * entities (Vec<u32>): Entity types to consider, if None all are
+    ///                        considered (default: None)
+    /// * sub_cells (bool): If true, the histories of all sub cells
+    ///                     are added as well (default: false)
+    ///
+    /// # Returns
+    /// * np.ndarray: float32 array or None, if no history is available
+    #[args(entities = "None", sub_cells = "false")]
+    fn sum_history(&self, py: Python, quantity: &str,
+                   entities: Option<Vec<u32>>, sub_cells: bool)
+    -> PyResult<Option<PyObject>>
+    {
+        let mut sum = HistSum::new();
+        self.add_history_sum(quantity, &entities, sub_cells, &mut sum)?;
+
+        Ok(sum.to_py_array(py))
+    }
+
+    /// Set recording mode of history memories of cell and all of its
+    /// entities and components (including sub cells)
+    ///
+    /// The memories are resized to the number of values saved by the
+    /// recorder, already saved values are removed. Components without
+    /// history memory are not changed.
+    ///
+    /// Example (daily thermal energy of all buildings):
+    ///     cell.set_recorder(Recorder.daily("energy"),
+    ///                       component="building", quantity="load_t")
+    ///
+    /// # Arguments
+    /// * recorder (Recorder): Recording mode
+    /// * component (Option<&str>): Name of component, e.g. "cell",
+    ///                             "building", "sep_bsl", "pv", "heatpump",
+    ///                             "boiler", "chp", "storage", "storage_hw"
+    ///                             (default: None -> all components)
+    /// * quantity (Option<&str>): Name of quantity, e.g. "gen_e", "load_t",
+    ///                            "cop_hist", "charge_hist"
+    ///                            (default: None -> all quantities)
+    ///
+    /// # Returns
+    /// * usize: Number of changed history memories
+    ///          (BufferError, if a memory of cell is exported)
+    #[args(component = "None", quantity = "None")]
+    fn set_recorder(&mut self, recorder: Recorder, component: Option<&str>,
+                    quantity: Option<&str>) -> PyResult<usize>
+    {
+        // check all memories before, so nothing is changed on error
+        hist_memory::check_exports(self)?;
+
+        let mut n_changed = 0;
+        let mut result = Ok(());
+        self.visit_histories(&mut |hist_component, hist_quantity, hist| {
+            if component.map_or(false, |name| name != hist_component) ||
+               quantity.map_or(false, |name| name != hist_quantity) {
+                return;
+            }
+            if let Some(hist) = hist {
+                if result.is_ok() {
+                    result = hist.set_recorder(&recorder);
+                    n_changed += 1;
+                }
+            }
+        });
+        result?;
+
+        Ok(n_changed)
+    }
+
+    /// Select history memories to record with a recording spec
+    ///
+    /// The memories of the cell, its entities and components and of all
+    /// sub cells are created or removed as given by the rules
+    /// (see RecordingRule), already saved values are removed.
+    /// The positions of buildings and separate BSL agents are counted
+    /// in each cell, the cell itself has position 0.
+    ///
+    /// # Arguments
+    /// * rules (Vec<RecordingRule>): Recording spec
+    /// * hist (usize): Size of memories in simulation steps,
+    ///                 if not given by rule
+    ///
+    /// # Returns
+    /// * usize: Number of recorded history memories
+    ///          (BufferError, if a memory of cell is exported)
+    fn set_recording(&mut self, rules: Vec<RecordingRule>, hist: usize)
+    -> PyResult<usize>
+    {
+        hist_memory::check_exports(self)?;
+
+        Ok(self.apply_recording(&rules, hist))
+    }
+
+    /// Get bytes held by the cell, broken down by its parts
+    ///
+    /// The bytes are calculated from the sizes of the structs and
+    /// the allocated capacities of their vectors, e.g. the values of
+    /// the history memories. Allocator overhead is not included.
+    ///
+    /// # Returns
+    /// * HashMap<&str, usize>: Bytes of "cell", "sub_cells", "buildings",
+    ///                         "agents", "heating_systems", "storages",
+    ///                         "histories" and "total"
+    fn memory_report(&mut self) -> HashMap<&'static str, usize> {
+        let mut report = MemoryReport::new();
+        self.add_memory_usage(&mut report);
+
+        report.to_map()
+    }
+
     /// Calculate a max. expectable thermal demand in current cell.
     /// If this cell is supplying sub-cells, it's recommended to consider
     /// also their demand for the dimensioning of the thermal system. Hence,
@@ -275,15 +965,49 @@ impl Cell {
         }
     }
 
+    /// Replace building of cell
+    ///
+    /// # Arguments
+    /// * building_pos (usize): Position of building in cell
+    /// * building (Building): New building
+    ///
+    /// # Returns
+    /// * PyResult<()>: IndexError for an invalid position, BufferError
+    ///                 if a history memory of the old building is exported
     fn replace_building(&mut self, building_pos: usize,
-                        building: building::Building)
+                        building: building::Building) -> PyResult<()>
     {
-        if building_pos > (self.n_buildings - 1) as usize {
-            error!("Building position exceeds number of available buildings. \
-                   Max. possiblie building position is {}",
-                   self.n_buildings - 1);
-        } else {
-            self.buildings[building_pos] = building;
+        self.set_building(building_pos, building)
+    }
+
+    /// Set number of threads used for the calculation of sub cells,
+    /// buildings and separate BSL agents.
+    ///
+    /// The power balances are always summed up in the same order,
+    /// so the results don't depend on the number of threads.
+    /// Sub cells are calculated in the thread pool of this cell,
+    /// the thermal system of this cell in the calling thread.
+    /// The GIL is released while the cell is stepped, so python
+    /// controllers of sub cells acquire it in the threads of the pool.
+    ///
+    /// # Arguments
+    /// * n_threads (usize): Number of threads
+    ///                      (0 for serial calculation, which is default)
+    fn set_n_threads(&mut self, n_threads: usize) -> PyResult<()>
+    {
+        if n_threads == 0 {
+            self.thread_pool = None;
+            return Ok(());
+        }
+
+        match rayon::ThreadPoolBuilder::new().num_threads(n_threads).build() {
+            Ok(pool) => {
+                self.thread_pool = Some(Arc::new(pool));
+                Ok(())
+            },
+            Err(err) => Err(PyRuntimeError::new_err(
+                              format!("Thread pool could not be \
+                                       created: {}", err))),
         }
     }
 
@@ -308,7 +1032,7 @@ impl Cell {
     /// # Returns
     /// * (f32, f32, f32, f32): Current electrical and thermal
     ///                         power consumption and generation [W]
-    fn py_step(&mut self, pe: f32, pt: f32,
+    fn py_step(&mut self, py: Python, pe: f32, pt: f32,
                slp_data: HashMap<&str, f32>, hw_profile: f32,
                env_data: HashMap<&str, f32>,
                sol_data: HashMap<&str, f32>)
@@ -332,8 +1056,11 @@ impl Cell {
 
         let t_out_n = self.t_out_n;
 
+        // release GIL, so python controllers of sub cells can acquire it
+        // from the threads of a thread pool
         let (mut gen_e, mut load_e, mut gen_t, mut load_t) =
-            self.step(&slp, &hw_profile, &t_out_n, &mut amb);
+            py.allow_threads(|| self.step(&slp, &hw_profile, &t_out_n,
+                                          &mut amb))?;
 
         if pe > 0. {
             gen_e += pe;
@@ -349,14 +1076,420 @@ impl Cell {
         Ok((gen_e, load_e, gen_t, load_t))
     }
 
+    /// Replace building of cell (same as replace_building)
+    ///
+    /// # Arguments
+    /// * building_idx (usize): Position of building in cell
+    /// * building (Building): New building
+    ///
+    /// # Returns
+    /// * PyResult<()>: IndexError for an invalid position, BufferError
+    ///                 if a history memory of the old building is exported
     fn update_building(&mut self, building_idx: usize,
-                       building: building::Building)
+                       building: building::Building) -> PyResult<()>
     {
-        self.buildings[building_idx] = building;
+        self.set_building(building_idx, building)
+    }
+
+    /// Save cell with all sub cells, buildings, agents and
+    /// components (including states of storages, controllers,
+    /// random streams, ...) to a binary file
+    ///
+    /// Python controllers and the thread pool are not saved.
+    ///
+    /// # Arguments
+    /// * path (&str): Path of file
+    /// * history (bool): Save history memories, otherwise only their
+    ///                   sizes are saved (default: true)
+    #[args(history = "true")]
+    fn save(&self, path: &str, history: bool) -> PyResult<()> {
+        serialization::save(self, path, history)
+    }
+
+    /// Load cell from binary file (see save)
+    ///
+    /// # Arguments
+    /// * path (&str): Path of file
+    ///
+    /// # Returns
+    /// * Cell: Loaded cell
+    #[staticmethod]
+    fn load(path: &str) -> PyResult<Cell> {
+        serialization::load(path)
+    }
+
+    /// Get binary state of cell (see save)
+    ///
+    /// # Arguments
+    /// * history (bool): Include history memories (default: true)
+    ///
+    /// # Returns
+    /// * bytes: State of cell
+    #[args(history = "true")]
+    fn to_bytes(&self, py: Python, history: bool) -> PyResult<PyObject> {
+        Ok(PyBytes::new(py, &serialization::to_bytes(self, history)?).into())
+    }
+
+    /// Restore cell from binary state (see to_bytes)
+    ///
+    /// # Arguments
+    /// * state (bytes): State of cell
+    ///
+    /// # Returns
+    /// * Cell: Restored cell
+    #[staticmethod]
+    fn from_bytes(state: &[u8]) -> PyResult<Cell> {
+        serialization::from_bytes(state)
+    }
+
+    /// Get names of history memories of the equipment of generic cells,
+    /// as they are used by set_recorder or record (e.g. to estimate the
+    /// memory of a cell)
+    ///
+    /// # Returns
+    /// * dict: Names (component, quantity) for "cell", "building" and
+    ///         "sep_bsl" (without components), "pv" and the heating
+    ///         systems "heatpump" and "chp" of buildings
+    #[staticmethod]
+    fn history_names() -> HashMap<&'static str, HistNames> {
+        let mut names = HashMap::new();
+        let mut add = |equipment: &'static str,
+                       add_names: fn(&mut HistNames)| {
+            let mut equipment_names = Vec::new();
+            add_names(&mut equipment_names);
+            names.insert(equipment, equipment_names);
+        };
+        add("cell", Cell::own_history_names);
+        add("building", building::Building::own_history_names);
+        add("sep_bsl", sep_bsl_agent::SepBSLagent::own_history_names);
+        add("pv", pv::PV::history_names);
+        add("heatpump", BuildingHeatpumpSystem::history_names);
+        add("chp", BuildingChpSystem::history_names);
+
+        names
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |cell| &cell.gen_e, "cell", "gen_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |cell| &cell.gen_t, "cell", "gen_t")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn load_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |cell| &cell.load_e, "cell", "load_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn load_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |cell| &cell.load_t, "cell", "load_t")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
     }
 }
 
 impl Cell {
+    /// Replace building at position, the old building is dropped only if
+    /// none of its history memories is exported to python
+    ///
+    /// # Arguments
+    /// * building_idx (usize): Position of building in cell
+    /// * building (Building): New building
+    ///
+    /// # Returns
+    /// * PyResult<()>: IndexError for an invalid position, BufferError
+    ///                 if a history memory of the old building is exported
+    fn set_building(&mut self, building_idx: usize,
+                    building: building::Building) -> PyResult<()>
+    {
+        let n_buildings = self.n_buildings;
+        match self.buildings.get_mut(building_idx) {
+            Some(old_building) => {
+                hist_memory::check_exports(old_building)?;
+                *old_building = building;
+                Ok(())
+            },
+            None => Err(PyIndexError::new_err(
+                        format!("Building position {} exceeds number of \
+                                 available buildings ({})",
+                                building_idx, n_buildings))),
+        }
+    }
+
+    /// Add names of the own history memories of cell
+    /// (without its components, see visit_cell_histories)
+    ///
+    /// # Arguments
+    /// * names (&mut HistNames): Names (component, quantity)
+    fn own_history_names(names: &mut HistNames) {
+        names.extend([("cell", "gen_e"), ("cell", "gen_t"),
+                      ("cell", "load_e"), ("cell", "load_t")]);
+    }
+
+    /// Call visitor for history memories of cell itself and
+    /// its components (pv, solarthermal, wind, thermal system)
+    ///
+    /// # Arguments
+    /// * visitor (&mut HistVisitor): Function called for each memory
+    fn visit_cell_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("cell", "gen_e", &mut self.gen_e);
+        visitor("cell", "gen_t", &mut self.gen_t);
+        visitor("cell", "load_e", &mut self.load_e);
+        visitor("cell", "load_t", &mut self.load_t);
+        if let Some(pv) = &mut self.pv {
+            pv.visit_histories(visitor);
+        }
+        if let Some(solarthermal) = &mut self.solarthermal {
+            solarthermal.visit_histories(visitor);
+        }
+        if let Some(wind) = &mut self.wind {
+            wind.visit_histories(visitor);
+        }
+        match &mut self.thermal_system {
+            Some(ThermalSystem::ChpSystem(system)) => {
+                system.visit_histories(visitor);
+            },
+            Some(ThermalSystem::TheresaSystem(system)) => {
+                system.visit_histories(visitor);
+            },
+            None => {},
+        }
+    }
+
+    /// Apply recording spec to cell and its sub cells
+    /// (see set_recording)
+    ///
+    /// # Arguments
+    /// * rules (&[RecordingRule]): Recording spec
+    /// * hist (usize): Default size of memories in simulation steps
+    ///
+    /// # Returns
+    /// * usize: Number of recorded history memories
+    fn apply_recording(&mut self, rules: &[RecordingRule], hist: usize)
+    -> usize
+    {
+        let mut n_recorded = 0;
+        {
+            let mut apply = |entity: &str, position: usize, component: &str,
+                             quantity: &str,
+                             memory: &mut Option<hist_memory::HistMemory>| {
+                if recording::apply_rules(rules, hist, entity, position,
+                                          component, quantity, memory) {
+                    n_recorded += 1;
+                }
+            };
+
+            self.visit_cell_histories(&mut |component, quantity, memory| {
+                apply("cell", 0, component, quantity, memory)
+            });
+            for (idx, building) in self.buildings.iter_mut().enumerate() {
+                building.visit_histories(&mut |component, quantity, memory| {
+                    apply("building", idx, component, quantity, memory)
+                });
+            }
+            for (idx, agent) in self.sep_bsl_agents.iter_mut().enumerate() {
+                agent.visit_histories(&mut |component, quantity, memory| {
+                    apply("sep_bsl", idx, component, quantity, memory)
+                });
+            }
+        }
+        for sub_cell in self.sub_cells.iter_mut() {
+            n_recorded += sub_cell.apply_recording(rules, hist);
+        }
+
+        n_recorded
+    }
+
+    /// Get size of inline thermal system of a cell
+    pub fn thermal_system_size() -> usize {
+        size_of::<Option<ThermalSystem>>()
+    }
+
+    /// Add bytes held by cell and its entities to memory report
+    /// (see memory_report)
+    ///
+    /// # Arguments
+    /// * report (&mut MemoryReport): Report of cell
+    fn add_memory_usage(&mut self, report: &mut MemoryReport) {
+        let system_size = Cell::thermal_system_size();
+        report.cell += size_of::<Cell>() - system_size;
+        report.heating_systems += system_size;
+        match &self.thermal_system {
+            Some(ThermalSystem::ChpSystem(system)) => {
+                system.add_memory_usage(report);
+            },
+            Some(ThermalSystem::TheresaSystem(system)) => {
+                system.add_memory_usage(report);
+            },
+            None => {},
+        }
+
+        // buildings are stored inline, so unused capacity is added
+        report.buildings += (self.buildings.capacity() -
+                             self.buildings.len()) *
+                            size_of::<building::Building>();
+        for building in self.buildings.iter() {
+            building.add_memory_usage(report);
+        }
+        report.agents += self.sep_bsl_agents.capacity() *
+                         size_of::<sep_bsl_agent::SepBSLagent>();
+
+        let mut histories = 0;
+        {
+            let mut count = |_: &str, _: &str,
+                             memory: &mut Option<hist_memory::HistMemory>| {
+                if let Some(memory) = memory {
+                    histories += memory.heap_bytes();
+                }
+            };
+            self.visit_cell_histories(&mut count);
+            for building in self.buildings.iter_mut() {
+                building.visit_histories(&mut count);
+            }
+            for agent in self.sep_bsl_agents.iter_mut() {
+                agent.visit_histories(&mut count);
+            }
+        }
+        report.histories += histories;
+
+        report.sub_cells += (self.sub_cells.capacity() -
+                             self.sub_cells.len()) * size_of::<Cell>();
+        for sub_cell in self.sub_cells.iter_mut() {
+            let mut sub_report = MemoryReport::new();
+            sub_cell.add_memory_usage(&mut sub_report);
+            report.sub_cells += sub_report.total();
+        }
+    }
+
+    // Entity types used in index tables of history matrices
+    const ENTITY_BUILDING: u32 = 0;
+    const ENTITY_SEP_BSL: u32 = 1;
+    const ENTITY_CELL: u32 = 2;
+
+    // Quantities available for history matrices
+    const HISTORY_QUANTITIES: [&'static str; 13] = [
+        "building gen_e", "building load_e", "building gen_t",
+        "building load_t", "building temperature", "pv gen_e",
+        "sep_bsl gen_e", "sep_bsl load_e", "heatpump gen_t",
+        "heatpump con_e", "heatpump cop", "chp gen_e", "chp gen_t",
+    ];
+
+    /// Call visitor for each history of a quantity in this cell
+    /// (without sub cells)
+    ///
+    /// # Arguments
+    /// * quantity (&str): Quantity name (see get_history_matrices())
+    /// * visitor (&mut RowVisitor): Called with entity type, position
+    ///                              of entity and history memory
+    ///
+    /// # Returns
+    /// * PyResult<()>: ValueError, if the quantity is unknown
+    fn visit_quantity(&self, quantity: &str, visitor: &mut RowVisitor)
+    -> PyResult<()>
+    {
+        type Select<T> = fn(&T) -> Option<&Option<hist_memory::HistMemory>>;
+
+        let building: Option<Select<building::Building>> = match quantity {
+            "building gen_e" => Some(|b| Some(&b.gen_e)),
+            "building load_e" => Some(|b| Some(&b.load_e)),
+            "building gen_t" => Some(|b| Some(&b.gen_t)),
+            "building load_t" => Some(|b| Some(&b.load_t)),
+            "building temperature" => Some(|b| Some(&b.temperature_hist)),
+            "pv gen_e" => Some(|b| b.pv.as_ref().map(|pv| &pv.gen_e)),
+            "heatpump gen_t" =>
+                Some(|b| b.hp_system().map(|s| &s.heatpump.gen_t)),
+            "heatpump con_e" =>
+                Some(|b| b.hp_system().map(|s| &s.heatpump.con_e)),
+            "heatpump cop" =>
+                Some(|b| b.hp_system().map(|s| &s.heatpump.cop_hist)),
+            "chp gen_e" => Some(|b| b.chp_system().map(|s| &s.chp.gen_e)),
+            "chp gen_t" => Some(|b| b.chp_system().map(|s| &s.chp.gen_t)),
+            "sep_bsl gen_e" | "sep_bsl load_e" => None,
+            _ => {
+                return Err(PyValueError::new_err(format!(
+                    "Unknown history quantity {}", quantity)));
+            },
+        };
+        let agent: Option<Select<sep_bsl_agent::SepBSLagent>> =
+            match quantity {
+                "sep_bsl gen_e" => Some(|a| Some(&a.gen_e)),
+                "sep_bsl load_e" => Some(|a| Some(&a.load_e)),
+                "pv gen_e" => Some(|a| a.pv.as_ref().map(|pv| &pv.gen_e)),
+                _ => None,
+            };
+
+        if let Some(select) = building {
+            for (idx, building) in self.buildings.iter().enumerate() {
+                if let Some(hist) = select(building) {
+                    visitor(Cell::ENTITY_BUILDING, idx, hist);
+                }
+            }
+        }
+        if let Some(select) = agent {
+            for (idx, agent) in self.sep_bsl_agents.iter().enumerate() {
+                if let Some(hist) = select(agent) {
+                    visitor(Cell::ENTITY_SEP_BSL, idx, hist);
+                }
+            }
+        }
+        if quantity == "pv gen_e" {
+            if let Some(cell_pv) = &self.pv {
+                visitor(Cell::ENTITY_CELL, 0, &cell_pv.gen_e);
+            }
+        }
+
+        Ok(())
+    }
+
+    /// Add histories of a quantity to a sum (see sum_history())
+    fn add_history_sum(&self, quantity: &str, entities: &Option<Vec<u32>>,
+                       sub_cells: bool, sum: &mut HistSum)
+    -> PyResult<()>
+    {
+        let mut result = Ok(());
+        let mut add = |entity: u32, _: usize,
+                       hist: &Option<hist_memory::HistMemory>| {
+            let selected = entities.as_ref()
+                                   .map_or(true, |e| e.contains(&entity));
+            if selected && result.is_ok() {
+                result = sum.add(hist);
+            }
+        };
+        self.visit_quantity(quantity, &mut add)?;
+        result?;
+
+        if sub_cells {
+            for sub_cell in self.sub_cells.iter() {
+                sub_cell.add_history_sum(quantity, entities, true, sum)?;
+            }
+        }
+
+        Ok(())
+    }
+
     fn get_pv_generation(&mut self, eg: &f32) -> f32 {
         match &mut self.pv {
             None => 0.,
@@ -419,6 +1552,26 @@ impl Cell {
         amb.specific_gains = irradiations;
     }
 
+    /// Replace random streams of all stochastic entities of the cell
+    ///
+    /// The entities are visited in a fixed order (sub cells, buildings,
+    /// separate BSL agents), so each entity gets the same stream for a
+    /// given seed, independent of the number of threads used.
+    ///
+    /// # Arguments
+    /// * seeder (&mut StreamSeeder): Source of new random streams
+    pub fn reseed(&mut self, seeder: &mut StreamSeeder) {
+        for sub_cell in self.sub_cells.iter_mut() {
+            sub_cell.reseed(seeder);
+        }
+        for building in self.buildings.iter_mut() {
+            building.reseed(seeder);
+        }
+        for sep_bsl_agent in self.sep_bsl_agents.iter_mut() {
+            sep_bsl_agent.reseed(seeder.next_stream());
+        }
+    }
+
     /// Calculate and return current power consumption and generation
     /// This is the amount of power which can't be supplied by the cell itself.
     /// Hence this power is communicated, to be supplied by other cells.
@@ -433,47 +1586,183 @@ impl Cell {
     /// * amb (&mut AmbientParameters): Current Ambient Measurements
     ///
     /// # Returns
-    /// * (f32, f32, f32, f32): Current electrical and thermal
-    ///                         power consumption and generation [W]
+    /// * PyResult<(f32, f32, f32, f32)>: Current electrical and thermal
+    ///                                   power consumption and generation
+    ///                                   [W] or error of a python
+    ///                                   controller (the step is aborted)
     pub fn step(&mut self, slp_data: &[f32; 3], hw_profile: &f32,
                 t_out_n: &f32, amb: &mut AmbientParameters)
-                -> (f32, f32, f32, f32) {
+                -> PyResult<(f32, f32, f32, f32)> {
+        match self.thread_pool.clone() {
+            None => self.step_internal(slp_data, hw_profile, t_out_n, amb,
+                                       false),
+            Some(pool) => {
+                // only the entities are calculated in the thread pool,
+                // the systems of this cell (e.g. with python controllers)
+                // are calculated in the calling thread
+                let balance = pool.install(|| {
+                    self.step_entities(slp_data, hw_profile, t_out_n, amb,
+                                       true)
+                })?;
+                self.step_systems(balance, amb)
+            },
+        }
+    }
+
+    /// Sum up power balances of cell entities
+    ///
+    /// The sum is always build in order of the entities, so the result
+    /// does not depend on the number of threads used for the calculation.
+    ///
+    /// # Arguments
+    /// * results (&[(f32, f32, f32, f32)]): Electrical and thermal
+    ///                                      generation and load of entities
+    ///
+    /// # Returns
+    /// * (f32, f32, f32, f32): Electrical and thermal generation and load
+    fn sum_balances(results: &[(f32, f32, f32, f32)],
+                    mut sum: (f32, f32, f32, f32)) -> (f32, f32, f32, f32)
+    {
+        for (gen_e, load_e, gen_t, load_t) in results.iter() {
+            sum.0 += gen_e;
+            sum.1 += load_e;
+            sum.2 += gen_t;
+            sum.3 += load_t;
+        }
+        sum
+    }
+
+    /// Calculate cell step, see step
+    ///
+    /// # Arguments
+    /// * parallel (bool): If true, sub cells, buildings and separate BSL
+    ///                    agents are calculated in the current thread pool
+    fn step_internal(&mut self, slp_data: &[f32; 3], hw_profile: &f32,
+                     t_out_n: &f32, amb: &mut AmbientParameters,
+                     parallel: bool)
+                     -> PyResult<(f32, f32, f32, f32)> {
+        let balance = self.step_entities(slp_data, hw_profile, t_out_n, amb,
+                                         parallel)?;
+        self.step_systems(balance, amb)
+    }
+
+    /// Calculate sub cells, buildings and separate BSL agents of cell
+    ///
+    /// # Arguments
+    /// * parallel (bool): If true, the entities are calculated in the
+    ///                    current thread pool
+    ///
+    /// # Returns
+    /// * PyResult<(f32, f32, f32, f32)>: Electrical and thermal generation
+    ///                                   and load or error of a python
+    ///                                   controller of a sub cell
+    fn step_entities(&mut self, slp_data: &[f32; 3], hw_profile: &f32,
+                     t_out_n: &f32, amb: &mut AmbientParameters,
+                     parallel: bool)
+                     -> PyResult<(f32, f32, f32, f32)> {
         // init current step
         let mut electrical_load = 0.;
         let mut thermal_load = 0.;
         let mut electrical_generation = 0.;
         let mut thermal_generation = 0.;
 
-        // calculate sub cells
-        self.sub_cells.iter_mut().for_each(|sc: &mut Cell| {
-            let (sub_gen_e, sub_load_e, sub_gen_t, sub_load_t) =
-                sc.step(slp_data, hw_profile,
-                        t_out_n, amb);
-            electrical_generation += sub_gen_e;
-            thermal_generation += sub_gen_t;
-            electrical_load += sub_load_e;
-            thermal_load += sub_load_t;
-        });
+        if parallel {
+            // calculate sub cells
+            // each sub cell gets its own ambient parameters,
+            // since specific solar gains are updated by them
+            let amb_ref: &AmbientParameters = amb;
+            let sub_results: Vec<(f32, f32, f32, f32)> = self.sub_cells
+                .par_iter_mut()
+                .map(|sc: &mut Cell| {
+                    let mut sc_amb = amb_ref.clone();
+                    sc.step_internal(slp_data, hw_profile, t_out_n,
+                                     &mut sc_amb, true)
+                })
+                .collect::<PyResult<_>>()?;
 
-        // calculate buildings
-        self.get_specific_solar_gains(amb);
-        self.buildings.iter_mut().for_each(|b: &mut building::Building| {
-            let (sub_gen_e, sub_load_e, sub_gen_t, sub_load_t) =
-                b.step(slp_data, hw_profile, &amb);
-            electrical_generation += sub_gen_e;
-            thermal_generation += sub_gen_t;
-            electrical_load += sub_load_e;
-            thermal_load += sub_load_t;
-        });
+            // calculate buildings
+            self.get_specific_solar_gains(amb);
+            let amb_ref: &AmbientParameters = amb;
+            let building_results: Vec<(f32, f32, f32, f32)> = self.buildings
+                .par_iter_mut()
+                .map(|b: &mut building::Building| {
+                    b.step(slp_data, hw_profile, amb_ref)
+                })
+                .collect();
+
+            // calculate separate BSL agents
+            let eg = amb.irradiation_glob;
+            let sbsl_results: Vec<(f32, f32, f32, f32)> = self.sep_bsl_agents
+                .par_iter_mut()
+                .map(|sbsl: &mut sep_bsl_agent::SepBSLagent| {
+                    let (sub_gen_e, sub_load_e) = sbsl.step(slp_data, &eg);
+                    (sub_gen_e, sub_load_e, 0., 0.)
+                })
+                .collect();
 
-        // calculate separate BSL agents
-        self.sep_bsl_agents.iter_mut().
-            for_each(|sbsl: &mut sep_bsl_agent::SepBSLagent| {
-                let (sub_gen_e, sub_load_e) =
-                    sbsl.step(slp_data, &amb.irradiation_glob);
+            // reduce in fixed order
+            let mut sum = (0., 0., 0., 0.);
+            sum = Cell::sum_balances(&sub_results, sum);
+            sum = Cell::sum_balances(&building_results, sum);
+            sum = Cell::sum_balances(&sbsl_results, sum);
+            electrical_generation += sum.0;
+            electrical_load += sum.1;
+            thermal_generation += sum.2;
+            thermal_load += sum.3;
+        } else {
+            // calculate sub cells
+            for sc in self.sub_cells.iter_mut() {
+                let (sub_gen_e, sub_load_e, sub_gen_t, sub_load_t) =
+                    sc.step(slp_data, hw_profile,
+                            t_out_n, amb)?;
                 electrical_generation += sub_gen_e;
+                thermal_generation += sub_gen_t;
                 electrical_load += sub_load_e;
-        });
+                thermal_load += sub_load_t;
+            }
+
+            // calculate buildings
+            self.get_specific_solar_gains(amb);
+            self.buildings.iter_mut().for_each(|b: &mut building::Building| {
+                let (sub_gen_e, sub_load_e, sub_gen_t, sub_load_t) =
+                    b.step(slp_data, hw_profile, &amb);
+                electrical_generation += sub_gen_e;
+                thermal_generation += sub_gen_t;
+                electrical_load += sub_load_e;
+                thermal_load += sub_load_t;
+            });
+
+            // calculate separate BSL agents
+            self.sep_bsl_agents.iter_mut().
+                for_each(|sbsl: &mut sep_bsl_agent::SepBSLagent| {
+                    let (sub_gen_e, sub_load_e) =
+                        sbsl.step(slp_data, &amb.irradiation_glob);
+                    electrical_generation += sub_gen_e;
+                    electrical_load += sub_load_e;
+            });
+        }
+
+        Ok((electrical_generation, electrical_load,
+            thermal_generation, thermal_load))
+    }
+
+    /// Calculate generation and thermal systems of cell and save
+    /// the power balance of the current step
+    ///
+    /// # Arguments
+    /// * balance ((f32, f32, f32, f32)): Electrical and thermal generation
+    ///                                   and load of cell entities
+    /// * amb (&AmbientParameters): Current Ambient Measurements
+    ///
+    /// # Returns
+    /// * PyResult<(f32, f32, f32, f32)>: Current electrical and thermal
+    ///                                   power consumption and generation
+    ///                                   [W] or error of python controller
+    fn step_systems(&mut self, balance: (f32, f32, f32, f32),
+                    amb: &AmbientParameters)
+                    -> PyResult<(f32, f32, f32, f32)> {
+        let (mut electrical_generation, mut electrical_load,
+             mut thermal_generation, thermal_load) = balance;
 
         // calculate electrical generation systems
         electrical_generation += self.get_pv_generation(&amb.irradiation_glob);
@@ -495,7 +1784,7 @@ impl Cell {
                     system.step(&((thermal_load -
                                     thermal_generation).max(0.)),
                                 &self.state, amb
-                                );
+                                )?;
                 // unpack tuple, since unpacking without let is buggy
                 ts_e = ts_e_t_f.0;
                 ts_t_gen = ts_e_t_f.1;
@@ -517,7 +1806,7 @@ impl Cell {
         save_e!(self, electrical_generation, electrical_load);
         save_t!(self, thermal_generation, thermal_load);
 
-        return (electrical_generation, electrical_load,
-                thermal_generation, thermal_load);
+        Ok((electrical_generation, electrical_load,
+            thermal_generation, thermal_load))
     }
 }
\ No newline at end of file
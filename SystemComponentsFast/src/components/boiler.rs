@@ -1,11 +1,15 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 use rand::Rng;
 
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistNames, HistOwner, HistView,
+                               HistVisitor, Recorded};
+use crate::misc::random;
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct Boiler {
     #[pyo3(get)]
     pow_t: f32,  // installed power of boiler [W]
@@ -14,12 +18,33 @@ pub struct Boiler {
     #[pyo3(get)]
     efficiency: f32, // total efficiency of boiler 0 .. 1
 
-    #[pyo3(get)]
     gen_t: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
     fuel_used: Option<hist_memory::HistMemory>
 }
 
+impl Stateful for Boiler {
+    const KIND: &'static str = "Boiler";
+}
+
+impl Recorded for Boiler {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("boiler", "gen_t", &mut self.gen_t);
+        visitor("boiler", "fuel_used", &mut self.fuel_used);
+    }
+}
+
+impl HistOwner for Boiler {}
+
+impl Boiler {
+    /// Add names of the history memories visited by visit_histories
+    ///
+    /// # Arguments
+    /// * names (&mut HistNames): Names (component, quantity)
+    pub fn history_names(names: &mut HistNames) {
+        names.extend([("boiler", "gen_t"), ("boiler", "fuel_used")]);
+    }
+}
+
 #[pymethods]
 impl Boiler {
     ///  Create simple thermal boiler
@@ -36,7 +61,7 @@ impl Boiler {
 
         let state = false;
 
-        let mut rng = rand::thread_rng();
+        let mut rng = random::new_stream();
         let efficiency: f32 = rng.gen_range(0.8..=0.9);
 
         let (gen_t, fuel_used) =
@@ -62,6 +87,35 @@ impl Boiler {
             self.efficiency = efficiency;
         }
     }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |boiler| &boiler.gen_t, "boiler", "gen_t")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn fuel_used(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |boiler| &boiler.fuel_used, "boiler", "fuel_used")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 /// Boiler
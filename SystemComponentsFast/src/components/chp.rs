@@ -1,11 +1,15 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 use rand::Rng;
 
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistNames, HistOwner, HistView,
+                               HistVisitor, Recorded};
+use crate::misc::random;
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct CHP {
     #[pyo3(get)]
     pow_e: f32,  // electrical power of chp plant [W]
@@ -16,14 +20,36 @@ pub struct CHP {
 
     state: bool,  // on/off switch for chp plant
 
-    #[pyo3(get)]
-    gen_t: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
-    gen_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
+    pub gen_t: Option<hist_memory::HistMemory>,
+    pub gen_e: Option<hist_memory::HistMemory>,
     fuel_used: Option<hist_memory::HistMemory>
 }
 
+impl Stateful for CHP {
+    const KIND: &'static str = "CHP";
+}
+
+impl Recorded for CHP {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("chp", "gen_t", &mut self.gen_t);
+        visitor("chp", "gen_e", &mut self.gen_e);
+        visitor("chp", "fuel_used", &mut self.fuel_used);
+    }
+}
+
+impl HistOwner for CHP {}
+
+impl CHP {
+    /// Add names of the history memories visited by visit_histories
+    ///
+    /// # Arguments
+    /// * names (&mut HistNames): Names (component, quantity)
+    pub fn history_names(names: &mut HistNames) {
+        names.extend([("chp", "gen_t"), ("chp", "gen_e"),
+                      ("chp", "fuel_used")]);
+    }
+}
+
 #[pymethods]
 impl CHP {
     ///  Create CHP plant
@@ -55,7 +81,7 @@ impl CHP {
                 (None, None, None)
             };
 
-        let mut rng = rand::thread_rng();
+        let mut rng = random::new_stream();
         let efficiency: f32 = rng.gen_range(0.8..=0.9);
 
         CHP {pow_e,
@@ -75,6 +101,41 @@ impl CHP {
             self.efficiency = efficiency;
         }
     }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |chp| &chp.gen_t, "chp", "gen_t")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |chp| &chp.gen_e, "chp", "gen_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn fuel_used(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |chp| &chp.fuel_used, "chp", "fuel_used")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 /// CHP plant
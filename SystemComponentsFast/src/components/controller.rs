@@ -1,8 +1,10 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct Controller {
     #[pyo3(get)]
     pub chp_state: bool,
@@ -10,6 +12,10 @@ pub struct Controller {
     pub heatpump_state: bool,
 }
 
+impl Stateful for Controller {
+    const KIND: &'static str = "Controller";
+}
+
 #[pymethods]
 impl Controller {
 
@@ -26,6 +32,22 @@ impl Controller {
                     };
         controller
     }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 /// Controller
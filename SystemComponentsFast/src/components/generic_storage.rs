@@ -1,11 +1,16 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 use rand::prelude::*;
 
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistNames, HistOwner, HistView,
+                               HistVisitor, Recorded};
+use crate::misc::random;
+use crate::misc::time_step::get_time_step;
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct GenericStorage {
     #[pyo3(get)]
     cap: f32,  // capacity of storage [Wh]
@@ -20,10 +25,31 @@ pub struct GenericStorage {
     // ToDo: cycle decay (only electrical)
     #[pyo3(get)]
     pow_max: f32,  // maximum power flow in or out of storage [W]
-    #[pyo3(get)]
     charge_hist: Option<hist_memory::HistMemory>,
 }
 
+impl Stateful for GenericStorage {
+    const KIND: &'static str = "GenericStorage";
+}
+
+impl Recorded for GenericStorage {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("storage", "charge_hist", &mut self.charge_hist);
+    }
+}
+
+impl HistOwner for GenericStorage {}
+
+impl GenericStorage {
+    /// Add names of the history memories visited by visit_histories
+    ///
+    /// # Arguments
+    /// * names (&mut HistNames): Names (component, quantity)
+    pub fn history_names(names: &mut HistNames) {
+        names.push(("storage", "charge_hist"));
+    }
+}
+
 #[pymethods]
 impl GenericStorage {
     ///  Create storage with specific capacity
@@ -68,7 +94,7 @@ impl GenericStorage {
         let cap = cap;
 
         // random loading state
-        let mut rng = rand::thread_rng();
+        let mut rng = random::new_stream();
         let charge = rng.gen::<f32>() * cap;
 
         // history
@@ -93,17 +119,38 @@ impl GenericStorage {
     }
 
     pub fn initialize_random(&mut self) {
-        let mut rng = rand::thread_rng();
+        let mut rng = random::new_stream();
         self.charge = rng.gen::<f32>() * self.cap;
     }
 
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn charge_hist(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |storage| &storage.charge_hist, "storage", "charge_hist")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 /// thermal storage
 impl GenericStorage {
 
-    const TIME_STEP: f32 = 0.25;  // h
-
     pub fn get_relative_charge(& self) -> f32 {
         return self.charge / self.cap
     }
@@ -135,16 +182,15 @@ impl GenericStorage {
 
         let f_charge_loss = 1. - self.charging_efficiency;
         let mut charge_loss = resulting_charge_power * f_charge_loss;
+        let time_step = get_time_step();
         let charge_old = self.charge;
-        self.charge += (resulting_charge_power - charge_loss) *
-                       GenericStorage::TIME_STEP;
+        self.charge += (resulting_charge_power - charge_loss) * time_step;
 
         if self.charge > self.cap {
-            diff += (self.charge - self.cap) / GenericStorage::TIME_STEP +
+            diff += (self.charge - self.cap) / time_step +
                     charge_loss;  // revert subtraction of losses
             // recalculate losses in relation to actual charge power
-            charge_loss = (self.cap - charge_old) / GenericStorage::TIME_STEP *
-                          f_charge_loss;
+            charge_loss = (self.cap - charge_old) / time_step * f_charge_loss;
             diff -= charge_loss;
             self.charge = self.cap;
         }
@@ -181,15 +227,15 @@ impl GenericStorage {
         // Additionally the losses have to be subtracted
         // that way the storage can fullfill the requested demand
         // discharge power and loss are negative
+        let time_step = get_time_step();
         let charge_old = self.charge;
         self.charge += (resulting_discharge_power + discharge_loss) *
-                       GenericStorage::TIME_STEP;
+                       time_step;
 
         if  self.charge < 0. {
-            diff += self.charge / GenericStorage::TIME_STEP - discharge_loss;
+            diff += self.charge / time_step - discharge_loss;
             // recalculate losses in relation to actual discharge power
-            discharge_loss = -charge_old / GenericStorage::TIME_STEP *
-                             f_discharge_loss;
+            discharge_loss = -charge_old / time_step * f_discharge_loss;
             // losses couldn't be provided by storage -> add to diff
             diff += discharge_loss;
             self.charge = 0.;
@@ -234,7 +280,7 @@ impl GenericStorage {
         let self_loss_end = self.charge * self.self_discharge; // W
         let self_loss = 0.5*self_loss_start + 0.5*self_loss_end;
 
-        self.charge = self.charge - self_loss*GenericStorage::TIME_STEP;
+        self.charge = self.charge - self_loss*get_time_step();
 
         // save data
         self.save_hist();
@@ -1,10 +1,13 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistNames, HistOwner, HistView,
+                               HistVisitor, Recorded};
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct Heatpump {
     #[pyo3(get)]
     pow_t: f32,  // thermalpower of heatpump [W]
@@ -12,12 +15,34 @@ pub struct Heatpump {
     t_supply: f32,  // supply side temperature (heating system) [°C]
     t_min_working: f32,  // minimal source temperature [°C]
     f_min_load: f32,  // Min. operation power factor 0..1
-    #[pyo3(get)]
-    gen_t: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
-    con_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
-    cop_hist: Option<hist_memory::HistMemory>,
+    pub gen_t: Option<hist_memory::HistMemory>,
+    pub con_e: Option<hist_memory::HistMemory>,
+    pub cop_hist: Option<hist_memory::HistMemory>,
+}
+
+impl Stateful for Heatpump {
+    const KIND: &'static str = "Heatpump";
+}
+
+impl Recorded for Heatpump {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("heatpump", "gen_t", &mut self.gen_t);
+        visitor("heatpump", "con_e", &mut self.con_e);
+        visitor("heatpump", "cop_hist", &mut self.cop_hist);
+    }
+}
+
+impl HistOwner for Heatpump {}
+
+impl Heatpump {
+    /// Add names of the history memories visited by visit_histories
+    ///
+    /// # Arguments
+    /// * names (&mut HistNames): Names (component, quantity)
+    pub fn history_names(names: &mut HistNames) {
+        names.extend([("heatpump", "gen_t"), ("heatpump", "con_e"),
+                      ("heatpump", "cop_hist")]);
+    }
 }
 
 fn cop_from_coefficients(pow_t: &f32, t_out: &f32, t_supply: &f32) -> f32 {
@@ -152,6 +177,41 @@ impl Heatpump {
                   gen_t,
                   cop_hist}
     }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |heatpump| &heatpump.gen_t, "heatpump", "gen_t")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn con_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |heatpump| &heatpump.con_e, "heatpump", "con_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn cop_hist(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |heatpump| &heatpump.cop_hist, "heatpump", "cop_hist")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 /// Heatpump
@@ -1,16 +1,41 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 use rand::Rng;
 
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistNames, HistOwner, HistView,
+                               HistVisitor, Recorded};
+use crate::misc::random;
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]  
+#[derive(Clone, Deserialize, Serialize)]
 pub struct PV {
     a: f32,
     pvtype: u8,
-    #[pyo3(get)]
-    gen_e: Option<hist_memory::HistMemory>,
+    pub gen_e: Option<hist_memory::HistMemory>,
+}
+
+impl Stateful for PV {
+    const KIND: &'static str = "PV";
+}
+
+impl Recorded for PV {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("pv", "gen_e", &mut self.gen_e);
+    }
+}
+
+impl HistOwner for PV {}
+
+impl PV {
+    /// Add names of the history memories visited by visit_histories
+    ///
+    /// # Arguments
+    /// * names (&mut HistNames): Names (component, quantity)
+    pub fn history_names(names: &mut HistNames) {
+        names.push(("pv", "gen_e"));
+    }
 }
 
 #[pymethods]
@@ -67,7 +92,7 @@ impl PV {
     ///
 
     pub fn size_building_pv(&mut self, eg: f32, coc: f32, demand: f32) {
-        let mut rng = rand::thread_rng();
+        let mut rng = random::new_stream();
 
         let a = rng.gen_range(0.8..=1.2) * coc * 1e3/eg * demand;
 
@@ -87,6 +112,29 @@ impl PV {
 
         self.pvtype = 2;
     }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |pv| &pv.gen_e, "pv", "gen_e")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 impl PV {
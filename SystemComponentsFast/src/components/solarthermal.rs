@@ -1,18 +1,33 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 use rand::Rng;
 
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistOwner, HistView, HistVisitor,
+                               Recorded};
+use crate::misc::random;
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct Solarthermal {
     a: f32,  // Effective Area of solarthermal plant [m^2]
     efficiency: f32, // simple effiency factor, TODO: curve
-    #[pyo3(get)]
     gen_t: Option<hist_memory::HistMemory>,
 }
 
+impl Stateful for Solarthermal {
+    const KIND: &'static str = "Solarthermal";
+}
+
+impl Recorded for Solarthermal {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("solarthermal", "gen_t", &mut self.gen_t);
+    }
+}
+
+impl HistOwner for Solarthermal {}
+
 #[pymethods]
 impl Solarthermal {
     ///  Create solarthermal plant with specific Area
@@ -31,7 +46,7 @@ impl Solarthermal {
     /// TODO: change from electrical to thermal scaling
     #[new]
     pub fn new(eg: f32, coc: f32, demand: f32, hist: usize) -> Self {
-        let mut rng = rand::thread_rng();
+        let mut rng = random::new_stream();
 
         let a = rng.gen_range(0.8..=1.2) * coc * 1e3/eg * demand;
 
@@ -51,6 +66,29 @@ impl Solarthermal {
                     };
         solarthermal
     }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |solarthermal| &solarthermal.gen_t, "solarthermal", "gen_t")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 /// Solarthermal plant
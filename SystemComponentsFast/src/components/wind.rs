@@ -1,10 +1,13 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistOwner, HistView, HistVisitor,
+                               Recorded};
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct Wind {
     height: f32,  // height of hub
     area: f32,  // effective rotor area
@@ -12,10 +15,21 @@ pub struct Wind {
     min_ws: f32, // minimum wind speed where electricity production starts
     opt_ws: f32, // optimal working point at hub height
     max_ws: f32, // maximum wind speed
-    #[pyo3(get)]
     gen_e: Option<hist_memory::HistMemory>,
 }
 
+impl Stateful for Wind {
+    const KIND: &'static str = "Wind";
+}
+
+impl Recorded for Wind {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("wind", "gen_e", &mut self.gen_e);
+    }
+}
+
+impl HistOwner for Wind {}
+
 #[pymethods]
 impl Wind {
     ///  Create wind plant with specific hub height and blade radius
@@ -48,6 +62,29 @@ impl Wind {
                         };
         wind
     }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |wind| &wind.gen_e, "wind", "gen_e")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 /// wind plant
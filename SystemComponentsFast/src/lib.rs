@@ -1,9 +1,10 @@
 // external
-use std::collections::HashMap;
-use num_integer::Integer;
 use pyo3::prelude::*;
 use pyo3::wrap_pyfunction;
-use numpy::PyReadonlyArrayDyn;
+use pyo3::exceptions::PyValueError;
+use numpy::{PyArray, PyArray2, PyReadonlyArray1, PyReadonlyArrayDyn};
+use std::collections::HashMap;
+use std::mem::size_of;
 
 // local
 // Entities
@@ -17,15 +18,21 @@ mod components;
 mod misc;
 mod thermal_systems;
 
+use misc::boundary_data::{get_column, get_optional_column};
+
 
 #[pymodule]
 fn SystemComponentsFast(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
 
     pyo3_log::init();
 
+    m.add("DAY_PROFILE_STEPS", misc::time_step::DAY_PROFILE_STEPS)?;
+
     m.add_class::<agent::Agent>()?;
     m.add_class::<building::Building>()?;
     m.add_class::<cell::Cell>()?;
+    m.add_class::<cell::BuildingHandle>()?;
+    m.add_class::<cell::BuildingIter>()?;
     m.add_class::<sep_bsl_agent::SepBSLagent>()?;
     m.add_class::<components::boiler::Boiler>()?;
     m.add_class::<components::chp::CHP>()?;
@@ -36,75 +43,326 @@ fn SystemComponentsFast(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
     m.add_class::<thermal_systems::building
                   ::chp_system::BuildingChpSystem>()?;
     m.add_class::<components::generic_storage::GenericStorage>()?;
+    m.add_class::<misc::hist_memory::Recorder>()?;
+    m.add_class::<misc::recording::RecordingRule>()?;
+    m.add_class::<misc::reference_year::ReferenceYear>()?;
     m.add_class::<thermal_systems::cell
                   ::chp_system_thermal::CellChpSystemThermal>()?;
     m.add_class::<thermal_systems::cell::theresa_system::TheresaSystem>()?;
+    m.add_class::<thermal_systems::storage_controller::StorageController>()?;
+    m.add_function(wrap_pyfunction!(set_seed, m)?).unwrap();
+    m.add_function(wrap_pyfunction!(from_state, m)?).unwrap();
+    m.add_function(wrap_pyfunction!(set_time_step, m)?).unwrap();
+    m.add_function(wrap_pyfunction!(get_time_step, m)?).unwrap();
+    m.add_function(wrap_pyfunction!(get_steps_per_day, m)?).unwrap();
+    m.add_function(wrap_pyfunction!(get_memory_sizes, m)?).unwrap();
     m.add_function(wrap_pyfunction!(simulate, m)?).unwrap();
+    m.add_function(wrap_pyfunction!(solar_position, m)?).unwrap();
     m.add_function(wrap_pyfunction!(test_generic_storage, m)?).unwrap();
     Ok(())
 
 
 }
 
+/// Set global seed for the random streams of all entities
+/// created afterwards
+///
+/// Each stochastic entity (agents, components, ...) owns its own
+/// random stream. With a seed, the streams are numbered in order of
+/// creation, so a model generated twice in the same way gets identical
+/// random numbers.
+///
+/// # Arguments
+/// * seed (Option<u64>): Global seed, None to use random streams again
+#[pyfunction]
+fn set_seed(seed: Option<u64>) {
+    misc::random::set_seed(seed);
+}
+
+/// Rebuild model object from binary state (used by pickle)
+///
+/// # Arguments
+/// * kind (&str): Name of class
+/// * state (&[u8]): Binary state of object (see __getstate__)
+///
+/// # Returns
+/// * PyObject: Restored object
+#[pyfunction]
+#[pyo3(name = "_from_state")]
+fn from_state(py: Python, kind: &str, state: &[u8]) -> PyResult<PyObject> {
+    use misc::serialization::from_bytes;
+    use components::*;
+    use thermal_systems::building::{chp_system, heatpump_system};
+    use thermal_systems::cell::{chp_system_thermal, theresa_system};
+
+    Ok(match kind {
+        "Agent" => from_bytes::<agent::Agent>(state)?.into_py(py),
+        "Building" => from_bytes::<building::Building>(state)?.into_py(py),
+        "Cell" => from_bytes::<cell::Cell>(state)?.into_py(py),
+        "SepBSLagent" =>
+            from_bytes::<sep_bsl_agent::SepBSLagent>(state)?.into_py(py),
+        "Boiler" => from_bytes::<boiler::Boiler>(state)?.into_py(py),
+        "CHP" => from_bytes::<chp::CHP>(state)?.into_py(py),
+        "Controller" =>
+            from_bytes::<controller::Controller>(state)?.into_py(py),
+        "GenericStorage" =>
+            from_bytes::<generic_storage::GenericStorage>(state)?.into_py(py),
+        "Heatpump" => from_bytes::<heatpump::Heatpump>(state)?.into_py(py),
+        "PV" => from_bytes::<pv::PV>(state)?.into_py(py),
+        "Solarthermal" =>
+            from_bytes::<solarthermal::Solarthermal>(state)?.into_py(py),
+        "Wind" => from_bytes::<wind::Wind>(state)?.into_py(py),
+        "BuildingChpSystem" =>
+            from_bytes::<chp_system::BuildingChpSystem>(state)?.into_py(py),
+        "BuildingHeatpumpSystem" =>
+            from_bytes::<heatpump_system::BuildingHeatpumpSystem>(state)?
+            .into_py(py),
+        "CellChpSystemThermal" =>
+            from_bytes::<chp_system_thermal::CellChpSystemThermal>(state)?
+            .into_py(py),
+        "TheresaSystem" =>
+            from_bytes::<theresa_system::TheresaSystem>(state)?.into_py(py),
+        "StorageController" =>
+            from_bytes::<thermal_systems::storage_controller
+                         ::StorageController>(state)?.into_py(py),
+        "HistMemory" =>
+            from_bytes::<misc::hist_memory::HistMemory>(state)?.into_py(py),
+        "Recorder" =>
+            from_bytes::<misc::hist_memory::Recorder>(state)?.into_py(py),
+        "RecordingRule" =>
+            from_bytes::<misc::recording::RecordingRule>(state)?.into_py(py),
+        _ => return Err(PyValueError::new_err(
+                          format!("Unknown kind of state: {}", kind))),
+    })
+}
+
+/// Set time step of simulation
+///
+/// The time step is used by all time dependent components of the model.
+/// Since the boundary data (see SimulationData) is generated with the
+/// actual time step by default, the time step should be set before
+/// anything else is prepared.
+///
+/// # Arguments
+/// * time_step (f32): Time step [h], the number of steps per day must be
+///                    a divisor or multiple of 96 (day profile steps)
+///                    (default of simulation: 0.25 h)
+#[pyfunction]
+fn set_time_step(time_step: f32) -> PyResult<()> {
+    check_time_step(time_step)?;
+    misc::time_step::set_time_step(time_step);
+
+    Ok(())
+}
+
+/// Get number of simulation steps per day
+///
+/// # Arguments
+/// * time_step (Option<f32>): Time step [h]
+///                            (default: None -> time step of simulation)
+///
+/// # Returns
+/// * PyResult<usize>: Steps per day or ValueError, if the time step is
+///                    invalid (see set_time_step)
+#[pyfunction(time_step = "None")]
+fn get_steps_per_day(time_step: Option<f32>) -> PyResult<usize> {
+    let time_step = time_step.unwrap_or_else(misc::time_step::get_time_step);
+    check_time_step(time_step)?;
+
+    Ok((24. / time_step).round() as usize)
+}
+
+/// Raise ValueError, if a time step can't be used for the simulation
+fn check_time_step(time_step: f32) -> PyResult<()> {
+    if !misc::time_step::is_valid_time_step(time_step) {
+        return Err(PyValueError::new_err(format!(
+            "Time step of {} h is not supported, the number of steps \
+             per day must be a divisor or multiple of {}", time_step,
+             misc::time_step::DAY_PROFILE_STEPS)));
+    }
+
+    Ok(())
+}
+
+/// Get time step of simulation
+///
+/// # Returns
+/// * f32: Time step [h]
+#[pyfunction]
+fn get_time_step() -> f32 {
+    misc::time_step::get_time_step()
+}
+
+/// Get bytes of model structs, e.g. to estimate the memory of a cell
+/// before it is generated (see Cell.memory_report)
+///
+/// # Returns
+/// * HashMap<&str, usize>: Bytes of "Cell", "ThermalSystem" (inline in
+///                         cell), "Building", "HeatingSystem" (inline in
+///                         building), "GenericStorage", "Agent" and
+///                         "SepBSLagent"
+#[pyfunction]
+fn get_memory_sizes() -> HashMap<&'static str, usize> {
+    let mut sizes = HashMap::new();
+    sizes.insert("Cell", size_of::<cell::Cell>());
+    sizes.insert("ThermalSystem", cell::Cell::thermal_system_size());
+    sizes.insert("Building", size_of::<building::Building>());
+    sizes.insert("HeatingSystem", building::Building::heating_system_size());
+    sizes.insert("GenericStorage",
+                 size_of::<components::generic_storage::GenericStorage>());
+    sizes.insert("Agent", size_of::<agent::Agent>());
+    sizes.insert("SepBSLagent", size_of::<sep_bsl_agent::SepBSLagent>());
+
+    sizes
+}
+
 /// Run Simulation with given models main cell
 ///
+/// The boundary data can be given as any object, which allows column
+/// access by name (dict of numpy arrays / lists, pandas DataFrame,
+/// structured numpy array). Contiguous float32 columns are used
+/// without any copy.
+///
 /// # Arguments
 /// * main_cell (Cell): Main cell of energy system model
 /// * steps (usize): Number of simulation steps to execute
-/// * slp_data (HashMap<&str, Vec<f32>>): Standard load profile data for
+/// * slp_data (&PyAny): Standard load profile data for
 ///     - "PHH": phh agents
 ///     - "BSLa": agriculture business agents
 ///     - "BSLc": common business agents
 /// * hot_water_data (pyArr<f32>): Actual hot water day profile factors [-]
-/// * env_data (HashMap<&str, Vec<f32>>): All Environment/Weather data needed
-///     for the simulation
-/// * sol_data (HashMap<&str, Vec<f32>>): Elevation and azimut of sun
-#[pyfunction]
-fn simulate(main_cell: &mut cell::Cell, steps: usize,
-            slp_data: HashMap<&str, Vec<f32>>,
+/// * env_data (&PyAny): All Environment/Weather data needed
+///     for the simulation, if the daily mean temperature
+///     ("T mean [degC]") is not given, it is calculated once from
+///     "T [degC]" before the simulation starts
+/// * sol_data (&PyAny): Elevation and azimut of sun
+/// * seed (Option<u64>): If given, the random streams used during the
+///                       simulation (e.g. by agents) are reseeded, to get
+///                       reproducible results (default: None)
+///
+/// # Returns
+/// * PyResult<()>: Errors of python controllers are raised, the simulation
+///                 stops at the failed step
+#[pyfunction(seed = "None")]
+fn simulate(py: Python, main_cell: &mut cell::Cell, steps: usize,
+            slp_data: &PyAny,
             hot_water_data: PyReadonlyArrayDyn<f32>,
-            env_data: HashMap<&str, Vec<f32>>,
-            sol_data: HashMap<&str, Vec<f32>>) {
+            env_data: &PyAny,
+            sol_data: &PyAny,
+            seed: Option<u64>) -> PyResult<()> {
+    if let Some(seed) = seed {
+        main_cell.reseed(&mut misc::random::StreamSeeder::new(seed));
+    }
+
     let mut slp: [f32; 3] = [0.; 3];
-    let slp_phh = slp_data.get("PHH").unwrap();
-    let slp_bsla = slp_data.get("BSLa").unwrap();
-    let slp_bslc = slp_data.get("BSLc").unwrap();
+    let slp_phh = get_column(slp_data, "PHH", steps)?;
+    let slp_bsla = get_column(slp_data, "BSLa", steps)?;
+    let slp_bslc = get_column(slp_data, "BSLc", steps)?;
     let hot_water_data = hot_water_data.as_array();
     // Get Environment data and create object
     let mut amb = misc::ambient::AmbientParameters::new(0., 0., 0., 0., 0., 0., 0.);
-    let t = env_data.get("T [degC]").unwrap();
-    let e_global = env_data.get("Eg [W/m^2]").unwrap();
-    let e_diffuse = env_data.get("E diffuse [W/m^2]").unwrap();
-    let e_direct = env_data.get("E direct [W/m^2]").unwrap();
-    let ws = env_data.get("Ws [m/s]").unwrap();
-    let e_elevation = sol_data.get("elevation [degree]").unwrap();
-    let e_azimuth = sol_data.get("azimuth [degree]").unwrap();
+    let t = get_column(env_data, "T [degC]", steps)?;
+    let t_mean_arr = get_optional_column(env_data, "T mean [degC]", steps)?;
+    let t_mean_calc: Vec<f32>;
+    let t_mean_day = match &t_mean_arr {
+        Some(t_mean_day) => t_mean_day.as_slice()?,
+        None => {
+            t_mean_calc = misc::helper::daily_mean(
+                t.as_slice()?, misc::time_step::get_steps_per_day());
+            &t_mean_calc
+        },
+    };
+    let e_global = get_column(env_data, "Eg [W/m^2]", steps)?;
+    let e_diffuse = get_column(env_data, "E diffuse [W/m^2]", steps)?;
+    let e_direct = get_column(env_data, "E direct [W/m^2]", steps)?;
+    let ws = get_column(env_data, "Ws [m/s]", steps)?;
+    let e_elevation = get_column(sol_data, "elevation [degree]", steps)?;
+    let e_azimuth = get_column(sol_data, "azimuth [degree]", steps)?;
+
+    let (slp_phh, slp_bsla, slp_bslc) = (slp_phh.as_slice()?,
+                                         slp_bsla.as_slice()?,
+                                         slp_bslc.as_slice()?);
+    let (t, e_global, e_diffuse, e_direct, ws) = (t.as_slice()?,
+                                                  e_global.as_slice()?,
+                                                  e_diffuse.as_slice()?,
+                                                  e_direct.as_slice()?,
+                                                  ws.as_slice()?);
+    let (e_elevation, e_azimuth) = (e_elevation.as_slice()?,
+                                    e_azimuth.as_slice()?);
 
     // get the constant to a new memory place,
     //since cell can be changed due saving history
     let cell_t_out_n: f32 = main_cell.t_out_n;
 
-    for step in 0..steps {
-        // set data for actual step
-        // SLP
-        slp[0] = slp_phh[step];
-        slp[1] = slp_bsla[step];
-        slp[2] = slp_bslc[step];
-
-        // Environment
-        amb.t_out = t[step];
-        let idx_day = step.div_floor(&96);
-        let slice_day = &t[idx_day*96..idx_day*96+95];
-        
-        amb.t_mean_day = slice_day.iter().sum::<f32>() / slice_day.len() as f32;
-        amb.irradiation_glob = e_global[step];
-        amb.irradiation_diff = e_diffuse[step];
-        amb.irradiation_dir = e_direct[step];
-        amb.solar_elevation = e_elevation[step];
-        amb.solar_azimuth = e_azimuth[step];
-        amb.wind_speed = ws[step];
-        main_cell.step(&slp, &hot_water_data[step], &cell_t_out_n, &mut amb);
+    // the GIL is released during the simulation, so python controllers
+    // of sub cells can acquire it from the threads of a thread pool
+    py.allow_threads(|| -> PyResult<()> {
+        for step in 0..steps {
+            // set data for actual step
+            // SLP
+            slp[0] = slp_phh[step];
+            slp[1] = slp_bsla[step];
+            slp[2] = slp_bslc[step];
+
+            // Environment
+            amb.t_out = t[step];
+            amb.t_mean_day = t_mean_day[step];
+            amb.irradiation_glob = e_global[step];
+            amb.irradiation_diff = e_diffuse[step];
+            amb.irradiation_dir = e_direct[step];
+            amb.solar_elevation = e_elevation[step];
+            amb.solar_azimuth = e_azimuth[step];
+            amb.wind_speed = ws[step];
+            main_cell.step(&slp, &hot_water_data[step], &cell_t_out_n,
+                           &mut amb)?;
+        }
+
+        Ok(())
+    })
+}
+
+/// Calculate position of sun for several locations
+///
+/// The calculation follows the NOAA solar calculator, the deviation to
+/// the NREL SPA algorithm (e.g. pvlib) is below 0.02 degree for elevation
+/// and 0.03 degree for azimuth. Elevation is not corrected for
+/// refraction.
+///
+/// # Arguments
+/// * time (PyReadonlyArray1<f64>): Time in seconds since
+///                                 01.01.1970 00:00 UTC
+/// * latitude (Vec<f64>): Latitude of locations in decimal degrees
+///                        (positive north of equator)
+/// * longitude (Vec<f64>): Longitude of locations in decimal degrees
+///                         (positive east of prime meridian)
+///
+/// # Returns
+/// * (PyArray2<f32>, PyArray2<f32>): Elevation and azimuth (clockwise
+///                                   from north) in degree
+///                                   (locations x time)
+#[pyfunction]
+fn solar_position(py: Python, time: PyReadonlyArray1<f64>,
+                  latitude: Vec<f64>, longitude: Vec<f64>)
+-> PyResult<(PyObject, PyObject)>
+{
+    if latitude.len() != longitude.len() {
+        return Err(PyValueError::new_err(format!(
+            "Got {} latitudes, but {} longitudes",
+            latitude.len(), longitude.len())));
     }
+
+    let time = time.as_slice()?;
+    let n_steps = time.len();
+    let (elevation, azimuth) = py.allow_threads(|| {
+        misc::solar_position::solar_position(time, &latitude, &longitude)
+    });
+
+    let elevation: &PyArray2<f32> = PyArray::from_vec(py, elevation)
+                                      .reshape([latitude.len(), n_steps])?;
+    let azimuth: &PyArray2<f32> = PyArray::from_vec(py, azimuth)
+                                    .reshape([latitude.len(), n_steps])?;
+
+    Ok((elevation.into_py(py), azimuth.into_py(py)))
 }
 
 /// Test charge / discharge of generic storage
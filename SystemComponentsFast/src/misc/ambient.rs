@@ -1,3 +1,4 @@
+#[derive(Clone)]
 pub struct AmbientParameters {
     pub irradiation_dir: f32,
     pub irradiation_diff: f32,
@@ -46,4 +47,15 @@ impl AmbientParameters {
          &self.t_mean_day
          )
     }
+
+    /// Returns the same values as get_values, but as array,
+    /// e.g. to fill an observation buffer
+    pub fn get_values_array(&self) -> [f32; 6]
+    {
+        [self.irradiation_glob,
+         self.solar_elevation, self.solar_azimuth,
+         self.wind_speed,
+         self.t_out,
+         self.t_mean_day]
+    }
 }
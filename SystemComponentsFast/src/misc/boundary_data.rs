@@ -0,0 +1,53 @@
+// external
+use numpy::PyReadonlyArray1;
+use pyo3::prelude::*;
+use pyo3::exceptions::PyValueError;
+
+/// Get column of boundary data as read-only float32 array
+///
+/// Any object supporting column access by name can be used, e.g. a dict
+/// of numpy arrays / lists, a pandas DataFrame or a structured numpy array.
+/// Contiguous float32 arrays are borrowed without copy,
+/// all other columns are converted once.
+///
+/// # Arguments
+/// * data (&PyAny): Boundary data
+/// * key (&str): Name of column
+/// * n_min (usize): Min. number of values needed
+///
+/// # Returns
+/// * PyResult<PyReadonlyArray1<f32>>: Column data
+pub fn get_column<'py>(data: &'py PyAny, key: &str, n_min: usize)
+-> PyResult<PyReadonlyArray1<'py, f32>>
+{
+    let column = data.get_item(key)?;
+    let array: PyReadonlyArray1<f32> = data.py().import("numpy")?
+        .call_method1("ascontiguousarray", (column, "float32"))?
+        .extract()?;
+
+    if array.len() < n_min {
+        return Err(PyValueError::new_err(format!(
+            "Boundary data \"{}\" has {} values, but {} are needed",
+            key, array.len(), n_min)));
+    }
+
+    Ok(array)
+}
+
+/// Get column of boundary data, if it is available
+///
+/// # Arguments
+/// * data (&PyAny): Boundary data
+/// * key (&str): Name of column
+/// * n_min (usize): Min. number of values needed
+///
+/// # Returns
+/// * PyResult<Option<PyReadonlyArray1<f32>>>: Column data, if available
+pub fn get_optional_column<'py>(data: &'py PyAny, key: &str, n_min: usize)
+-> PyResult<Option<PyReadonlyArray1<'py, f32>>>
+{
+    match data.get_item(key) {
+        Err(_) => Ok(None),
+        Ok(_) => get_column(data, key, n_min).map(Some),
+    }
+}
@@ -1,4 +1,6 @@
-#[derive(Clone)]
+use serde::{Deserialize, Serialize};
+
+#[derive(Clone, Deserialize, Serialize)]
 pub struct CellManager {
     generation_e: f32,
     load_e: f32,
@@ -34,6 +36,14 @@ impl CellManager{
         )
     }
 
+    /// Returns all state values as array, e.g. to fill
+    /// an observation buffer
+    pub fn get_state_array(&self) -> [f32; 7]
+    {
+        [self.generation_e, self.load_e, self.generation_t, self.load_t,
+         self.contribution_e, self.contribution_t, self.fuel_used]
+    }
+
     pub fn update(&mut self, generation_e: &f32, load_e: &f32,
                   generation_t: &f32, load_t: &f32,
                   cont_e: &f32, cont_t: &f32, fuel_used: &f32)
@@ -1,5 +1,7 @@
 use rand::Rng;
 
+use crate::misc::random;
+
 // Parameter used by helper functions
 static C_WATER:f32 = 1.162;  // (Wh) / (kg K)
 static RHO_WATER:f32 = 983.2;  // kg / m^3
@@ -27,6 +29,30 @@ pub fn min_index(array: &[f32]) -> usize
     idx
 }
 
+/// Calculate mean value of each day for a time series
+///
+/// The mean value is repeated for every step of the day, so the
+/// result has the same length as the given series. If the last day
+/// is incomplete, only the available values are averaged.
+///
+/// # Arguments
+/// * values (&[f32]): Time series
+/// * steps_per_day (usize): Number of steps of one day
+///
+/// # Returns
+/// Vec<f32>: Daily mean values for each step
+pub fn daily_mean(values: &[f32], steps_per_day: usize) -> Vec<f32>
+{
+    let mut means = Vec::with_capacity(values.len());
+
+    for day in values.chunks(steps_per_day) {
+        let mean = day.iter().sum::<f32>() / day.len() as f32;
+        means.extend(std::iter::repeat(mean).take(day.len()));
+    }
+
+    means
+}
+
 /// Find optimal size for heating system storage
 ///
 /// # Arguments
@@ -40,7 +66,7 @@ pub fn min_index(array: &[f32]) -> usize
 /// - f32: Volume of storage [m^3]
 pub fn find_heating_system_storage(pow_t: &f32, delta_t: &f32) -> (f32, f32)
 {
-    let mut rng = rand::thread_rng();
+    let mut rng = random::new_stream();
 
     let mut diffs: [f32;11] = [0.;11];
     let cap_water: f32 = rng.gen_range(50.0..=100.0)*1e-3; // m^3/kW
@@ -1,32 +1,825 @@
 // external
+use numpy::{PyArray, PyArray2};
 use pyo3::prelude::*;
-use std::collections::VecDeque;
+use pyo3::class::buffer::PyBufferProtocol;
+use pyo3::pyclass::PyClass;
+use pyo3::exceptions::{PyBufferError, PyValueError};
+use pyo3::{ffi, AsPyPointer};
+use serde::{Deserialize, Deserializer, Serialize, Serializer};
+use std::ffi::CStr;
+use std::mem::size_of;
+use std::os::raw::{c_int, c_void};
+use std::ptr;
+use std::sync::Arc;
 
+use crate::misc::serialization::with_history;
+use crate::misc::serialization::{self, Stateful};
+use crate::misc::time_step::{get_steps_per_day, get_time_step};
+
+/// Aggregation of the values of one recording period
+#[derive(Clone, Copy, Deserialize, PartialEq, Serialize)]
+pub enum Aggregation {
+    Raw,  // each value is saved
+    Mean,  // mean value of period
+    Energy,  // sum of period times time step (e.g. W -> Wh)
+    Min,  // minimum of period
+    Max,  // maximum of period
+    Envelope,  // minimum and maximum of period (two values)
+}
+
+impl Aggregation {
+    const NAMES: [(&'static str, Aggregation); 6] =
+        [("raw", Aggregation::Raw), ("mean", Aggregation::Mean),
+         ("energy", Aggregation::Energy), ("min", Aggregation::Min),
+         ("max", Aggregation::Max), ("envelope", Aggregation::Envelope)];
+
+    fn from_name(name: &str) -> PyResult<Self> {
+        match Aggregation::NAMES.iter().find(|(n, _)| *n == name) {
+            Some((_, aggregation)) => Ok(*aggregation),
+            None => Err(PyValueError::new_err(
+                          format!("Unknown recording mode {}, supported \
+                                   modes are {:?}", name,
+                                  Aggregation::NAMES.iter()
+                                                    .map(|(n, _)| *n)
+                                                    .collect::<Vec<_>>()))),
+        }
+    }
+
+    fn name(&self) -> &'static str {
+        Aggregation::NAMES.iter()
+                          .find(|(_, aggregation)| aggregation == self)
+                          .unwrap().0
+    }
+}
+
+/// Recording periods in simulation steps
+#[derive(Clone, Deserialize, Serialize)]
+enum Periods {
+    Interval(usize),  // fixed number of steps
+    Lengths(Vec<usize>),  // number of steps of consecutive periods
+}
+
+/// Recording mode of history memories
+///
+/// The values are aggregated online over each recording period, so the
+/// memory scales with the number of periods instead of the number of
+/// simulation steps. The result of a period is saved as soon as the
+/// period is completed. Values of a trailing period, which isn't
+/// completed at the end of the simulation, are not saved (e.g. a
+/// simulation of 36 h with daily periods saves one value).
+#[pyclass]
+#[derive(Clone, Deserialize, Serialize)]
+pub struct Recorder {
+    aggregation: Aggregation,
+    periods: Periods,
+    // state of current period
+    period_idx: usize,
+    n_values: usize,
+    sum: f64,
+    low: f32,
+    high: f32,
+}
+
+impl Stateful for Recorder {
+    const KIND: &'static str = "Recorder";
+}
+
+#[pymethods]
+impl Recorder {
+    /// Create recording mode
+    ///
+    /// # Arguments
+    /// * mode (&str): Aggregation of each period
+    ///     - "raw": each value is saved (default of history memories)
+    ///     - "mean": mean value
+    ///     - "energy": sum times time step, e.g. energy [Wh] of power [W]
+    ///     - "min", "max": minimum / maximum value
+    ///     - "envelope": minimum and maximum value, both are saved one
+    ///                   after the other (reshape memory to (-1, 2))
+    /// * interval (usize): Number of simulation steps of each period
+    ///                     (default: 1)
+    /// * periods (Option<Vec<usize>>): Number of simulation steps of
+    ///                                 consecutive periods, e.g. of each
+    ///                                 month (replaces interval,
+    ///                                 values after the last period are
+    ///                                 not saved)
+    #[new]
+    #[args(interval = "1", periods = "None")]
+    fn py_new(mode: &str, interval: usize, periods: Option<Vec<usize>>)
+    -> PyResult<Self>
+    {
+        let periods = match periods {
+            None => Periods::Interval(interval),
+            Some(lengths) => Periods::Lengths(lengths),
+        };
+        let valid = match &periods {
+            Periods::Interval(interval) => *interval > 0,
+            Periods::Lengths(lengths) => lengths.iter().all(|l| *l > 0),
+        };
+        if !valid {
+            return Err(PyValueError::new_err(
+                        "Recording periods must have at least one step"));
+        }
+
+        Ok(Recorder::new(Aggregation::from_name(mode)?, periods))
+    }
+
+    /// Create recording mode with daily periods
+    /// (e.g. daily totals with mode "energy")
+    ///
+    /// # Arguments
+    /// * mode (&str): Aggregation of each day (see Recorder)
+    ///
+    /// # Returns
+    /// * Recorder: Recording mode
+    #[staticmethod]
+    fn daily(mode: &str) -> PyResult<Self> {
+        Ok(Recorder::new(Aggregation::from_name(mode)?,
+                         Periods::Interval(get_steps_per_day())))
+    }
+
+    #[getter]
+    fn mode(&self) -> &str {
+        self.aggregation.name()
+    }
+
+    /// Number of steps of each period (None if periods are given)
+    #[getter]
+    fn interval(&self) -> Option<usize> {
+        match &self.periods {
+            Periods::Interval(interval) => Some(*interval),
+            Periods::Lengths(_) => None,
+        }
+    }
+
+    /// Number of steps of consecutive periods (None if interval is given)
+    #[getter]
+    fn periods(&self) -> Option<Vec<usize>> {
+        match &self.periods {
+            Periods::Interval(_) => None,
+            Periods::Lengths(lengths) => Some(lengths.clone()),
+        }
+    }
+
+    /// Get number of values saved by this recording mode
+    /// (only completed periods are saved)
+    ///
+    /// # Arguments
+    /// * steps (usize): Number of simulation steps
+    ///
+    /// # Returns
+    /// * usize: Size of history memory
+    fn get_size(&self, steps: usize) -> usize {
+        self.n_saved(steps)
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
+}
+
+impl Recorder {
+    fn new(aggregation: Aggregation, periods: Periods) -> Self {
+        Recorder {aggregation: aggregation,
+                  periods: periods,
+                  period_idx: 0,
+                  n_values: 0,
+                  sum: 0.,
+                  low: 0.,
+                  high: 0.,
+                  }
+    }
+
+    /// Recording mode, where each value is saved
+    pub fn raw() -> Self {
+        Recorder::new(Aggregation::Raw, Periods::Interval(1))
+    }
+
+    /// Start again with first period
+    fn restart(&mut self) {
+        self.period_idx = 0;
+        self.n_values = 0;
+    }
+
+    /// Get number of values saved for a given number of steps
+    /// (a trailing period, which isn't completed, is not saved)
+    ///
+    /// # Arguments
+    /// * n_steps (usize): Number of simulation steps
+    ///
+    /// # Returns
+    /// * usize: Number of saved values
+    fn n_saved(&self, n_steps: usize) -> usize {
+        let n_periods = match &self.periods {
+            Periods::Interval(interval) => n_steps / interval,
+            Periods::Lengths(lengths) => {
+                let mut end = 0;
+                lengths.iter()
+                       .take_while(|length| {
+                           end += *length;
+                           end <= n_steps
+                       })
+                       .count()
+            },
+        };
+
+        if self.aggregation == Aggregation::Envelope {
+            2 * n_periods
+        } else {
+            n_periods
+        }
+    }
+
+    /// Add value to current period
+    ///
+    /// # Arguments
+    /// * value (f32): Value of simulation step
+    ///
+    /// # Returns
+    /// * Option<(f32, Option<f32>)>: Result of period, if it is completed
+    ///                               (second value only for envelope)
+    #[inline]
+    fn add(&mut self, value: f32) -> Option<(f32, Option<f32>)> {
+        let length = match &self.periods {
+            Periods::Interval(interval) => *interval,
+            Periods::Lengths(lengths) => *lengths.get(self.period_idx)?,
+        };
+
+        if self.n_values == 0 {
+            self.sum = 0.;
+            self.low = value;
+            self.high = value;
+        } else {
+            self.low = self.low.min(value);
+            self.high = self.high.max(value);
+        }
+        self.sum += value as f64;
+        self.n_values += 1;
+
+        if self.n_values < length {
+            return None;
+        }
+        self.n_values = 0;
+        self.period_idx += 1;
+
+        match self.aggregation {
+            Aggregation::Raw => Some((value, None)),
+            Aggregation::Mean => Some(((self.sum / length as f64) as f32,
+                                       None)),
+            Aggregation::Energy => Some(((self.sum *
+                                          get_time_step() as f64) as f32,
+                                         None)),
+            Aggregation::Min => Some((self.low, None)),
+            Aggregation::Max => Some((self.high, None)),
+            Aggregation::Envelope => Some((self.low, Some(self.high))),
+        }
+    }
+}
+
+/// Function called for each history memory of an entity
+/// with name of component, name of quantity and the memory
+pub type HistVisitor<'a> = dyn FnMut(&str, &str, &mut Option<HistMemory>)
+                           + 'a;
+
+/// Function called for each history memory of a quantity in a cell
+/// with entity type, position of entity and the memory
+pub type RowVisitor<'a> = dyn FnMut(u32, usize, &Option<HistMemory>) + 'a;
+
+/// Names (component, quantity) of history memories, as they are
+/// visited by Recorded::visit_histories
+pub type HistNames = Vec<(&'static str, &'static str)>;
+
+/// Call visitor for all history memories of an entity with another
+/// component name, e.g. to distinguish two storages of one system
+///
+/// # Arguments
+/// * entity (&mut T): Entity with history memories
+/// * component (&str): Component name used for all memories
+/// * visitor (&mut HistVisitor): Function called for each memory
+pub fn visit_renamed<T: Recorded>(entity: &mut T, component: &str,
+                                  visitor: &mut HistVisitor)
+{
+    entity.visit_histories(&mut |_: &str, quantity: &str,
+                                 hist: &mut Option<HistMemory>| {
+        visitor(component, quantity, hist);
+    });
+}
+
+/// Entity with history memories
+pub trait Recorded {
+    /// Call visitor for all history memories of entity
+    /// and its components
+    ///
+    /// # Arguments
+    /// * visitor (&mut HistVisitor): Function called for each memory
+    fn visit_histories(&mut self, visitor: &mut HistVisitor);
+}
+
+/// Check that no history memory of an entity is exported,
+/// before the entity is replaced (e.g. by __setstate__)
+///
+/// # Arguments
+/// * entity (&mut T): Entity with history memories
+///
+/// # Returns
+/// * PyResult<()>: BufferError, if a python view of a memory exists
+pub fn check_exports<T: Recorded>(entity: &mut T) -> PyResult<()> {
+    let mut result = Ok(());
+    entity.visit_histories(&mut |_, _, memory| {
+        if let Some(memory) = memory {
+            if result.is_ok() {
+                result = memory.check_exports();
+            }
+        }
+    });
+
+    result
+}
+
+/// Entity of an owner, which contains a history memory
+#[derive(Clone, Copy)]
+pub enum HistEntity {
+    Own,  // owner itself, including its components
+    Building(usize),  // building of a cell
+}
+
+/// Python object with history memories, which can be viewed
+/// without copy (see HistView)
+pub trait HistOwner: PyClass + Recorded {
+    /// Call visitor for history memories of an entity of owner
+    ///
+    /// # Arguments
+    /// * entity (&HistEntity): Selected entity
+    /// * visitor (&mut HistVisitor): Function called for each memory
+    fn visit_entity_histories(&mut self, entity: &HistEntity,
+                              visitor: &mut HistVisitor)
+    {
+        if let HistEntity::Own = entity {
+            self.visit_histories(visitor);
+        }
+    }
+}
+
+// Function to find a history memory in the owner of a view
+type Resolver = fn(&PyAny, &HistEntity, &str, &str,
+                   &mut dyn FnMut(&mut HistMemory)) -> PyResult<()>;
+
+/// Call function with a history memory of an owner
+///
+/// # Arguments
+/// * owner (&PyAny): Owner of memory (python object of type T)
+/// * entity (&HistEntity): Entity of owner
+/// * component (&str): Name of component the memory belongs to
+/// * quantity (&str): Name of quantity
+/// * f (&mut dyn FnMut(&mut HistMemory)): Function called, if the
+///                                        memory exists
+fn resolve<T: HistOwner>(owner: &PyAny, entity: &HistEntity,
+                         component: &str, quantity: &str,
+                         f: &mut dyn FnMut(&mut HistMemory))
+-> PyResult<()>
+{
+    let owner: &PyCell<T> = owner.downcast()?;
+    let mut owner = owner.try_borrow_mut()?;
+    let mut found = false;
+    owner.visit_entity_histories(entity, &mut |hist_component, hist_quantity,
+                                               memory| {
+        if found || hist_component != component ||
+           hist_quantity != quantity {
+            return;
+        }
+        if let Some(memory) = memory {
+            f(memory);
+            found = true;
+        }
+    });
+
+    Ok(())
+}
+
+/// View of a history memory, which is bound to its owner
+/// (e.g. cell or building)
+///
+/// The values are read directly from the memory of the owner,
+/// hence nothing is copied, e.g.:
+///     np.asarray(cell.gen_e)
+/// The view keeps its owner alive.
+#[pyclass]
+pub struct HistView {
+    owner: PyObject,
+    entity: HistEntity,
+    component: &'static str,
+    quantity: &'static str,
+    resolve: Resolver,
+}
+
+#[pymethods]
+impl HistView {
+    pub fn get_memory(&self, py: Python) -> PyResult<Vec<f32>> {
+        self.with_memory(py, |memory| memory.get_memory())
+    }
+
+    /// Recording mode of memory
+    #[getter]
+    fn recorder(&self, py: Python) -> PyResult<Recorder> {
+        self.with_memory(py, |memory| memory.recorder())
+    }
+
+    /// Get copy of memory, which isn't bound to the owner
+    ///
+    /// # Returns
+    /// * HistMemory: Copy of memory
+    fn copy(&self, py: Python) -> PyResult<HistMemory> {
+        self.with_memory(py, |memory| memory.clone())
+    }
+
+    /// Get function and arguments to rebuild a copy of memory
+    /// (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, &self.copy(py)?)
+    }
+}
+
+/// Export memory of owner as read-only float32 buffer
+/// (see HistMemory)
+#[pyproto]
+impl PyBufferProtocol for HistView {
+    fn bf_getbuffer(slf: PyRefMut<Self>, view: *mut ffi::Py_buffer,
+                    flags: c_int) -> PyResult<()>
+    {
+        let py = slf.py();
+        let obj = slf.as_ptr();
+        slf.with_memory(py, |memory| unsafe {
+            memory.export(view, obj, flags)
+        })?
+    }
+
+    fn bf_releasebuffer(_slf: PyRefMut<Self>, view: *mut ffi::Py_buffer) {
+        unsafe { HistMemory::release(view) }
+    }
+}
+
+impl HistView {
+    /// Create view of a history memory of owner
+    ///
+    /// # Arguments
+    /// * py (Python): Python token
+    /// * owner (Py<T>): Owner of memory
+    /// * entity (HistEntity): Entity of owner
+    /// * component (&str): Name of component the memory belongs to
+    /// * quantity (&str): Name of quantity
+    pub fn new<T: HistOwner>(py: Python, owner: Py<T>, entity: HistEntity,
+                             component: &'static str,
+                             quantity: &'static str) -> Self
+    {
+        HistView {owner: owner.into_py(py),
+                  entity: entity,
+                  component: component,
+                  quantity: quantity,
+                  resolve: resolve::<T>,
+                  }
+    }
+
+    /// Create view of a history memory of an object itself
+    /// (used by the history getters)
+    ///
+    /// # Arguments
+    /// * slf (PyRef<T>): Owner of memory
+    /// * memory (fn(&T) -> &Option<HistMemory>): Field of memory
+    /// * component (&str): Name of component the memory belongs to
+    ///                     (see Recorded)
+    /// * quantity (&str): Name of quantity
+    ///
+    /// # Returns
+    /// * Option<HistView>: View or None, if there is no memory
+    pub fn of<T: HistOwner>(slf: PyRef<T>,
+                            memory: fn(&T) -> &Option<HistMemory>,
+                            component: &'static str, quantity: &'static str)
+    -> Option<Self>
+    {
+        memory(&slf).as_ref()?;
+        let py = slf.py();
+
+        Some(HistView::new::<T>(py, slf.into(), HistEntity::Own, component,
+                                    quantity))
+    }
+
+    /// Call function with the viewed memory
+    ///
+    /// # Arguments
+    /// * py (Python): Python token
+    /// * f (FnOnce(&mut HistMemory) -> R): Function to call
+    ///
+    /// # Returns
+    /// * PyResult<R>: Result of function (ValueError, if the memory
+    ///                was removed from owner)
+    fn with_memory<R, F>(&self, py: Python, f: F) -> PyResult<R>
+    where F: FnOnce(&mut HistMemory) -> R
+    {
+        let mut f = Some(f);
+        let mut result = None;
+        (self.resolve)(self.owner.as_ref(py), &self.entity, self.component,
+                       self.quantity,
+                       &mut |memory| {
+                           if let Some(f) = f.take() {
+                               result = Some(f(memory));
+                           }
+                       })?;
+
+        result.ok_or_else(|| PyValueError::new_err(
+                               format!("History memory {} {} doesn't \
+                                        exist anymore", self.component,
+                                       self.quantity)))
+    }
+}
+
+/// History memory as contiguous ring buffer
+///
+/// Values are saved into a pre-allocated vector. As soon as the memory
+/// size is reached, the oldest value is overwritten and the start position
+/// moves on. Before the memory is handed out (e.g. to numpy via the buffer
+/// protocol) the ring is unwrapped in place, so the saved values are
+/// always available in chronological order without any copy.
+///
+/// With a recorder the values are aggregated before they are saved
+/// (see Recorder), without recorder each value is saved.
+///
+/// While the memory is exported (e.g. as numpy array) it can't be
+/// reallocated or removed, otherwise the views would point to freed memory.
 #[pyclass]
-#[derive(Clone)]
 pub struct HistMemory {
-    pub memory: VecDeque<f32>,
+    pub memory: Vec<f32>,
     pub size: usize,
+    start: usize,  // position of oldest value, if ring is wrapped
+    steps: usize,  // size of memory in simulation steps
+    recorder: Option<Recorder>,
+    // shared with each exported buffer, hence the strong count
+    // is above one as long as python views exist
+    exports: Arc<()>,
+}
+
+/// Copy of memory with the same capacity, which isn't exported
+impl Clone for HistMemory {
+    fn clone(&self) -> Self {
+        let mut memory = Vec::with_capacity(self.size);
+        memory.extend_from_slice(&self.memory);
+
+        HistMemory {memory: memory,
+                    size: self.size,
+                    start: self.start,
+                    steps: self.steps,
+                    recorder: self.recorder.clone(),
+                    exports: Arc::new(()),
+                    }
+    }
+}
+
+// Data of an exported buffer, which is kept alive until the buffer
+// is released. If the ring of an already exported memory is wrapped,
+// the buffer is a chronological copy, since rotating the memory would
+// reorder the existing views.
+struct Export {
+    shape: isize,
+    _guard: Arc<()>,
+    _copy: Option<Vec<f32>>,
+}
+
+impl Stateful for HistMemory {
+    const KIND: &'static str = "HistMemory";
 }
 
 #[pymethods]
 impl HistMemory {
     pub fn get_memory(&self) -> Vec<f32>{
-        Vec::from(self.memory.clone())
+        let mut memory = Vec::with_capacity(self.memory.len());
+        self.extend_into(&mut memory);
+        memory
+    }
+
+    /// Recording mode of memory
+    #[getter]
+    fn recorder(&self) -> Recorder {
+        match &self.recorder {
+            None => Recorder::raw(),
+            Some(recorder) => recorder.clone(),
+        }
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        self.check_exports()?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
+}
+
+/// Export memory as read-only float32 buffer
+///
+/// This allows zero-copy access from python, e.g.:
+///     np.asarray(building.gen_e)
+#[pyproto]
+impl PyBufferProtocol for HistMemory {
+    fn bf_getbuffer(mut slf: PyRefMut<Self>, view: *mut ffi::Py_buffer,
+                    flags: c_int) -> PyResult<()>
+    {
+        let obj = slf.as_ptr();
+        unsafe { slf.export(view, obj, flags) }
+    }
+
+    fn bf_releasebuffer(_slf: PyRefMut<Self>, view: *mut ffi::Py_buffer) {
+        unsafe { HistMemory::release(view) }
     }
 }
 
 impl HistMemory {
     /// Create manager for history memory
     pub fn new(size: usize) -> Self {
-        HistMemory {memory: VecDeque::with_capacity(size),
-                    size: size
+        HistMemory {memory: Vec::with_capacity(size),
+                    size: size,
+                    start: 0,
+                    steps: size,
+                    recorder: None,
+                    exports: Arc::new(()),
                     }
     }
 
+    /// Check that the memory isn't exported, before it is reallocated
+    /// or removed
+    ///
+    /// # Returns
+    /// * PyResult<()>: BufferError, if python views of memory exist
+    pub fn check_exports(&self) -> PyResult<()> {
+        if Arc::strong_count(&self.exports) > 1 {
+            return Err(PyBufferError::new_err(
+                        "History memory can't be changed while it is \
+                         exported (e.g. as numpy array)"));
+        }
+
+        Ok(())
+    }
+
+    /// Fill buffer view with saved values (see bf_getbuffer)
+    ///
+    /// The ring is unwrapped before, so the values are in
+    /// chronological order. If this isn't possible, since other views
+    /// of the memory exist, the view gets a copy of the values.
+    /// The memory is guarded until the view is released (see release).
+    ///
+    /// # Arguments
+    /// * view (*mut ffi::Py_buffer): View to fill
+    /// * obj (*mut ffi::PyObject): Exporting object, which is kept alive
+    ///                             by the view
+    /// * flags (c_int): Requested buffer type
+    unsafe fn export(&mut self, view: *mut ffi::Py_buffer,
+                     obj: *mut ffi::PyObject, flags: c_int) -> PyResult<()>
+    {
+        if view.is_null() {
+            return Err(PyBufferError::new_err("View is null"));
+        }
+        if (flags & ffi::PyBUF_WRITABLE) == ffi::PyBUF_WRITABLE {
+            return Err(PyBufferError::new_err("History memory is read-only"));
+        }
+
+        let copy = if self.unwrap_ring() {
+            None
+        } else {
+            Some(self.get_memory())
+        };
+        let values = copy.as_ref().unwrap_or(&self.memory);
+
+        (*view).obj = obj;
+        ffi::Py_INCREF((*view).obj);
+
+        (*view).buf = values.as_ptr() as *mut c_void;
+        (*view).len = (values.len() * size_of::<f32>()) as isize;
+        (*view).readonly = 1;
+        (*view).itemsize = size_of::<f32>() as isize;
+
+        (*view).format = ptr::null_mut();
+        if (flags & ffi::PyBUF_FORMAT) == ffi::PyBUF_FORMAT {
+            let fmt = CStr::from_bytes_with_nul(b"f\0").unwrap();
+            (*view).format = fmt.as_ptr() as *mut _;
+        }
+
+        (*view).ndim = 1;
+        // shape must be given in items (not bytes),
+        // it's kept alive with the guard until buffer is released
+        // the copy is moved into the export, which doesn't move its values
+        let export = Box::into_raw(Box::new(Export {
+                         shape: values.len() as isize,
+                         _guard: self.exports.clone(),
+                         _copy: copy,
+                     }));
+        (*view).internal = export as *mut c_void;
+        (*view).shape = ptr::null_mut();
+        if (flags & ffi::PyBUF_ND) == ffi::PyBUF_ND {
+            (*view).shape = &mut (*export).shape;
+        }
+        (*view).strides = ptr::null_mut();
+        if (flags & ffi::PyBUF_STRIDES) == ffi::PyBUF_STRIDES {
+            (*view).strides = &((*view).itemsize) as *const _ as *mut _;
+        }
+        (*view).suboffsets = ptr::null_mut();
+
+        Ok(())
+    }
+
+    /// Release buffer view and its guard of memory (see export)
+    ///
+    /// # Arguments
+    /// * view (*mut ffi::Py_buffer): Released view
+    unsafe fn release(view: *mut ffi::Py_buffer) {
+        if !(*view).internal.is_null() {
+            drop(Box::from_raw((*view).internal as *mut Export));
+            (*view).internal = ptr::null_mut();
+        }
+    }
+
+    /// Get bytes of saved values and recording periods
+    pub fn heap_bytes(&self) -> usize {
+        let periods = match &self.recorder {
+            Some(Recorder {periods: Periods::Lengths(lengths), ..}) =>
+                lengths.capacity() * size_of::<usize>(),
+            _ => 0,
+        };
+
+        self.memory.capacity() * size_of::<f32>() + periods
+    }
+
+    /// Create history memory with recording mode
+    ///
+    /// # Arguments
+    /// * steps (usize): Size of memory in simulation steps
+    /// * recorder (&Recorder): Recording mode (see set_recorder)
+    pub fn with_recorder(steps: usize, recorder: &Recorder) -> Self {
+        let mut hist = HistMemory::new(0);
+        hist.steps = steps;
+        hist.apply_recorder(recorder);
+
+        hist
+    }
+
     /// Remove all elements from memory
     pub fn clear(&mut self) {
         self.memory.clear();
+        self.start = 0;
+        if let Some(recorder) = &mut self.recorder {
+            recorder.restart();
+        }
+    }
+
+    /// Change recording mode of memory
+    ///
+    /// The memory is resized to the number of values saved by the
+    /// recorder within the size of the memory in simulation steps.
+    /// Already saved values are removed.
+    ///
+    /// # Arguments
+    /// * recorder (&Recorder): New recording mode
+    ///
+    /// # Returns
+    /// * PyResult<()>: BufferError, if memory is exported
+    pub fn set_recorder(&mut self, recorder: &Recorder) -> PyResult<()> {
+        self.check_exports()?;
+        self.apply_recorder(recorder);
+
+        Ok(())
+    }
+
+    fn apply_recorder(&mut self, recorder: &Recorder) {
+        let size = recorder.n_saved(self.steps);
+        if recorder.aggregation == Aggregation::Raw {
+            self.recorder = None;
+        } else {
+            let mut recorder = recorder.clone();
+            recorder.restart();
+            self.recorder = Some(recorder);
+        }
+
+        self.memory = Vec::with_capacity(size);
+        self.size = size;
+        self.start = 0;
     }
 
     /// Change size of memory and keep saved values
@@ -34,35 +827,271 @@ impl HistMemory {
     ///
     /// # Arguments
     /// * size (usize): New memory size
-    pub fn resize(&mut self, size: usize) {
-        let old_len = self.size;
-        self.size = size;
-        let old_memory = self.memory.clone();
-        self.memory = VecDeque::with_capacity(size);
-
-        let len;
-        if old_len < size {
-            len = old_len;
+    ///
+    /// # Returns
+    /// * PyResult<()>: BufferError, if memory is exported
+    pub fn resize(&mut self, size: usize) -> PyResult<()> {
+        self.check_exports()?;
+        self.unwrap_ring();
+        self.memory.truncate(size);
+        if size > self.size {
+            self.memory.reserve_exact(size - self.memory.len());
         } else {
-            len = size;
+            self.memory.shrink_to_fit();
         }
-
-        for idx in 0..len {
-            self.memory.push_back(old_memory[idx]);
+        self.size = size;
+        if self.recorder.is_none() {
+            self.steps = size;
         }
+
+        Ok(())
     }
 
+    #[inline]
     pub fn save(&mut self, value: f32) {
+        let result = match &mut self.recorder {
+            None => Some((value, None)),
+            Some(recorder) => recorder.add(value),
+        };
+
+        if let Some((value, second)) = result {
+            self.push(value);
+            if let Some(second) = second {
+                self.push(second);
+            }
+        }
+    }
+
+    fn push(&mut self, value: f32) {
         if self.memory.len() < self.size {
-            self.memory.push_back(value);
+            self.memory.push(value);
+        } else if self.size > 0 {
+            // overwrite oldest value, that capacity is not exceeded
+            self.memory[self.start] = value;
+            self.start += 1;
+            if self.start == self.size {
+                self.start = 0;
+            }
+        }
+    }
+
+    /// Append saved values in chronological order to given vector
+    ///
+    /// # Arguments
+    /// * dst (&mut Vec<f32>): Vector where values are appended
+    pub fn extend_into(&self, dst: &mut Vec<f32>) {
+        dst.extend_from_slice(&self.memory[self.start..]);
+        dst.extend_from_slice(&self.memory[..self.start]);
+    }
+
+    /// Add saved values in chronological order to given slice
+    ///
+    /// # Arguments
+    /// * dst (&mut [f32]): Slice with the same length as the memory
+    pub fn add_into(&self, dst: &mut [f32]) {
+        let (older, newer) = dst.split_at_mut(self.memory.len() - self.start);
+        for (sum, value) in older.iter_mut()
+                                 .zip(self.memory[self.start..].iter()) {
+            *sum += value;
+        }
+        for (sum, value) in newer.iter_mut()
+                                 .zip(self.memory[..self.start].iter()) {
+            *sum += value;
+        }
+    }
+
+    /// Rotate ring in place, so the oldest value is at first position
+    ///
+    /// This is only necessary if more values were saved than the
+    /// memory size and is done without additional allocation.
+    /// The ring isn't rotated while the memory is exported, since
+    /// the values of existing python views would change their order.
+    ///
+    /// # Returns
+    /// * bool: Values are in chronological order
+    fn unwrap_ring(&mut self) -> bool {
+        if self.start > 0 {
+            if Arc::strong_count(&self.exports) > 1 {
+                return false;
+            }
+            self.memory.rotate_left(self.start);
+            self.start = 0;
+        }
+
+        true
+    }
+}
+
+/// The saved values are serialized in chronological order,
+/// if histories are excluded only the memory size and recording mode
+/// are kept
+impl Serialize for HistMemory {
+    fn serialize<S: Serializer>(&self, serializer: S)
+    -> Result<S::Ok, S::Error>
+    {
+        let empty: &[f32] = &[];
+        if with_history() {
+            (self.size, self.steps, &self.recorder,
+             &self.memory[self.start..],
+             &self.memory[..self.start]).serialize(serializer)
         } else {
-            // remove first, that capacity is not exceeded
-            self.memory.pop_front();
-            self.memory.push_back(value);
+            let recorder = self.recorder.clone().map(|mut recorder| {
+                recorder.restart();
+                recorder
+            });
+            (self.size, self.steps, &recorder, empty, empty)
+                .serialize(serializer)
         }
     }
 }
 
+impl<'de> Deserialize<'de> for HistMemory {
+    fn deserialize<D: Deserializer<'de>>(deserializer: D)
+    -> Result<Self, D::Error>
+    {
+        let (size, steps, recorder, older, newer):
+            (usize, usize, Option<Recorder>, Vec<f32>, Vec<f32>) =
+            Deserialize::deserialize(deserializer)?;
+        let mut hist = HistMemory::new(size);
+        hist.steps = steps;
+        hist.recorder = recorder;
+        hist.memory.extend(older);
+        hist.memory.extend(newer);
+        hist.memory.truncate(size);
+
+        Ok(hist)
+    }
+}
+
+/// Collector to combine the histories of several components
+/// into one matrix (components x steps)
+///
+/// For each row the entity type and its position in the
+/// corresponding vector of the cell are kept as index.
+pub struct HistMatrix {
+    data: Vec<f32>,
+    index: Vec<u32>,  // (entity type, position) per row
+    n_rows: usize,
+    n_steps: Option<usize>,
+}
+
+impl HistMatrix {
+    pub fn new() -> Self {
+        HistMatrix {data: Vec::new(),
+                    index: Vec::new(),
+                    n_rows: 0,
+                    n_steps: None,
+                    }
+    }
+
+    /// Add history of a component as new row
+    ///
+    /// Components without history are ignored.
+    ///
+    /// # Arguments
+    /// * entity (u32): Type of entity the component belongs to
+    /// * position (usize): Position of entity in its cell
+    /// * hist (&Option<HistMemory>): History memory of component
+    ///
+    /// # Returns
+    /// * PyResult<()>: ValueError, if the number of saved values differs
+    ///                 from the already collected rows
+    pub fn add_row(&mut self, entity: u32, position: usize,
+                   hist: &Option<HistMemory>) -> PyResult<()>
+    {
+        let hist = match hist {
+            None => return Ok(()),
+            Some(hist) => hist,
+        };
+
+        match self.n_steps {
+            None => {
+                self.n_steps = Some(hist.memory.len());
+                self.data.reserve(hist.memory.len());
+            },
+            Some(n_steps) => {
+                if n_steps != hist.memory.len() {
+                    return Err(PyValueError::new_err(format!(
+                        "Record size {} of entity {} at position {} is \
+                         different from the size {} of other records",
+                        hist.memory.len(), entity, position, n_steps)));
+                }
+            },
+        }
+
+        hist.extend_into(&mut self.data);
+        self.index.push(entity);
+        self.index.push(position as u32);
+        self.n_rows += 1;
+
+        Ok(())
+    }
+
+    /// Hand over collected data to python without further copies
+    ///
+    /// # Returns
+    /// * (PyObject, PyObject): float32 matrix (rows x steps) and
+    ///                         uint32 index table (rows x 2)
+    pub fn to_py_arrays(self, py: Python) -> PyResult<(PyObject, PyObject)> {
+        let n_steps = self.n_steps.unwrap_or(0);
+        let matrix: &PyArray2<f32> = PyArray::from_vec(py, self.data)
+                                       .reshape([self.n_rows, n_steps])?;
+        let index: &PyArray2<u32> = PyArray::from_vec(py, self.index)
+                                      .reshape([self.n_rows, 2])?;
+
+        Ok((matrix.into_py(py), index.into_py(py)))
+    }
+}
+
+/// Collector to sum up the histories of several components
+/// for each time step
+pub struct HistSum {
+    data: Option<Vec<f32>>,
+}
+
+impl HistSum {
+    pub fn new() -> Self {
+        HistSum {data: None}
+    }
+
+    /// Add history of a component to the sum
+    ///
+    /// Components without history are ignored.
+    ///
+    /// # Arguments
+    /// * hist (&Option<HistMemory>): History memory of component
+    ///
+    /// # Returns
+    /// * PyResult<()>: ValueError, if the number of saved values differs
+    ///                 from the already added histories
+    pub fn add(&mut self, hist: &Option<HistMemory>) -> PyResult<()> {
+        let hist = match hist {
+            None => return Ok(()),
+            Some(hist) => hist,
+        };
+
+        let data = self.data.get_or_insert_with(|| {
+            vec![0.; hist.memory.len()]
+        });
+        if data.len() != hist.memory.len() {
+            return Err(PyValueError::new_err(format!(
+                "Record size {} is different from the size {} of \
+                 other records", hist.memory.len(), data.len())));
+        }
+        hist.add_into(data);
+
+        Ok(())
+    }
+
+    /// Hand over sum to python without further copies
+    ///
+    /// # Returns
+    /// * Option<PyObject>: float32 array or None, if no history was added
+    pub fn to_py_array(self, py: Python) -> Option<PyObject> {
+        self.data.map(|data| PyArray::from_vec(py, data).into_py(py))
+    }
+}
+
 // saving -> avoid reimplementation for different types
 #[macro_export]
 macro_rules! save_e {
@@ -0,0 +1,62 @@
+// external
+use std::collections::HashMap;
+use std::mem::size_of;
+
+use crate::components::generic_storage::GenericStorage;
+
+/// Bytes held by the parts of a cell
+///
+/// The bytes are calculated from the sizes of the structs and the
+/// capacities of their vectors. Components, which are stored inline
+/// (e.g. PV of a building), are counted with their entity. Only
+/// heating systems and their storages are reported separately.
+#[derive(Default)]
+pub struct MemoryReport {
+    pub cell: usize,  // cell itself (incl. pv, wind, ...)
+    pub sub_cells: usize,  // all sub cells with their entities
+    pub buildings: usize,
+    pub agents: usize,  // agents of buildings and separate BSL agents
+    pub heating_systems: usize,  // incl. thermal system of cell
+    pub storages: usize,  // storages of heating systems
+    pub histories: usize,  // values of all history memories
+}
+
+impl MemoryReport {
+    pub fn new() -> Self {
+        MemoryReport::default()
+    }
+
+    /// Get total bytes of report
+    pub fn total(&self) -> usize {
+        self.cell + self.sub_cells + self.buildings + self.agents +
+        self.heating_systems + self.storages + self.histories
+    }
+
+    /// Report storages of a heating system separately
+    ///
+    /// The storages are stored inline, hence their bytes were already
+    /// counted with the heating system.
+    ///
+    /// # Arguments
+    /// * n_storages (usize): Number of storages of heating system
+    pub fn add_storages(&mut self, n_storages: usize) {
+        let bytes = n_storages * size_of::<GenericStorage>();
+        self.heating_systems -= bytes;
+        self.storages += bytes;
+    }
+
+    /// Get report as mapping of part to bytes (incl. "total")
+    pub fn to_map(&self) -> HashMap<&'static str, usize> {
+        let mut report = HashMap::new();
+        report.insert("cell", self.cell);
+        report.insert("sub_cells", self.sub_cells);
+        report.insert("buildings", self.buildings);
+        report.insert("agents", self.agents);
+        report.insert("heating_systems", self.heating_systems);
+        report.insert("storages", self.storages);
+        report.insert("histories", self.histories);
+        report.insert("total", self.total());
+
+        report
+    }
+}
@@ -1,4 +1,12 @@
 pub mod ambient;
+pub mod boundary_data;
 pub mod cell_manager;
 pub mod helper;
-pub mod hist_memory;
\ No newline at end of file
+pub mod hist_memory;
+pub mod memory_report;
+pub mod random;
+pub mod recording;
+pub mod reference_year;
+pub mod serialization;
+pub mod solar_position;
+pub mod time_step;
@@ -0,0 +1,90 @@
+// external
+use rand::SeedableRng;
+use rand_xoshiro::Xoshiro256PlusPlus;
+use std::sync::atomic::{AtomicBool, AtomicU64, Ordering};
+
+/// Random number generator owned by each stochastic entity
+pub type EntityRng = Xoshiro256PlusPlus;
+
+// odd constant used to spread stream numbers over the seed space
+const STREAM_INCREMENT: u64 = 0x9E37_79B9_7F4A_7C15;
+
+static IS_SEEDED: AtomicBool = AtomicBool::new(false);
+static SEED: AtomicU64 = AtomicU64::new(0);
+static STREAM: AtomicU64 = AtomicU64::new(0);
+
+/// Set global seed for all random streams created afterwards
+///
+/// The streams are numbered in order of their creation. Hence two
+/// model generations with the same seed and the same order of
+/// construction get identical random numbers.
+///
+/// # Arguments
+/// * seed (Option<u64>): Global seed (None for random initialisation)
+pub fn set_seed(seed: Option<u64>) {
+    match seed {
+        None => IS_SEEDED.store(false, Ordering::SeqCst),
+        Some(seed) => {
+            SEED.store(seed, Ordering::SeqCst);
+            STREAM.store(0, Ordering::SeqCst);
+            IS_SEEDED.store(true, Ordering::SeqCst);
+        },
+    }
+}
+
+/// Create random number generator with given seed and stream number
+///
+/// # Arguments
+/// * seed (u64): Seed
+/// * stream (u64): Number of stream
+///
+/// # Returns
+/// * EntityRng: Random number generator
+pub fn stream_from_seed(seed: &u64, stream: &u64) -> EntityRng {
+    EntityRng::seed_from_u64(
+        seed.wrapping_add(stream.wrapping_mul(STREAM_INCREMENT)))
+}
+
+/// Create new random stream for an entity
+///
+/// If a global seed is set (see set_seed), the stream is derived from
+/// seed and stream counter. Otherwise the stream is initialised randomly.
+///
+/// # Returns
+/// * EntityRng: Random number generator
+pub fn new_stream() -> EntityRng {
+    if IS_SEEDED.load(Ordering::SeqCst) {
+        let stream = STREAM.fetch_add(1, Ordering::SeqCst);
+        stream_from_seed(&SEED.load(Ordering::SeqCst), &stream)
+    } else {
+        EntityRng::from_rng(rand::thread_rng()).unwrap()
+    }
+}
+
+/// Helper to reseed the random streams of all entities of a model
+///
+/// Each call of next_stream returns a new stream, derived from the seed
+/// and the number of streams handed out so far.
+pub struct StreamSeeder {
+    seed: u64,
+    stream: u64,
+}
+
+impl StreamSeeder {
+    /// Create seeder, starting with first stream of seed
+    ///
+    /// # Arguments
+    /// * seed (u64): Seed
+    pub fn new(seed: u64) -> Self {
+        StreamSeeder {seed: seed,
+                      stream: 0,
+                      }
+    }
+
+    /// Get next random stream
+    pub fn next_stream(&mut self) -> EntityRng {
+        let rng = stream_from_seed(&self.seed, &self.stream);
+        self.stream += 1;
+        rng
+    }
+}
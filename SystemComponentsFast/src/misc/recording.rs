@@ -0,0 +1,221 @@
+// external
+use pyo3::prelude::*;
+use pyo3::exceptions::PyValueError;
+use serde::{Deserialize, Serialize};
+
+use crate::misc::hist_memory::{HistMemory, Recorder};
+use crate::misc::serialization::{self, Stateful};
+
+// entities of a cell, whose histories can be selected
+// ("cell" includes the components of the cell itself, e.g. pv or
+//  thermal system)
+static ENTITIES: [&str; 3] = ["cell", "building", "sep_bsl"];
+
+/// Rule of a recording spec, which selects the history memories
+/// to be recorded
+///
+/// A recording spec is a list of rules (see Cell.set_recording).
+/// For each history memory the last matching rule decides, if and how
+/// the memory is recorded. Memories without matching rule are not changed.
+///
+/// Example (cell level everything, buildings only load_e,
+///          heatpumps only cop_hist, every 100th building fully):
+///     [RecordingRule(False),
+///      RecordingRule(True, entity="cell"),
+///      RecordingRule(True, entity="building", component="building",
+///                    quantity="load_e"),
+///      RecordingRule(True, component="heatpump", quantity="cop_hist"),
+///      RecordingRule(True, entity="building", every=100)]
+#[pyclass]
+#[derive(Clone, Deserialize, Serialize)]
+pub struct RecordingRule {
+    #[pyo3(get)]
+    record: bool,
+    #[pyo3(get)]
+    entity: Option<String>,
+    #[pyo3(get)]
+    component: Option<String>,
+    #[pyo3(get)]
+    quantity: Option<String>,
+    #[pyo3(get)]
+    positions: Option<Vec<usize>>,  // sorted
+    #[pyo3(get)]
+    every: usize,
+    #[pyo3(get)]
+    size: Option<usize>,
+    #[pyo3(get)]
+    recorder: Option<Recorder>,
+}
+
+impl Stateful for RecordingRule {
+    const KIND: &'static str = "RecordingRule";
+}
+
+#[pymethods]
+impl RecordingRule {
+    /// Create rule of recording spec
+    ///
+    /// # Arguments
+    /// * record (bool): Record selected memories, otherwise they are removed
+    /// * entity (Option<String>): Type of entity in cell: "cell",
+    ///                            "building" or "sep_bsl"
+    ///                            (default: None -> all entities)
+    /// * component (Option<String>): Name of component, e.g. "building",
+    ///                               "pv", "heatpump", "boiler", "chp",
+    ///                               "storage", "storage_hw" (hot water
+    ///                               storage of chp systems)
+    ///                               (default: None -> all)
+    /// * quantity (Option<String>): Name of quantity, e.g. "gen_e",
+    ///                              "load_t", "cop_hist"
+    ///                              (default: None -> all)
+    /// * positions (Option<Vec<usize>>): Positions of selected entities
+    ///                                   in their cell, e.g. probe
+    ///                                   buildings (default: None -> all)
+    /// * every (usize): Select only every n-th entity of cell
+    ///                  (default: 1)
+    /// * size (Option<usize>): Size of selected memories in simulation
+    ///                         steps (default: None -> size given to
+    ///                         Cell.set_recording)
+    /// * recorder (Option<Recorder>): Recording mode of selected memories
+    ///                                (default: None -> each value)
+    #[new]
+    #[args(entity = "None", component = "None", quantity = "None",
+           positions = "None", every = "1", size = "None",
+           recorder = "None")]
+    fn new(record: bool, entity: Option<String>, component: Option<String>,
+           quantity: Option<String>, positions: Option<Vec<usize>>,
+           every: usize, size: Option<usize>, recorder: Option<Recorder>)
+    -> PyResult<Self>
+    {
+        if let Some(name) = &entity {
+            if !ENTITIES.contains(&name.as_str()) {
+                return Err(PyValueError::new_err(
+                            format!("Unknown entity {}, supported entities \
+                                     are {:?}", name, ENTITIES)));
+            }
+        }
+        if every == 0 {
+            return Err(PyValueError::new_err(
+                        "Selection of every n-th entity must be \
+                         at least 1"));
+        }
+
+        let positions = positions.map(|mut positions| {
+            positions.sort_unstable();
+            positions
+        });
+
+        Ok(RecordingRule {record: record,
+                          entity: entity,
+                          component: component,
+                          quantity: quantity,
+                          positions: positions,
+                          every: every,
+                          size: size,
+                          recorder: recorder,
+                          })
+    }
+
+    /// Check if rule selects a history memory
+    /// (e.g. to estimate the memory of a recording spec)
+    ///
+    /// # Arguments
+    /// * entity (&str): Type of entity the memory belongs to
+    /// * position (usize): Position of entity in its cell
+    /// * component (&str): Name of component the memory belongs to
+    /// * quantity (&str): Name of quantity
+    ///
+    /// # Returns
+    /// * bool: True if memory is selected
+    fn selects(&self, entity: &str, position: usize, component: &str,
+               quantity: &str) -> bool
+    {
+        self.matches(entity, position, component, quantity)
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
+}
+
+impl RecordingRule {
+    /// Check if rule selects a history memory
+    ///
+    /// # Arguments
+    /// * entity (&str): Type of entity the memory belongs to
+    /// * position (usize): Position of entity in its cell
+    /// * component (&str): Name of component the memory belongs to
+    /// * quantity (&str): Name of quantity
+    ///
+    /// # Returns
+    /// * bool: True if memory is selected
+    fn matches(&self, entity: &str, position: usize, component: &str,
+               quantity: &str) -> bool
+    {
+        self.entity.as_deref().map_or(true, |name| name == entity) &&
+        self.component.as_deref().map_or(true, |name| name == component) &&
+        self.quantity.as_deref().map_or(true, |name| name == quantity) &&
+        position % self.every == 0 &&
+        self.positions.as_ref().map_or(true, |positions|
+                                       positions.binary_search(&position)
+                                                .is_ok())
+    }
+
+    /// Create or remove history memory as given by rule
+    ///
+    /// # Arguments
+    /// * memory (&mut Option<HistMemory>): Selected memory
+    /// * hist (usize): Default size of memory in simulation steps
+    fn apply(&self, memory: &mut Option<HistMemory>, hist: usize) {
+        let size = self.size.unwrap_or(hist);
+        if !self.record || size == 0 {
+            *memory = None;
+            return;
+        }
+
+        *memory = Some(match &self.recorder {
+            None => HistMemory::new(size),
+            Some(recorder) => HistMemory::with_recorder(size, recorder),
+        });
+    }
+}
+
+/// Apply recording spec to a history memory
+///
+/// # Arguments
+/// * rules (&[RecordingRule]): Recording spec
+/// * hist (usize): Default size of memory in simulation steps
+/// * entity (&str): Type of entity the memory belongs to
+/// * position (usize): Position of entity in its cell
+/// * component (&str): Name of component the memory belongs to
+/// * quantity (&str): Name of quantity
+/// * memory (&mut Option<HistMemory>): History memory
+///
+/// # Returns
+/// * bool: True if memory is recorded afterwards
+pub fn apply_rules(rules: &[RecordingRule], hist: usize, entity: &str,
+                   position: usize, component: &str, quantity: &str,
+                   memory: &mut Option<HistMemory>) -> bool
+{
+    let rule = rules.iter()
+                    .rev()
+                    .find(|rule| rule.matches(entity, position,
+                                              component, quantity));
+    if let Some(rule) = rule {
+        rule.apply(memory, hist);
+    }
+
+    memory.is_some()
+}
@@ -0,0 +1,146 @@
+// external
+use pyo3::prelude::*;
+use pyo3::exceptions::PyValueError;
+use std::collections::HashMap;
+use std::sync::{Arc, Mutex};
+
+static HOURS_PER_YEAR: usize = 8760;
+
+// Key of a memoized heatpump design:
+// power class, supply temperature, heating limit temperature and
+// seasonal performance factor (bits of f32)
+pub type DesignKey = (u8, u32, u32, u32);
+
+struct ReferenceData {
+    // temperature and mean temperature of day for each hour,
+    // sorted by temperature
+    sorted_hours: Vec<(f32, f32)>,
+    // minimum temperature [degC]
+    t_min: f32,
+    // number of design iterations and resulting mean cop
+    designs: Mutex<HashMap<DesignKey, (usize, f32)>>,
+}
+
+/// Hourly temperatures of a reference year (e.g. of one region)
+///
+/// The hours are sorted by temperature once, so they can be shared by
+/// all heatpump systems dimensioned with this reference year.
+/// Also the results of the heatpump design are memoized,
+/// since many buildings get the same design.
+#[pyclass]
+#[derive(Clone)]
+pub struct ReferenceYear {
+    data: Arc<ReferenceData>,
+}
+
+#[pymethods]
+impl ReferenceYear {
+    /// Create reference year
+    ///
+    /// # Arguments
+    /// * t_ref (Vec<f32>): Hourly temperatures of reference year
+    ///                     (DWD, 1995-2012) [degC]
+    #[new]
+    fn py_new(t_ref: Vec<f32>) -> PyResult<Self> {
+        if t_ref.len() != HOURS_PER_YEAR {
+            return Err(PyValueError::new_err(
+                        format!("Reference year must have {} hourly \
+                                 temperatures, got {}",
+                                HOURS_PER_YEAR, t_ref.len())));
+        }
+        Ok(ReferenceYear::new(t_ref))
+    }
+
+    /// Minimum temperature of reference year [degC]
+    #[getter]
+    fn t_min(&self) -> f32 {
+        self.data.t_min
+    }
+
+    /// Number of memoized heatpump designs
+    #[getter]
+    fn n_designs(&self) -> usize {
+        self.data.designs.lock().unwrap().len()
+    }
+}
+
+impl ReferenceYear {
+    /// Create reference year
+    ///
+    /// # Arguments
+    /// * t_ref (Vec<f32>): Hourly temperatures of reference year [degC]
+    pub fn new(t_ref: Vec<f32>) -> Self {
+        if t_ref.len() != HOURS_PER_YEAR {
+            panic!("Reference year must have {} hourly temperatures",
+                   HOURS_PER_YEAR);
+        }
+
+        let mut sorted_hours: Vec<(f32, f32)> =
+            t_ref.chunks(24)
+                 .flat_map(|t_day| {
+                     let t_mean = t_day.iter().sum::<f32>() / 24.;
+                     t_day.iter().map(move |t_out| (*t_out, t_mean))
+                 })
+                 .collect();
+        sorted_hours.sort_by(|a, b| a.0.partial_cmp(&b.0).unwrap());
+
+        let mut t_min = t_ref[0];
+        for t_out in t_ref.iter() {
+            if *t_out < t_min {
+                t_min = *t_out;
+            }
+        }
+
+        ReferenceYear {data: Arc::new(ReferenceData {
+                           sorted_hours: sorted_hours,
+                           t_min: t_min,
+                           designs: Mutex::new(HashMap::new()),
+                       })}
+    }
+
+    /// Minimum temperature of reference year [degC]
+    pub fn min_temperature(&self) -> f32 {
+        self.data.t_min
+    }
+
+    /// Get temperatures of all hours of heating days, where heating
+    /// is needed (temperature not above heating limit temperature)
+    ///
+    /// # Arguments
+    /// * t_heat_lim (f32): Heating limit temperature of building [degC]
+    ///
+    /// # Returns
+    /// * impl Iterator<Item=f32>: Temperatures in ascending order [degC]
+    pub fn heating_hours(&self, t_heat_lim: f32)
+    -> impl Iterator<Item=f32> + '_
+    {
+        self.data.sorted_hours.iter()
+                              .filter(move |(t_out, t_mean)|
+                                      *t_mean < t_heat_lim &&
+                                      *t_out <= t_heat_lim)
+                              .map(|(t_out, _)| *t_out)
+    }
+
+    /// Get memoized design or calculate and memoize it
+    ///
+    /// The lock isn't held during calculation,
+    /// so a panic of the calculation can't poison the memo.
+    ///
+    /// # Arguments
+    /// * key (DesignKey): Key of design
+    /// * design (FnOnce() -> (usize, f32)): Calculation of design
+    ///
+    /// # Returns
+    /// * (usize, f32): Number of design iterations and resulting mean cop
+    pub fn get_design<F>(&self, key: DesignKey, design: F) -> (usize, f32)
+    where F: FnOnce() -> (usize, f32)
+    {
+        if let Some(result) = self.data.designs.lock().unwrap().get(&key) {
+            return *result;
+        }
+        let result = design();
+        self.data.designs.lock().unwrap().insert(key, result);
+
+        result
+    }
+}
@@ -0,0 +1,204 @@
+// external
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyIOError, PyValueError};
+use pyo3::types::PyBytes;
+use serde::{Serialize, de::DeserializeOwned};
+use std::cell::Cell;
+use std::fs::File;
+use std::io::{BufReader, BufWriter, Read, Write};
+
+// Binary state of model objects:
+//   - MAGIC
+//   - FORMAT_VERSION (u32, little endian)
+//   - kind of object (bincode string)
+//   - object tree (bincode)
+// The format version must be increased with each change of
+// the serialized structs.
+static MAGIC: &[u8; 8] = b"ENSYSIM\0";
+pub static FORMAT_VERSION: u32 = 2;
+
+thread_local! {
+    // histories are only serialized if requested
+    static WITH_HISTORY: Cell<bool> = Cell::new(true);
+}
+
+/// Model object, which can be saved as binary state
+pub trait Stateful: Serialize + DeserializeOwned {
+    /// Name of python class
+    const KIND: &'static str;
+
+    /// Restore state, which isn't serialized (called after loading)
+    fn restore(&mut self) {}
+}
+
+/// Check if histories are serialized
+///
+/// # Returns
+/// * bool: True if histories are saved
+pub fn with_history() -> bool {
+    WITH_HISTORY.with(|flag| flag.get())
+}
+
+/// Write binary state of object
+///
+/// # Arguments
+/// * writer (W): Destination of state
+/// * value (&T): Object to serialize
+/// * history (bool): Save history memories (otherwise only their sizes
+///                   are saved)
+fn write_state<T: Stateful, W: Write>(mut writer: W, value: &T,
+                                      history: bool) -> PyResult<()>
+{
+    let previous = WITH_HISTORY.with(|flag| flag.replace(history));
+
+    let result = writer.write_all(MAGIC)
+        .and_then(|_| writer.write_all(&FORMAT_VERSION.to_le_bytes()))
+        .map_err(|err| err.to_string())
+        .and_then(|_| bincode::serialize_into(&mut writer, T::KIND)
+                      .map_err(|err| err.to_string()))
+        .and_then(|_| bincode::serialize_into(&mut writer, value)
+                      .map_err(|err| err.to_string()))
+        .and_then(|_| writer.flush().map_err(|err| err.to_string()));
+
+    WITH_HISTORY.with(|flag| flag.set(previous));
+
+    result.map_err(|err| PyIOError::new_err(
+                           format!("{} could not be saved: {}",
+                                   T::KIND, err)))
+}
+
+/// Read binary state of object
+///
+/// # Arguments
+/// * reader (R): Source of state
+///
+/// # Returns
+/// * T: Restored object
+fn read_state<T: Stateful, R: Read>(mut reader: R) -> PyResult<T>
+{
+    let mut header = [0u8; 12];
+    reader.read_exact(&mut header)
+          .map_err(|err| PyIOError::new_err(
+                           format!("State header could not be read: {}",
+                                   err)))?;
+    if &header[..8] != MAGIC {
+        return Err(PyValueError::new_err("Data is no model state"));
+    }
+    let mut version = [0u8; 4];
+    version.copy_from_slice(&header[8..]);
+    let version = u32::from_le_bytes(version);
+    if version != FORMAT_VERSION {
+        return Err(PyValueError::new_err(
+                    format!("State format version {} is not supported \
+                             (supported version: {})",
+                            version, FORMAT_VERSION)));
+    }
+
+    let kind: String = bincode::deserialize_from(&mut reader)
+        .map_err(|err| PyValueError::new_err(
+                         format!("Invalid state: {}", err)))?;
+    if kind != T::KIND {
+        return Err(PyValueError::new_err(
+                    format!("State of {} can't be loaded as {}",
+                            kind, T::KIND)));
+    }
+
+    let mut value: T = bincode::deserialize_from(&mut reader)
+        .map_err(|err| PyValueError::new_err(
+                         format!("Invalid state of {}: {}", T::KIND, err)))?;
+    value.restore();
+
+    Ok(value)
+}
+
+/// Get binary state of object
+///
+/// # Arguments
+/// * value (&T): Object to serialize
+/// * history (bool): Save history memories
+///
+/// # Returns
+/// * Vec<u8>: State
+pub fn to_bytes<T: Stateful>(value: &T, history: bool) -> PyResult<Vec<u8>>
+{
+    let mut state = Vec::new();
+    write_state(&mut state, value, history)?;
+
+    Ok(state)
+}
+
+/// Restore object from binary state
+///
+/// # Arguments
+/// * state (&[u8]): State (see to_bytes)
+///
+/// # Returns
+/// * T: Restored object
+pub fn from_bytes<T: Stateful>(state: &[u8]) -> PyResult<T>
+{
+    read_state(state)
+}
+
+/// Save binary state of object to file
+///
+/// # Arguments
+/// * value (&T): Object to serialize
+/// * path (&str): Path of file
+/// * history (bool): Save history memories
+pub fn save<T: Stateful>(value: &T, path: &str, history: bool)
+-> PyResult<()>
+{
+    let file = File::create(path)
+        .map_err(|err| PyIOError::new_err(
+                         format!("{} could not be created: {}", path, err)))?;
+
+    write_state(BufWriter::new(file), value, history)
+}
+
+/// Load object from file
+///
+/// # Arguments
+/// * path (&str): Path of file (see save)
+///
+/// # Returns
+/// * T: Restored object
+pub fn load<T: Stateful>(path: &str) -> PyResult<T>
+{
+    let file = File::open(path)
+        .map_err(|err| PyIOError::new_err(
+                         format!("{} could not be opened: {}", path, err)))?;
+
+    read_state(BufReader::new(file))
+}
+
+/// Get state of object as python bytes (used by __getstate__)
+///
+/// # Arguments
+/// * py (Python): Python token
+/// * value (&T): Object to serialize
+///
+/// # Returns
+/// * PyObject: State as bytes (including histories)
+pub fn get_state<T: Stateful>(py: Python, value: &T) -> PyResult<PyObject>
+{
+    Ok(PyBytes::new(py, &to_bytes(value, true)?).into())
+}
+
+/// Get arguments to rebuild object for pickle (used by __reduce__)
+///
+/// The object is rebuild by SystemComponentsFast._from_state,
+/// since the constructors of the python classes need arguments.
+///
+/// # Arguments
+/// * py (Python): Python token
+/// * value (&T): Object to serialize
+///
+/// # Returns
+/// * PyObject: Tuple of function and its arguments (kind, state)
+pub fn reduce<T: Stateful>(py: Python, value: &T) -> PyResult<PyObject>
+{
+    let from_state = py.import("SystemComponentsFast")?
+                       .getattr("_from_state")?;
+
+    Ok((from_state, (T::KIND, get_state(py, value)?)).into_py(py))
+}
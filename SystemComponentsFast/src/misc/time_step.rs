@@ -0,0 +1,61 @@
+// external
+use std::sync::atomic::{AtomicU32, Ordering};
+
+// simulation time step [h], saved as bits of f32 (default 0.25 h)
+static TIME_STEP: AtomicU32 = AtomicU32::new(0x3E80_0000);
+
+// number of steps per day of the day profiles of the boundary data
+// (standard load profiles, hot water profile)
+pub const DAY_PROFILE_STEPS: usize = 96;
+
+/// Get time step of simulation
+///
+/// # Returns
+/// * f32: Time step [h]
+pub fn get_time_step() -> f32 {
+    f32::from_bits(TIME_STEP.load(Ordering::Relaxed))
+}
+
+/// Set time step of simulation
+///
+/// The time step is used by all time dependent components
+/// (e.g. thermal capacities of buildings and storages).
+/// It must be set before the simulation is started.
+///
+/// # Arguments
+/// * time_step (f32): Time step [h]
+pub fn set_time_step(time_step: f32) {
+    TIME_STEP.store(time_step.to_bits(), Ordering::Relaxed);
+}
+
+/// Get number of simulation steps of one day
+///
+/// # Returns
+/// * usize: Number of steps per day
+pub fn get_steps_per_day() -> usize {
+    (24. / get_time_step()).round() as usize
+}
+
+/// Check if a time step can be used for the simulation
+///
+/// A day must consist of whole steps and the number of steps per day
+/// must be a divisor or multiple of DAY_PROFILE_STEPS, so the day
+/// profiles of the boundary data can be resampled without remainder.
+///
+/// # Arguments
+/// * time_step (f32): Time step [h]
+///
+/// # Returns
+/// * bool: True if time step is valid
+pub fn is_valid_time_step(time_step: f32) -> bool {
+    if !(time_step > 0.) || time_step > 24. {
+        return false;
+    }
+    let steps = 24. / time_step;
+    if (steps - steps.round()).abs() >= 1e-4 {
+        return false;
+    }
+    let steps = steps.round() as usize;
+
+    (DAY_PROFILE_STEPS % steps == 0) || (steps % DAY_PROFILE_STEPS == 0)
+}
@@ -1,15 +1,19 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 use log::{error};
 use rand::Rng;
 use rand_distr::{Distribution, FisherF, Gamma};
 
 use crate::save_e;
 use crate::components::{pv};
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistNames, HistOwner, HistView,
+                               HistVisitor, Recorded};
+use crate::misc::random::{self, EntityRng};
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct SepBSLagent {
     a_type: usize,  // 1: BSLa, 2: BSLc
     #[pyo3(get)]
@@ -17,11 +21,37 @@ pub struct SepBSLagent {
     #[pyo3(get)]
     demand_apv: f32,
     #[pyo3(get)]
-    pv: Option<pv::PV>,
-    #[pyo3(get)]
-    gen_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
-    load_e: Option<hist_memory::HistMemory>,
+    pub pv: Option<pv::PV>,
+    pub gen_e: Option<hist_memory::HistMemory>,
+    pub load_e: Option<hist_memory::HistMemory>,
+    rng: EntityRng,  // random stream of agent
+}
+
+impl Stateful for SepBSLagent {
+    const KIND: &'static str = "SepBSLagent";
+}
+
+impl Recorded for SepBSLagent {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("sep_bsl", "gen_e", &mut self.gen_e);
+        visitor("sep_bsl", "load_e", &mut self.load_e);
+        if let Some(pv) = &mut self.pv {
+            pv.visit_histories(visitor);
+        }
+    }
+}
+
+impl HistOwner for SepBSLagent {}
+
+impl SepBSLagent {
+    /// Add names of the own history memories visited by visit_histories
+    /// (without the pv plant or heating system)
+    ///
+    /// # Arguments
+    /// * names (&mut HistNames): Names (component, quantity)
+    pub fn own_history_names(names: &mut HistNames) {
+        names.extend([("sep_bsl", "gen_e"), ("sep_bsl", "load_e")]);
+    }
 }
 
 #[pymethods]
@@ -62,6 +92,7 @@ impl SepBSLagent {
                                      pv: None,
                                      gen_e: gen_e,
                                      load_e: load_e,
+                                     rng: random::new_stream(),
                                      };
         agent.get_apv_demand();
         agent.get_coc();
@@ -93,6 +124,35 @@ impl SepBSLagent {
                                         has a PV plant, nothing is added"),
         }
     }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |agent| &agent.gen_e, "sep_bsl", "gen_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn load_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |agent| &agent.load_e, "sep_bsl", "load_e")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 /// Agent to simulate electrical profile of bigger business
@@ -104,23 +164,21 @@ impl SepBSLagent {
     /// Calculate the demand for PV area to cover a part of the
     /// electrical energy consumption, using BSL statistics.
     fn get_apv_demand(&mut self) {
-        let mut rng = rand::thread_rng();
-
-        self.demand_apv = rng.gen_range(0.8..=1.2);
+        self.demand_apv = self.rng.gen_range(0.8..=1.2);
 
         let dist = FisherF::new(7.025235971695065, 2205.596792511838).unwrap();
-        self.demand_apv *= dist.sample(&mut rng) * 0.299704041191481 + 0.1;
+        self.demand_apv *= dist.sample(&mut self.rng) * 0.299704041191481 +
+                           0.1;
     }
 
     /// Get COC factor of agent
     /// Use BSL statistics
     fn get_coc(&mut self) {
         let mut coc: f32 = 0.;
-        let mut rng = rand::thread_rng();
 
         // Gamma sistribution with shape, scale
         let dist = Gamma::new(1.399147113755027, 1.876519590091970).unwrap();
-        sample_coc!(dist, rng, coc, 1.);
+        sample_coc!(dist, self.rng, coc, 1.);
 
         if coc < 1. {
             self.coc = 1.;
@@ -129,6 +187,14 @@ impl SepBSLagent {
         }
     }
 
+    /// Replace random stream of agent
+    ///
+    /// # Arguments
+    /// * rng (EntityRng): New random stream
+    pub fn reseed(&mut self, rng: EntityRng) {
+        self.rng = rng;
+    }
+
     fn get_pv_generation(&mut self, eg: &f32) -> f32 {
         match &mut self.pv {
             None => 0.,
@@ -147,13 +213,13 @@ impl SepBSLagent {
     /// # Returns
     /// * (f32, f32): Current electrical power balance [W]
     pub fn step(&mut self, slp_data: &[f32; 3], eg: &f32) -> (f32, f32) {
-        let mut rng = rand::thread_rng();
         // init current step
         let mut electrical_load = 0.;
         let mut electrical_generation = 0.;
 
         // calculate load
-        electrical_load += slp_data[self.a_type] * rng.gen_range(0.8..=1.2);
+        electrical_load += slp_data[self.a_type] *
+                           self.rng.gen_range(0.8..=1.2);
 
         // calculate generation
         // TODO: CHP
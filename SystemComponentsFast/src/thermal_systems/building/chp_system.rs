@@ -1,5 +1,6 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 use rand::Rng;
 use log::{info};
 
@@ -10,13 +11,18 @@ use crate::misc::helper::{find_heating_system_storage,
 use crate::components::boiler::Boiler;
 use crate::components::chp::CHP;
 use crate::components::generic_storage::GenericStorage;
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistNames, HistOwner, HistView,
+                               HistVisitor, Recorded};
+use crate::misc::memory_report::MemoryReport;
+use crate::misc::random;
+use crate::thermal_systems::storage_controller::StorageController;
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct BuildingChpSystem {
     #[pyo3(get)]
-    chp: CHP,  // chp plant
+    pub chp: CHP,  // chp plant
     #[pyo3(get)]
     storage: GenericStorage,  // thermal storage
     #[pyo3(get)]
@@ -25,6 +31,8 @@ pub struct BuildingChpSystem {
     boiler: Boiler,  // peak load boiler
 
     // Controller variables
+    #[pyo3(get, set)]
+    rule_controller: StorageController,
     boiler_state: bool,
     chp_state: bool,
     control_mode: u8,  // 0: Winter, 1: Intermediate, 2: Summer
@@ -32,12 +40,50 @@ pub struct BuildingChpSystem {
     t_heat_lim_h: f32,  // degC
     // save storage losses, to consider in temperature control
     last_losses: f32,  // W
-    #[pyo3(get)]
     gen_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
     gen_t: Option<hist_memory::HistMemory>,
 }
 
+impl Stateful for BuildingChpSystem {
+    const KIND: &'static str = "BuildingChpSystem";
+}
+
+impl Recorded for BuildingChpSystem {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("chp_system", "gen_e", &mut self.gen_e);
+        visitor("chp_system", "gen_t", &mut self.gen_t);
+        self.chp.visit_histories(visitor);
+        self.storage.visit_histories(visitor);
+        hist_memory::visit_renamed(&mut self.storage_hw, "storage_hw",
+                                   visitor);
+        self.boiler.visit_histories(visitor);
+    }
+}
+
+impl HistOwner for BuildingChpSystem {}
+
+impl BuildingChpSystem {
+    /// Add names of the history memories visited by visit_histories
+    ///
+    /// # Arguments
+    /// * names (&mut HistNames): Names (component, quantity)
+    pub fn history_names(names: &mut HistNames) {
+        names.extend([("chp_system", "gen_e"), ("chp_system", "gen_t")]);
+        CHP::history_names(names);
+        GenericStorage::history_names(names);
+        names.push(("storage_hw", "charge_hist"));
+        Boiler::history_names(names);
+    }
+
+    /// Set rule based controller of chp and boiler
+    ///
+    /// # Arguments
+    /// * controller (StorageController): New controller
+    pub fn set_rule_controller(&mut self, controller: StorageController) {
+        self.rule_controller = controller;
+    }
+}
+
 #[pymethods]
 impl BuildingChpSystem {
     /// Create CHP system with thermal storage and boiler
@@ -59,7 +105,7 @@ impl BuildingChpSystem {
                     must be positive")
         }
 
-        let mut rng = rand::thread_rng();
+        let mut rng = random::new_stream();
         let f_chp: f32 = rng.gen_range(0.3..=0.6);
         // chp:
         let pow_t_chp = f_chp * q_hln;
@@ -118,6 +164,7 @@ impl BuildingChpSystem {
                    storage,
                    storage_hw,
                    boiler,
+                   rule_controller: StorageController::default(),
                    boiler_state: false,
                    chp_state: false,
                    control_mode: 1,
@@ -127,15 +174,47 @@ impl BuildingChpSystem {
                    gen_t,
                    }
     }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |system| &system.gen_e, "chp_system", "gen_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |system| &system.gen_t, "chp_system", "gen_t")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 /// CHP plant
 impl BuildingChpSystem {
-    // Control Parameter
-    const STORAGE_LEVEL_HH: f32 = 0.95;
-    const STORAGE_LEVEL_H: f32 = 0.3;
-    const STORAGE_LEVEL_L: f32 = 0.2;
-    const STORAGE_LEVEL_LL: f32 = 0.05;
+    /// Add bytes held by heating system to memory report
+    /// (the system itself is counted by its owner)
+    ///
+    /// # Arguments
+    /// * report (&mut MemoryReport): Report of cell
+    pub fn add_memory_usage(&self, report: &mut MemoryReport) {
+        report.add_storages(2);
+    }
 
     fn control(&mut self){
         match self.control_mode {
@@ -155,14 +234,16 @@ impl BuildingChpSystem {
         let storage_state = self.storage.get_relative_charge();
         let storage_state_hw = self.storage_hw.get_relative_charge();
 
+        let ctrl = &self.rule_controller;
+
         if self.boiler_state {self.boiler_state = false;}
-        if (storage_state <= BuildingChpSystem::STORAGE_LEVEL_LL) |
-           (storage_state_hw <= BuildingChpSystem::STORAGE_LEVEL_LL)
+        if (storage_state <= *ctrl.level_ll()) |
+           (storage_state_hw <= *ctrl.level_ll())
         {
             self.chp_state = true;
         }
-        else if (storage_state >= BuildingChpSystem::STORAGE_LEVEL_H) &
-                (storage_state_hw >= BuildingChpSystem::STORAGE_LEVEL_HH)
+        else if (storage_state >= *ctrl.level_h()) &
+                (storage_state_hw >= *ctrl.level_hh())
         {
             self.chp_state = false;
         }
@@ -244,11 +325,13 @@ impl BuildingChpSystem {
     fn summer_mode(&mut self) {
         let storage_state_hw = self.storage_hw.get_relative_charge();
 
+        let ctrl = &self.rule_controller;
+
         if self.boiler_state {self.boiler_state = false;}
-        if storage_state_hw <= BuildingChpSystem::STORAGE_LEVEL_LL {
+        if storage_state_hw <= *ctrl.level_ll() {
             self.chp_state = true;
         }
-        else if storage_state_hw >= BuildingChpSystem::STORAGE_LEVEL_HH {
+        else if storage_state_hw >= *ctrl.level_hh() {
             self.chp_state = false;
         }
     }
@@ -295,28 +378,21 @@ impl BuildingChpSystem {
         let storage_state = self.storage.get_relative_charge();
         let storage_state_hw = self.storage_hw.get_relative_charge();
 
-        if storage_state <= BuildingChpSystem::STORAGE_LEVEL_LL {
-            self.boiler_state = true;
-            self.chp_state = true;
-        }
-        else if (storage_state <= BuildingChpSystem::STORAGE_LEVEL_L) &
-                !self.chp_state {
-            self.boiler_state = false;
-            self.chp_state = true;
-        }
-        else if (storage_state >= BuildingChpSystem::STORAGE_LEVEL_H) &
-                self.boiler_state {
-            self.boiler_state = false;
-            self.chp_state = true;
-        }
-        else if storage_state >= BuildingChpSystem::STORAGE_LEVEL_HH {
-            if storage_state_hw >= BuildingChpSystem::STORAGE_LEVEL_HH {
-                self.chp_state = false;
-            }
-            self.boiler_state = false;
+        let chp_state = self.chp_state;
+        let boiler_state = self.boiler_state;
+        let level_hh = *self.rule_controller.level_hh();
+
+        self.rule_controller.control(&storage_state, &mut self.chp_state,
+                                     &mut self.boiler_state);
+
+        // storage full -> keep chp running, until hot water storage is full
+        if (storage_state >= level_hh) & !boiler_state &
+           (storage_state_hw < level_hh)
+        {
+            self.chp_state = chp_state;
         }
 
-        if storage_state_hw <= BuildingChpSystem::STORAGE_LEVEL_LL {
+        if storage_state_hw <= *self.rule_controller.level_ll() {
             self.chp_state = true;
         }
     }
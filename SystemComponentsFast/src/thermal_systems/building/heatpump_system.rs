@@ -1,21 +1,25 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 use log::{info};
 
 use crate::misc::helper::{find_heating_system_storage,
-                          find_heat_storage_loss_parameter,
-                          find_minimum};
+                          find_heat_storage_loss_parameter};
 
 use crate::components::boiler::Boiler;
 use crate::components::heatpump::Heatpump;
 use crate::components::generic_storage::GenericStorage;
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistNames, HistOwner, HistView,
+                               HistVisitor, Recorded};
+use crate::misc::memory_report::MemoryReport;
+use crate::misc::reference_year::ReferenceYear;
+use crate::misc::serialization::{self, Stateful};
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct BuildingHeatpumpSystem {
     #[pyo3(get)]
-    heatpump: Heatpump,  // heatpump
+    pub heatpump: Heatpump,  // heatpump
     #[pyo3(get)]
     storage: GenericStorage,  // thermal storage
     #[pyo3(get)]
@@ -30,29 +34,112 @@ pub struct BuildingHeatpumpSystem {
     // save storage losses, to consider in temperature control
     last_losses: f32,  // W
 
-    #[pyo3(get)]
     con_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
     gen_t: Option<hist_memory::HistMemory>,
 }
 
-fn average(numbers: &[f32]) -> f32 {
-    let mut average: f32 = numbers.iter().sum();
-    average = average / numbers.len() as f32;
-    average
+impl Stateful for BuildingHeatpumpSystem {
+    const KIND: &'static str = "BuildingHeatpumpSystem";
+}
+
+impl Recorded for BuildingHeatpumpSystem {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("heatpump_system", "con_e", &mut self.con_e);
+        visitor("heatpump_system", "gen_t", &mut self.gen_t);
+        self.heatpump.visit_histories(visitor);
+        self.storage.visit_histories(visitor);
+        self.boiler.visit_histories(visitor);
+    }
 }
 
-fn average_bool_select_weighted(numbers: &[f32], weights: &[f32],
-                                bool_select: &[bool]) -> f32 {
-    let mut sum = 0.;
-    let mut weights_sum = 0.;
-    for (idx, sel) in bool_select.iter().enumerate() {
-        if *sel {
-            sum += numbers[idx] * weights[idx];
-            weights_sum += weights[idx];
+impl HistOwner for BuildingHeatpumpSystem {}
+
+impl BuildingHeatpumpSystem {
+    /// Add names of the history memories visited by visit_histories
+    ///
+    /// # Arguments
+    /// * names (&mut HistNames): Names (component, quantity)
+    pub fn history_names(names: &mut HistNames) {
+        names.extend([("heatpump_system", "con_e"),
+                      ("heatpump_system", "gen_t")]);
+        Heatpump::history_names(names);
+        GenericStorage::history_names(names);
+        Boiler::history_names(names);
+    }
+}
+
+/// Get class of heatpump power, which determines the coefficients
+/// used for cop and power factor
+///
+/// # Arguments
+/// * pow_t (&f32): Thermal power of heatpump [W]
+///
+/// # Returns
+/// * u8: Power class (0: < 18 kW, 1: < 35 kW, 2: >= 35 kW)
+fn power_class(pow_t: &f32) -> u8 {
+    if pow_t < &18000. {
+        0
+    } else if pow_t < &35000. {
+        1
+    } else {
+        2
+    }
+}
+
+/// Find number of iterations needed, till the mean COP in all heating
+/// hours above minimum working temperature satisfies the seasonal
+/// performance factor (minimum working temperature is increased by
+/// 1 K per iteration, starting at minimum temperature of reference year)
+///
+/// The COPs of all heating hours are summed up in order of temperature,
+/// so the mean COP above a working temperature is found by a binary
+/// search in the cumulative table.
+///
+/// # Arguments
+/// * pow_t (&f32): Thermal power of heatpump used to choose
+///                 coefficients for COP [W]
+/// * t_supply (&f32): Supply temperature [°C]
+/// * reference_year (&ReferenceYear): Reference year of region
+/// * t_heat_lim (&f32): Heating limit temperature of building [°C]
+/// * seas_perf_fac (&f32): Minimum allowed seasonal performance factor
+///
+/// # Returns
+/// * (usize, f32): Number of iterations and resulting mean COP
+fn find_design_iterations(pow_t: &f32, t_supply: &f32,
+                          reference_year: &ReferenceYear,
+                          t_heat_lim: &f32, seas_perf_fac: &f32)
+-> (usize, f32)
+{
+    let mut temperatures = Vec::new();
+    let mut cop_sum = vec![0f64];
+    for t_out in reference_year.heating_hours(*t_heat_lim) {
+        let cop = cop_from_coefficients(pow_t, &t_out, t_supply) as f64;
+        temperatures.push(t_out);
+        cop_sum.push(cop_sum[cop_sum.len()-1] + cop);
+    }
+    let n_hours = temperatures.len();
+
+    let mut t_min = reference_year.min_temperature();
+    let mut cop_mean = -1.;
+    let mut iter_count = 0;
+    while cop_mean < *seas_perf_fac {
+        if t_min >= *t_heat_lim {
+            panic!("Heatpump minimum operating temperature must be greater
+                    then minimum heating temperature of building.
+                    Apparantly cop was choosen too high.")
         }
+        // increase lower bound of heatpump working temperature
+        if iter_count > 0 {
+            t_min = t_min + 1.;
+        }
+        // mean cop of all heating hours above working temperature
+        let pos = temperatures.partition_point(|t_out| *t_out < t_min);
+        cop_mean = ((cop_sum[n_hours] - cop_sum[pos]) /
+                    (n_hours - pos) as f64) as f32;
+        iter_count += 1;
     }
-    sum  / weights_sum
+
+    (iter_count, cop_mean)
 }
 
 fn cop_from_coefficients(pow_t: &f32, t_out: &f32, t_supply: &f32) -> f32 {
@@ -134,8 +221,8 @@ impl BuildingHeatpumpSystem {
     /// * seas_perf_fac (f32): minimum allowed seasonal performance factor,
     ///                        dependent on building (3.5 or 4.5)
     /// * t_supply (f32): supply temperature, dependent on building [°C]
-    /// * t_ref (Vec<[f32; 365]>): temperatures of reference year
-    ///                            (DWD, 1995-2012) [°C]
+    /// * t_ref (Vec<f32>): hourly temperatures of reference year
+    ///                     (DWD, 1995-2012) [°C]
     /// * t_heat_lim (f32): average outside temperature over which heating
     ///                     will suppply, building specific [°C]
     /// * t_out_n (f32): norm outside temperature [°C]
@@ -144,7 +231,72 @@ impl BuildingHeatpumpSystem {
     pub fn new(q_hln: f32, seas_perf_fac: f32, t_supply: f32,
                t_ref: Vec<f32>, t_heat_lim: f32, t_out_n: f32,
                hist: usize) -> Self {
+        BuildingHeatpumpSystem::with_reference_year(
+            q_hln, seas_perf_fac, t_supply, &ReferenceYear::new(t_ref),
+            t_heat_lim, t_out_n, hist)
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn con_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |system| &system.con_e, "heatpump_system", "con_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |system| &system.gen_t, "heatpump_system", "gen_t")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
 
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
+}
+
+
+impl BuildingHeatpumpSystem {
+    /// Add bytes held by heating system to memory report
+    /// (the system itself is counted by its owner)
+    ///
+    /// # Arguments
+    /// * report (&mut MemoryReport): Report of cell
+    pub fn add_memory_usage(&self, report: &mut MemoryReport) {
+        report.add_storages(1);
+    }
+
+    ///  Create heatpump system with thermal storage and boiler
+    ///  The technical design is based on norm heating load, designs of
+    ///  the reference year are shared by all buildings of a region.
+    ///
+    /// # Arguments
+    /// * q_hln (f32): norm heating load of building [W]
+    /// * seas_perf_fac (f32): minimum allowed seasonal performance factor,
+    ///                        dependent on building (3.5 or 4.5)
+    /// * t_supply (f32): supply temperature, dependent on building [°C]
+    /// * reference_year (&ReferenceYear): hourly temperatures of
+    ///                                    reference year (DWD, 1995-2012)
+    /// * t_heat_lim (f32): average outside temperature over which heating
+    ///                     will suppply, building specific [°C]
+    /// * t_out_n (f32): norm outside temperature [°C]
+    /// * hist (usize): Size of history memory (0 for no memory)
+    pub fn with_reference_year(q_hln: f32, seas_perf_fac: f32,
+                               t_supply: f32, reference_year: &ReferenceYear,
+                               t_heat_lim: f32, t_out_n: f32, hist: usize)
+    -> Self
+    {
         // ToDo: account for drinking water heating time
         // ?account for blocking times in final result
 
@@ -153,101 +305,35 @@ impl BuildingHeatpumpSystem {
         let mut pow_t = q_hln * 24. / (24.-6.) /
                         cop_from_coefficients(&q_hln, &t_out_n, &t_supply);
 
-        // local copy neccessary
-        let reference_temperatures = t_ref.to_vec();
-
-        // get heating days bools (hourly)
-        let mut heating_days: [bool; 8760] = [false; 8760];
-        for i in 0..=364 {
-            // ToDo: idx created twice
-            let idx = (i*24)..(i*24+24);
-            let t_day = &reference_temperatures[idx];
-            let idx = (i*24)..(i*24+24);
-            if average(t_day) < t_heat_lim {
-                heating_days[idx].fill(true);
-            }
-        }
-
         // Q-intercept of heating line (at 0°C)
         let intercept = (t_heat_lim / (t_heat_lim - t_out_n)) * q_hln;
         // slope of heating line
         let slope = q_hln / (t_out_n - t_heat_lim);
 
-        // calculate COP and power factor for all 'true' hours in heating days
-        let mut cops: [f32; 8760] = [0.; 8760];
-        let mut qs: [f32; 8760] = [0.; 8760];
-        // needed heating power for each hour
-        let mut pow_heat: [f32; 8760] = [0.; 8760];
-        for (idx, t_out) in reference_temperatures.iter().enumerate() {
-            if t_out > &t_heat_lim {
-                heating_days[idx] = false;
-            }
-            if heating_days[idx] {
-                cops[idx] = cop_from_coefficients(&pow_t, &t_out, &t_supply);
-                qs[idx] = q_from_coefficients(&pow_t, &t_out, &t_supply);
-                // calculate needed heating power for this hour
-                pow_heat[idx] = (-q_hln / (t_heat_lim-t_out_n)) *
-                                t_out + intercept;
-            }
-        }
-
-        // get minimum temperature from reference year
-        let mut t_min = find_minimum(&reference_temperatures);
-
-        // introduce seasonal performance factor as mean of COPS
-        let mut cop_mean = -1.;
-
-        // introduce weights to take into account over- and undersupply
-        // during this hour
-        let weights: [f32; 8760] = [1.; 8760];
-
         // increase lower bound of heatpump working temperatures till mean
-        // COP satisfies minimum seasonal performance factor
-        let mut iter_count = 0.;
-        while cop_mean < seas_perf_fac {
-
-            if t_min >= t_heat_lim {
-                panic!("Heatpump minimum operating temperature must be greater
-                        then minimum heating temperature of building.
-                        Apparantly cop was choosen too high.")
-            }
-            // increase lower bound of heatpump working temperature
-            if iter_count > 0. {
+        // COP satisfies minimum seasonal performance factor,
+        // the COPs only depend on power class of heatpump, so the design
+        // is shared by all buildings with same parameters
+        let key = (power_class(&pow_t), t_supply.to_bits(),
+                   t_heat_lim.to_bits(), seas_perf_fac.to_bits());
+        let (iter_count, cop_mean) = reference_year.get_design(key, || {
+            find_design_iterations(&pow_t, &t_supply, reference_year,
+                                   &t_heat_lim, &seas_perf_fac)
+        });
+
+        // calculate installed heatpump power based on heat needed at
+        // minimum working temperature and power factor
+        let mut t_min = reference_year.min_temperature();
+        for iter in 0..iter_count {
+            if iter > 0 {
                 t_min = t_min + 1.;
             }
-            // update bool vector for hour selection
-            for (idx, temp) in reference_temperatures.iter().enumerate() {
-                if *temp < t_min {
-                    heating_days[idx] = false;
-                }
-            }
-
-            // calculate installed heatpump power based on heat needed at
-            //  minimum working temperature and power factor
             pow_t = (slope * t_min + intercept) /
                     q_from_coefficients(&pow_t, &t_min, &t_supply);
             if pow_t < 1000. {
                 panic!("For this building heatpump cannot be configured.
                        Try decreasing minimum cop.")
             }
-            // calculate weights
-/*             for (idx, value) in heating_days.iter().enumerate() {
-                let div;
-                if *value == true {
-                    div = pow_heat[idx] / (pow_t * qs[idx]);
-
-                    if div > 1. {
-                        weights[idx] = 1.;
-                    }
-                    else {
-                        weights[idx] = div;
-                    }
-                }
-            } */
-            // calculate mean cop
-            cop_mean = average_bool_select_weighted(&cops, &weights,
-                                                    &heating_days);
-            iter_count += 1.;
         }
 
         pow_t = pow_t * 24. / (24. - 6.);
@@ -314,10 +400,7 @@ impl BuildingHeatpumpSystem {
                         con_e,
                         gen_t}
     }
-}
 
-
-impl BuildingHeatpumpSystem {
     // Control Parameter
     const STORAGE_LEVEL_HH: f32 = 0.95;
     const STORAGE_LEVEL_H: f32 = 0.2;
@@ -1,16 +1,24 @@
 // external
+use numpy::{PyArray1, PyReadonlyArray2};
 use pyo3::prelude::*;
+use pyo3::exceptions::PyValueError;
+use serde::{Deserialize, Serialize};
+use std::mem::size_of;
 
 use crate::components::boiler::Boiler;
 use crate::components::chp::CHP;
 use crate::components::generic_storage::GenericStorage;
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistOwner, HistView, HistVisitor,
+                               Recorded};
+use crate::misc::memory_report::MemoryReport;
 use crate::misc::cell_manager::CellManager;
 use crate::misc::ambient::AmbientParameters;
+use crate::thermal_systems::storage_controller::StorageController;
+use crate::misc::serialization::{self, Stateful};
 
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct CellChpSystemThermal {
     #[pyo3(get)]
     chp: CHP,  // chp plant
@@ -20,18 +28,48 @@ pub struct CellChpSystemThermal {
     boiler: Boiler,  // peak load boiler (electric)
 
     // Controller variables
-    #[pyo3(get, set)]
+    #[pyo3(get)]
+    // python controller isn't serialized, it must be set after loading
+    #[serde(skip)]
     controller: Option<PyObject>,
+    // native rule based controller (used if no python controller is set)
+    #[pyo3(get, set)]
+    rule_controller: StorageController,
+    // number of steps a decision of the controllers step method is kept
+    #[pyo3(get, set)]
+    controller_interval: usize,
+    // call controller early, if storage reaches a critical level
+    #[pyo3(get, set)]
+    controller_events: bool,
     boiler_state: bool,
     chp_state: bool,
+    ctrl_plan: Vec<(bool, bool)>,  // planned chp and boiler states
+    ctrl_plan_pos: usize,  // position of next planned state
+    ctrl_critical: bool,  // storage level was critical at last step
+    #[serde(skip)]
+    ctrl_obs: Option<Py<PyArray1<f32>>>,  // observation buffer
 
 
-    #[pyo3(get)]
     gen_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
     gen_t: Option<hist_memory::HistMemory>,
 }
 
+impl Stateful for CellChpSystemThermal {
+    const KIND: &'static str = "CellChpSystemThermal";
+}
+
+impl Recorded for CellChpSystemThermal {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("cell_chp_system", "gen_e", &mut self.gen_e);
+        visitor("cell_chp_system", "gen_t", &mut self.gen_t);
+        self.chp.visit_histories(visitor);
+        self.storage.visit_histories(visitor);
+        self.boiler.visit_histories(visitor);
+    }
+}
+
+impl HistOwner for CellChpSystemThermal {}
+
 #[pymethods]
 impl CellChpSystemThermal {
     /// Create thermal supply system for a cell,
@@ -84,42 +122,196 @@ impl CellChpSystemThermal {
                        storage,
                        boiler,
                        controller: None,
+                       rule_controller: StorageController::default(),
+                       controller_interval: 1,
+                       controller_events: true,
                        boiler_state: false,
                        chp_state: false,
+                       ctrl_plan: Vec::new(),
+                       ctrl_plan_pos: 0,
+                       ctrl_critical: false,
+                       ctrl_obs: None,
                        gen_e,
                        gen_t,
                        }
     }
+
+    /// Set python controller, which replaces the default control strategy
+    /// (None to use default strategy again)
+    #[setter]
+    fn set_controller(&mut self, controller: Option<PyObject>) {
+        self.controller = controller;
+        // states planned by an old controller are not valid anymore
+        self.ctrl_plan.clear();
+        self.ctrl_plan_pos = 0;
+        self.ctrl_critical = false;
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |system| &system.gen_e, "cell_chp_system", "gen_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |system| &system.gen_t, "cell_chp_system", "gen_t")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 impl CellChpSystemThermal {
-    // Control Parameter
-    const STORAGE_LEVEL_HH: f32 = 0.95;
-    const STORAGE_LEVEL_H: f32 = 0.3;
-    const STORAGE_LEVEL_L: f32 = 0.2;
-    const STORAGE_LEVEL_LL: f32 = 0.05;
+    // Size of observation buffer for python controller
+    // (storage state, cell state, ambient values)
+    const OBS_SIZE: usize = 14;
+
+    /// Add bytes held by heating system to memory report
+    /// (the system itself is counted by its owner)
+    ///
+    /// # Arguments
+    /// * report (&mut MemoryReport): Report of cell
+    pub fn add_memory_usage(&self, report: &mut MemoryReport) {
+        report.heating_systems += self.ctrl_plan.capacity() *
+                                  size_of::<(bool, bool)>();
+        report.add_storages(1);
+    }
 
     fn control(&mut self){
         let storage_state = self.storage.get_relative_charge();
 
-        if storage_state <= CellChpSystemThermal::STORAGE_LEVEL_LL {
-            self.boiler_state = true;
-            self.chp_state = true;
-        }
-        else if (storage_state <= CellChpSystemThermal::STORAGE_LEVEL_L) &
-                !self.chp_state {
-            self.boiler_state = false;
-            self.chp_state = true;
-        }
-        else if (storage_state >= CellChpSystemThermal::STORAGE_LEVEL_H) &
-                self.boiler_state {
-            self.boiler_state = false;
-            self.chp_state = true;
-        }
-        else if storage_state >= CellChpSystemThermal::STORAGE_LEVEL_HH {
-            self.chp_state = false;
-            self.boiler_state = false;
+        self.rule_controller.control(&storage_state, &mut self.chp_state,
+                                     &mut self.boiler_state);
+    }
+
+    /// Get chp and boiler states from python controller
+    ///
+    /// The controller is only called, if all planned states are used or
+    /// the storage reaches a critical level (and controller_events is set),
+    /// which is given by level_ll / level_hh of the rule based controller.
+    /// Two protocols are supported:
+    ///   - step_batch(obs): The observation buffer (float32 array with
+    ///     storage state, cell state and ambient values) is handed over
+    ///     and the states of chp and boiler for the next n steps are
+    ///     returned as array like (n x 2) of bools. The buffer is reused
+    ///     for each call, so it must be copied if it should be kept.
+    ///   - step(storage_state, cell_state, amb): Returns the states of chp
+    ///     and boiler, which are kept for controller_interval steps.
+    ///
+    /// # Arguments
+    /// * ctrl (&PyObject): Python controller
+    /// * cell_state (&CellManager): All necessary cell informations
+    /// * amb (&AmbientParameters): Current Ambient Measurements
+    ///
+    /// # Returns
+    /// * PyResult<()>: Error raised by the controller or ValueError,
+    ///                 if the returned states are invalid
+    fn control_external(&mut self, ctrl: &PyObject, cell_state: &CellManager,
+                        amb: &AmbientParameters)
+    -> PyResult<()>
+    {
+        let storage_state = self.storage.get_relative_charge();
+
+        let critical =
+            (storage_state <= *self.rule_controller.level_ll()) |
+            (storage_state >= *self.rule_controller.level_hh());
+        let event = self.controller_events & critical & !self.ctrl_critical;
+        self.ctrl_critical = critical;
+
+        if (self.ctrl_plan_pos >= self.ctrl_plan.len()) | event {
+            let gil = Python::acquire_gil();
+            let py = gil.python();
+
+            let is_batched = ctrl.as_ref(py).hasattr("step_batch")
+                                 .unwrap_or(false);
+            if is_batched {
+                let obs = self.get_observation(py, &storage_state,
+                                               cell_state, amb);
+                let plan = ctrl.call_method1(py, "step_batch", (obs,))?;
+                let plan: PyReadonlyArray2<bool> = py.import("numpy")
+                    .and_then(|np| np.call_method1("ascontiguousarray",
+                                                   (plan, "bool")))
+                    .and_then(|plan| plan.call_method1("reshape", (-1, 2)))
+                    .and_then(|plan| plan.extract())
+                    .map_err(|_| PyValueError::new_err(
+                        "Controller must return chp and boiler states \
+                         as (n x 2) array like of bools"))?;
+                let plan = plan.as_array();
+                self.ctrl_plan = plan.outer_iter()
+                                     .map(|states| (states[0], states[1]))
+                                     .collect();
+            } else {
+                let storage_state_py = storage_state.to_object(py);
+                let cell_state_py = cell_state.get_state().to_object(py);
+                let amb_py = amb.get_values().to_object(py);
+                let chp_boiler_state: (bool, bool) =
+                  ctrl.call_method1(py, "step", (&storage_state_py,
+                                                 &cell_state_py, &amb_py))?
+                    .extract(py)
+                    .map_err(|_| PyValueError::new_err(
+                        "Controller must return chp and boiler states \
+                         as tuple of bools"))?;
+                self.ctrl_plan = vec![chp_boiler_state;
+                                      self.controller_interval.max(1)];
+            }
+            self.ctrl_plan_pos = 0;
+
+            if self.ctrl_plan.is_empty() {
+                return Err(PyValueError::new_err(
+                    "Controller must return states for at least one step"));
+            }
         }
+
+        let (chp_state, boiler_state) = self.ctrl_plan[self.ctrl_plan_pos];
+        self.chp_state = chp_state;
+        self.boiler_state = boiler_state;
+        self.ctrl_plan_pos += 1;
+
+        Ok(())
+    }
+
+    /// Write current observation into (preallocated) buffer
+    ///
+    /// # Arguments
+    /// * storage_state (&f32): Relative charge of storage
+    /// * cell_state (&CellManager): All necessary cell informations
+    /// * amb (&AmbientParameters): Current Ambient Measurements
+    ///
+    /// # Returns
+    /// * &PyArray1<f32>: Observation buffer
+    fn get_observation<'py>(&mut self, py: Python<'py>, storage_state: &f32,
+                            cell_state: &CellManager,
+                            amb: &AmbientParameters)
+    -> &'py PyArray1<f32>
+    {
+        let obs = self.ctrl_obs.get_or_insert_with(|| {
+            PyArray1::<f32>::zeros(py, [CellChpSystemThermal::OBS_SIZE],
+                                   false).to_owned()
+        }).as_ref(py);
+
+        // buffer is only used by controller during the call of step_batch
+        let values = unsafe { obs.as_slice_mut() }.unwrap();
+        values[0] = *storage_state;
+        values[1..8].copy_from_slice(&cell_state.get_state_array());
+        values[8..].copy_from_slice(&amb.get_values_array());
+
+        obs
     }
 
     /// Calculate current electrical and thermal power
@@ -128,31 +320,20 @@ impl CellChpSystemThermal {
     /// * thermal_demand (&f32): Thermal power needed by dhn [W]
     ///
     /// # Returns
-    /// * (f32, f32): Resulting electrical and thermal power
-    ///               and fuel used by system [W]
+    /// * PyResult<(f32, f32, f32)>: Resulting electrical and thermal power
+    ///                              and fuel used by system [W] or error
+    ///                              of python controller
     pub fn step(&mut self, thermal_demand: &f32, cell_state: &CellManager,
                 amb: &AmbientParameters)
-    -> (f32, f32, f32)
+    -> PyResult<(f32, f32, f32)>
     {
-        match &self.controller {
+        match self.controller.take() {
             None => self.control(),
             Some(ctrl) => {
-                let chp_boiler_state: (bool, bool);
-                let gil = Python::acquire_gil();
-                let py = gil.python();
-                let storage_state = self.storage
-                                      .get_relative_charge()
-                                      .to_object(py);
-                let cell_state_py = cell_state.get_state().to_object(py);
-                let amb_py = amb.get_values().to_object(py);
-                chp_boiler_state =
-                  ctrl.call_method1(py, "step", (&storage_state,
-                                                 &cell_state_py, &amb_py))
-                    .unwrap()
-                    .extract(py)
-                    .unwrap();
-                self.chp_state = chp_boiler_state.0;
-                self.boiler_state = chp_boiler_state.1;
+                let result = self.control_external(&ctrl, cell_state, amb);
+                // controller is kept, even if it failed
+                self.controller = Some(ctrl);
+                result?;
             },
         }
 
@@ -169,7 +350,7 @@ impl CellChpSystemThermal {
         self.save_hist(&pow_e, &pow_t);
 
         // return supply data
-        return (pow_e, thermal_demand + storage_diff, chp_fuel + boiler_fuel);
+        Ok((pow_e, thermal_demand + storage_diff, chp_fuel + boiler_fuel))
     }
 
     fn save_hist(&mut self, pow_e: &f32, pow_t: &f32) {
@@ -1,14 +1,19 @@
 // external
 use pyo3::prelude::*;
+use serde::{Deserialize, Serialize};
 
 use crate::components::boiler::Boiler;
 use crate::components::chp::CHP;
 use crate::components::generic_storage::GenericStorage;
-use crate::misc::hist_memory;
+use crate::misc::hist_memory::{self, HistOwner, HistView, HistVisitor,
+                               Recorded};
+use crate::misc::memory_report::MemoryReport;
+use crate::thermal_systems::storage_controller::StorageController;
+use crate::misc::serialization::{self, Stateful};
 
 
 #[pyclass]
-#[derive(Clone)]
+#[derive(Clone, Deserialize, Serialize)]
 pub struct TheresaSystem {
     #[pyo3(get)]
     chp: CHP,  // chp plant
@@ -18,15 +23,32 @@ pub struct TheresaSystem {
     boiler: Boiler,  // peak load boiler (electric)
 
     // Controller variables
+    // native rule based controller (used if no python controller is set)
+    #[pyo3(get, set)]
+    rule_controller: StorageController,
     boiler_state: bool,
     chp_state: bool,
 
-    #[pyo3(get)]
     gen_e: Option<hist_memory::HistMemory>,
-    #[pyo3(get)]
     gen_t: Option<hist_memory::HistMemory>,
 }
 
+impl Stateful for TheresaSystem {
+    const KIND: &'static str = "TheresaSystem";
+}
+
+impl Recorded for TheresaSystem {
+    fn visit_histories(&mut self, visitor: &mut HistVisitor) {
+        visitor("theresa_system", "gen_e", &mut self.gen_e);
+        visitor("theresa_system", "gen_t", &mut self.gen_t);
+        self.chp.visit_histories(visitor);
+        self.storage.visit_histories(visitor);
+        self.boiler.visit_histories(visitor);
+    }
+}
+
+impl HistOwner for TheresaSystem {}
+
 #[pymethods]
 impl TheresaSystem {
     #[new]
@@ -69,42 +91,59 @@ impl TheresaSystem {
         TheresaSystem {chp,
                        storage,
                        boiler,
+                       rule_controller: StorageController::default(),
                        boiler_state: false,
                        chp_state: false,
                        gen_e,
                        gen_t,
                        }
     }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_e(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |system| &system.gen_e, "theresa_system", "gen_e")
+    }
+
+    /// View of history memory (None if there is no memory)
+    #[getter]
+    fn gen_t(slf: PyRef<Self>) -> Option<HistView> {
+        HistView::of(slf, |system| &system.gen_t, "theresa_system", "gen_t")
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        hist_memory::check_exports(self)?;
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
 }
 
 impl TheresaSystem {
-    // Control Parameter
-    const STORAGE_LEVEL_HH: f32 = 0.95;
-    const STORAGE_LEVEL_H: f32 = 0.3;
-    const STORAGE_LEVEL_L: f32 = 0.2;
-    const STORAGE_LEVEL_LL: f32 = 0.05;
+    /// Add bytes held by heating system to memory report
+    /// (the system itself is counted by its owner)
+    ///
+    /// # Arguments
+    /// * report (&mut MemoryReport): Report of cell
+    pub fn add_memory_usage(&self, report: &mut MemoryReport) {
+        report.add_storages(1);
+    }
 
     fn control(&mut self){
         let storage_state = self.storage.get_relative_charge();
 
-        if storage_state <= TheresaSystem::STORAGE_LEVEL_LL {
-            self.boiler_state = true;
-            self.chp_state = true;
-        }
-        else if (storage_state <= TheresaSystem::STORAGE_LEVEL_L) &
-                !self.chp_state {
-            self.boiler_state = false;
-            self.chp_state = true;
-        }
-        else if (storage_state >= TheresaSystem::STORAGE_LEVEL_H) &
-                self.boiler_state {
-            self.boiler_state = false;
-            self.chp_state = true;
-        }
-        else if storage_state >= TheresaSystem::STORAGE_LEVEL_HH {
-            self.chp_state = false;
-            self.boiler_state = false;
-        }
+        self.rule_controller.control(&storage_state, &mut self.chp_state,
+                                     &mut self.boiler_state);
     }
 
     /// Calculate current electrical and thermal power
@@ -1,2 +1,3 @@
 pub mod building;
-pub mod cell;
\ No newline at end of file
+pub mod cell;
+pub mod storage_controller;
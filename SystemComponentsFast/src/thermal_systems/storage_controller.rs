@@ -0,0 +1,172 @@
+// external
+use pyo3::prelude::*;
+use pyo3::exceptions::PyValueError;
+use serde::{Deserialize, Serialize};
+use crate::misc::serialization::{self, Stateful};
+
+
+/// Rule based controller for thermal systems with a storage,
+/// which is supplied by a primary and a secondary (peak load) generator
+///
+/// The generators are switched by hysteresis bands of the relative
+/// storage charge:
+///   - level_ll: both generators are turned on
+///   - level_l: primary generator is turned on (if not running)
+///   - level_h: secondary generator is turned off (if running)
+///   - level_hh: both generators are turned off
+#[pyclass]
+#[derive(Clone, Deserialize, Serialize)]
+pub struct StorageController {
+    #[pyo3(get)]
+    level_hh: f32,
+    #[pyo3(get)]
+    level_h: f32,
+    #[pyo3(get)]
+    level_l: f32,
+    #[pyo3(get)]
+    level_ll: f32,
+    #[pyo3(get)]
+    boiler_priority: bool,  // boiler is primary generator instead of chp
+}
+
+impl Stateful for StorageController {
+    const KIND: &'static str = "StorageController";
+}
+
+#[pymethods]
+impl StorageController {
+    /// Create rule based controller
+    ///
+    /// # Arguments
+    /// * level_hh (f32): Storage level to turn off all generators
+    ///                   (default: 0.95)
+    /// * level_h (f32): Storage level to turn off secondary generator
+    ///                  (default: 0.3)
+    /// * level_l (f32): Storage level to turn on primary generator
+    ///                  (default: 0.2)
+    /// * level_ll (f32): Storage level to turn on all generators
+    ///                   (default: 0.05)
+    /// * boiler_priority (bool): If true, the boiler is used as primary
+    ///                           and the chp as secondary generator
+    ///                           (default: false)
+    ///
+    /// # Returns
+    /// * PyResult<StorageController>: Controller or ValueError, if the
+    ///                                levels are not ordered in the
+    ///                                range from 0 to 1
+    #[new]
+    #[args(level_hh = "0.95", level_h = "0.3", level_l = "0.2",
+           level_ll = "0.05", boiler_priority = "false")]
+    pub fn new(level_hh: f32, level_h: f32, level_l: f32, level_ll: f32,
+               boiler_priority: bool) -> PyResult<Self>
+    {
+        // negated comparisons, so NaN levels are rejected as well
+        if !(level_ll >= 0.) | !(level_hh <= 1.) {
+            return Err(PyValueError::new_err(
+                        "Storage levels must be in range from 0 to 1"));
+        }
+        if !(level_ll <= level_l) | !(level_l <= level_h) |
+           !(level_h <= level_hh) {
+            return Err(PyValueError::new_err(
+                        "Storage levels must be ordered \
+                         (level_ll <= level_l <= level_h <= level_hh)"));
+        }
+
+        Ok(StorageController {level_hh,
+                              level_h,
+                              level_l,
+                              level_ll,
+                              boiler_priority,
+                              })
+    }
+
+    /// Get operational states of generators for given storage level
+    ///
+    /// # Arguments
+    /// * storage_state (f32): Relative charge of storage (0 to 1)
+    /// * chp_state (bool): Current state of chp
+    /// * boiler_state (bool): Current state of boiler
+    ///
+    /// # Returns
+    /// * (bool, bool): New states of chp and boiler
+    fn get_states(&self, storage_state: f32, mut chp_state: bool,
+                  mut boiler_state: bool) -> (bool, bool)
+    {
+        self.control(&storage_state, &mut chp_state, &mut boiler_state);
+        (chp_state, boiler_state)
+    }
+
+    /// Get binary state (used by pickle and copy)
+    fn __getstate__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::get_state(py, self)
+    }
+
+    /// Restore binary state (see __getstate__)
+    fn __setstate__(&mut self, state: &[u8]) -> PyResult<()> {
+        *self = serialization::from_bytes(state)?;
+        Ok(())
+    }
+
+    /// Get function and arguments to rebuild object (used by pickle)
+    fn __reduce__(&self, py: Python) -> PyResult<PyObject> {
+        serialization::reduce(py, self)
+    }
+}
+
+impl StorageController {
+    /// Update operational states of generators
+    ///
+    /// # Arguments
+    /// * storage_state (&f32): Relative charge of storage (0 to 1)
+    /// * chp_state (&mut bool): State of chp
+    /// * boiler_state (&mut bool): State of boiler
+    pub fn control(&self, storage_state: &f32, chp_state: &mut bool,
+                   boiler_state: &mut bool)
+    {
+        let (primary, secondary) = if self.boiler_priority {
+            (boiler_state, chp_state)
+        } else {
+            (chp_state, boiler_state)
+        };
+
+        if *storage_state <= self.level_ll {
+            *secondary = true;
+            *primary = true;
+        }
+        else if (*storage_state <= self.level_l) & !*primary {
+            *secondary = false;
+            *primary = true;
+        }
+        else if (*storage_state >= self.level_h) & *secondary {
+            *secondary = false;
+            *primary = true;
+        }
+        else if *storage_state >= self.level_hh {
+            *primary = false;
+            *secondary = false;
+        }
+    }
+
+    pub fn level_hh(&self) -> &f32 {
+        &self.level_hh
+    }
+
+    pub fn level_h(&self) -> &f32 {
+        &self.level_h
+    }
+
+    pub fn level_ll(&self) -> &f32 {
+        &self.level_ll
+    }
+}
+
+impl Default for StorageController {
+    fn default() -> Self {
+        StorageController {level_hh: 0.95,
+                           level_h: 0.3,
+                           level_l: 0.2,
+                           level_ll: 0.05,
+                           boiler_priority: false,
+                           }
+    }
+}
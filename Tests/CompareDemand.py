@@ -90,8 +90,7 @@ Weather.loc[:, 'T [degC]'] = np.array(SynProData['Tout [degC]'].values,
                                       dtype=np.float32)
 
 # %% Run simulation
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # %% recalculate agents hot water demand
 # this recalculation does not correspond exactly the simulation course
@@ -138,7 +137,7 @@ plots.compareCurves([SynProData.time],
                     ['SynPro', 'EnSySim'], yLabel='Thermal Energy in MWh')
 
 # %%
-fig = plots.buildingTemperature(cell.buildings[0], time,
+fig = plots.buildingTemperature(cell.building(0), time,
                                 Weather['T [degC]'], True)
 fig.add_trace(go.Scatter(x=time, y=SynProData['Tin [degC]'],
                          line={'color': 'rgba(100, 149, 237, 0.5)',
@@ -0,0 +1,50 @@
+# %%
+# Imports
+from GenericModel.PARAMETER import PBTYPES_NOW, PBTYPES_2030
+from GenericModel.Sweep import getParameterGrid, runSweep
+import pandas as pd
+import logging
+
+
+# %%
+FORMAT = ("%(levelname)s %(name)s %(asctime)-15s "
+          "%(filename)s:%(lineno)d %(message)s")
+logging.basicConfig(format=FORMAT)
+logging.getLogger().setLevel(logging.WARNING)
+
+# %%
+# set parameters, which are the same for all cells
+base = {'start': '01.01.2020', 'end': '01.01.2021',
+        'nSepBSLAgents': 100, 'pAgricultureBSLsep': 0.7,
+        'nBuildings': {'FSH': 634, 'REH': 338, 'SAH': 20, 'BAH': 8},
+        'pAgents': {'FSH': 0.9, 'REH': 0.9, 'SAH': 0.85, 'BAH': 0.75},
+        'pPHHagents': {'FSH': 0.8, 'REH': 0.8, 'SAH': 0.6, 'BAH': 0.9},
+        'pAgriculture': {'FSH': 0.2, 'REH': 0.2, 'SAH': 0.0, 'BAH': 0.0},
+        'pDHN': {'FSH': 0.1, 'REH': 0.1, 'SAH': 0.1, 'BAH': 0.1},
+        'pHeatpumps': {'class_1': 0, 'class_2': 0,
+                       'class_3': 0, 'class_4': 0.12,
+                       'class_5': 0.27},
+        'pCHP': 0.1,
+        'region': "East",
+        }
+# varied parameters
+parameterSets = getParameterGrid(base,
+                                 pPVplants=[0.1, 0.2, 0.4],
+                                 pBTypes=[PBTYPES_NOW, PBTYPES_2030],
+                                 seed=[1, 2])
+
+# %%
+# run sweep, results are collected as soon as a run is finished
+if __name__ == '__main__':
+    metrics = {}
+    for number, result in runSweep(parameterSets):
+        if result['error'] is not None:
+            print("Parameter set {} failed: {}".format(number,
+                                                       result['error']))
+            continue
+        metrics[number] = result['metrics']
+        print("Parameter set {} finished after {:.1f}s"
+              .format(number, result['metrics']['run time [s]']))
+
+    metrics = pd.DataFrame.from_dict(metrics, orient='index').sort_index()
+    print(metrics)
@@ -71,8 +71,7 @@ cell.add_chp_thermal(chpSystem) """
 
 # %%
 # run the simulation
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # %%
 plots.cellPowerBalance(cell, time)
@@ -68,8 +68,7 @@ cell.add_building(building)
 
 # %%
 # Run simulation
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # %%
 # Plot cell power balance
@@ -81,22 +80,22 @@ plots.cellEnergyBalance(cell, time)
 
 # %%
 # Plot building temperature
-plots.buildingTemperature(cell.buildings[0], time, Weather['T [degC]'])
+plots.buildingTemperature(cell.building(0), time, Weather['T [degC]'])
 
 # %%
 # Plot chp production
 title = "Thermal output of chp system"
-gen_t = (np.array(cell.buildings[0].get_chp_system().chp.gen_t.get_memory()) +
-         np.array(cell.buildings[0].get_chp_system().boiler.gen_t.
+gen_t = (np.array(cell.building(0).get_chp_system().chp.gen_t.get_memory()) +
+         np.array(cell.building(0).get_chp_system().boiler.gen_t.
                   get_memory())) \
         / 1000.
-load_t = np.array(cell.buildings[0].load_t.get_memory()) / 1000.
+load_t = np.array(cell.building(0).load_t.get_memory()) / 1000.
 
 unitPrefix = "K"
 plots.arbitraryBalance(gen_t, load_t, time, unitPrefix, title)
 # %%
 # Plot storage charging state
-storage = cell.buildings[0].get_chp_system().storage
+storage = cell.building(0).get_chp_system().storage
 
 plots.chargeState(storage, time)
 # %%
@@ -77,8 +77,7 @@ cell.add_building(building)
 
 # %%
 # Run simulation
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # %%
 # Plot cell power balance
@@ -90,9 +89,9 @@ plots.cellEnergyBalance(cell, time)
 
 # %%
 # Plot building temperature
-plots.buildingTemperature(cell.buildings[0], time, Weather['T [degC]'])
+plots.buildingTemperature(cell.building(0), time, Weather['T [degC]'])
 # %%
-plots.heatpumpSystemOperation(cell.buildings[0].get_hp_system(), time)
+plots.heatpumpSystemOperation(cell.building(0).get_hp_system(), time)
 # %%
 
 # %%
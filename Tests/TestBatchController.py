@@ -0,0 +1,117 @@
+# %%
+# Imports
+from BoundaryConditions.Simulation.SimulationData import getSimData
+from Controller.Cell.CHP_SystemThermal import CtrlDefault, CtrlDefaultBatch
+from GenericModel.Design import generateGenericCell
+from GenericModel.PARAMETER import PBTYPES_NOW as pBTypes
+from SystemComponentsFast import simulate, CellChpSystemThermal
+import numpy as np
+import time
+
+# %%
+# set parameters
+start = '01.01.2020'
+end = '01.04.2020'
+nSepBSLagents = 10
+pAgricultureBSLsep = 0.7
+nBuildings = {'FSH': 63, 'REH': 34, 'SAH': 2, 'BAH': 1}
+pAgents = {'FSH': 0.9, 'REH': 0.9, 'SAH': 0.85, 'BAH': 0.75}
+pPHHagents = {'FSH': 0.8, 'REH': 0.8, 'SAH': 0.6, 'BAH': 0.9}
+pAgriculture = {'FSH': 0.2, 'REH': 0.2, 'SAH': 0.0, 'BAH': 0.0}
+pDHN = {'FSH': 0.5, 'REH': 0.5, 'SAH': 0.5, 'BAH': 0.5}
+pPVplants = 0.2
+pHeatpumps = {'class_1': 0, 'class_2': 0,
+              'class_3': 0, 'class_4': 0.12,
+              'class_5': 0.27}
+pCHP = 0.1
+region = "East"
+
+# %%
+# prepare simulation
+nSteps, time_, SLP, HWP, Weather, Solar = getSimData(start, end, region)
+
+
+def getCell(controller):
+    """ Generate cell with chp system controlled by given controller
+    """
+    cell = generateGenericCell(nBuildings, pAgents,
+                               pPHHagents, pAgriculture,
+                               pDHN, pPVplants, pHeatpumps, pCHP, pBTypes,
+                               nSepBSLagents, pAgricultureBSLsep,
+                               region, nSteps, seed=1)
+    demand = cell.get_thermal_demand(True)
+    chpSystem = CellChpSystemThermal(demand, 0.75, 2*demand, 0.,
+                                     0.98, 0.98, nSteps)
+    chpSystem.controller = controller
+    cell.add_chp_thermal(chpSystem)
+
+    return cell
+
+
+def runCell(controller):
+    """ Simulate generic cell with chp system controlled by given controller
+
+    Returns:
+        ([np array], float) -- Histories of cell and simulation time [s]
+    """
+    cell = getCell(controller)
+    startSim = time.perf_counter()
+    simulate(cell, nSteps, SLP, HWP, Weather, Solar, seed=1)
+    simTime = time.perf_counter() - startSim
+
+    return ([np.asarray(getattr(cell, name)).copy()
+             for name in ['gen_e', 'load_e', 'gen_t', 'load_t']],
+            simTime)
+
+
+# %%
+# a batch of one step is the same strategy as the default controller
+reference, refTime = runCell(CtrlDefault())
+batched, batchTime = runCell(CtrlDefaultBatch(1))
+print("step: {:.3f}s, step_batch(1): {:.3f}s".format(refTime, batchTime))
+for ref, res in zip(reference, batched):
+    if not np.array_equal(ref, res):
+        print("CtrlDefaultBatch(1) differs from CtrlDefault")
+
+# keeping decisions for one hour changes the results only slightly
+batched, batchTime = runCell(CtrlDefaultBatch(4))
+print("step_batch(4): {:.3f}s".format(batchTime))
+for name, ref, res in zip(['gen_e', 'load_e', 'gen_t', 'load_t'],
+                          reference, batched):
+    print("{}: {:.2f}% deviation of energy".format(
+          name, 100. * (res.sum() - ref.sum()) / max(ref.sum(), 1.)))
+
+
+# %%
+# errors of a controller are raised by simulate and the controller is kept
+class CtrlFailing(CtrlDefault):
+    def __init__(self):
+        super().__init__()
+        self.fail = True
+        self.calls = 0
+
+    def step(self, StorageState, *args):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("controller failed")
+
+        return super().step(StorageState, *args)
+
+
+controller = CtrlFailing()
+try:
+    runCell(controller)
+    print("error of controller wasn't raised")
+except RuntimeError:
+    pass
+
+cell = getCell(controller)
+calls = controller.calls
+try:
+    simulate(cell, 1, SLP, HWP, Weather, Solar)
+except RuntimeError:
+    pass
+controller.fail = False
+simulate(cell, 10, SLP, HWP, Weather, Solar)
+if controller.calls != calls + 11:
+    print("controller was lost after an error")
@@ -100,11 +100,10 @@ for bClass, mState, airState in results.columns.to_list():
     # Add building to cell
     cell.add_building(building)
 
-    simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-             Solar.to_dict('list'))
+    simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
     # get results
-    b = cell.buildings[0]
+    b = cell.building(0)
     gen_e = np.array(b.gen_e.get_memory())
     load_e = np.array(b.load_e.get_memory())
     gen_t = np.array(b.gen_t.get_memory())
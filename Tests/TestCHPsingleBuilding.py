@@ -69,8 +69,7 @@ building.add_dimensioned_chp(nSteps)
 cell.add_building(building)
 
 # %% Run simulation
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # %%
 plots.cellPowerBalance(cell, time)
@@ -84,7 +83,7 @@ plots.arbitraryBalance(gen_t*1e-3, load_t*1e-3, time, 'k',
                        'Thermal balance in test building')
 
 # %%
-b = cell.buildings[0]
+b = cell.building(0)
 
 chpSys = b.get_chp_system()
 chp_gen_e = np.array(chpSys.chp.gen_e.get_memory())
@@ -0,0 +1,54 @@
+# %%
+# Imports
+from BoundaryConditions.Simulation.SimulationData import getSimData
+from GenericModel.Design import generateGenericCell
+from GenericModel.PARAMETER import PBTYPES_NOW as pBTypes
+from SystemComponentsFast import simulate
+import numpy as np
+import time
+
+# %%
+# set parameters
+start = '01.01.2020'
+end = '01.01.2021'
+nSepBSLagents = 100
+pAgricultureBSLsep = 0.7
+nBuildings = {'FSH': 505, 'REH': 1425, 'SAH': 78, 'BAH': 55}
+pAgents = {'FSH': 0.9, 'REH': 0.9, 'SAH': 0.85, 'BAH': 0.75}
+pPHHagents = {'FSH': 0.8, 'REH': 0.8, 'SAH': 0.6, 'BAH': 0.9}
+pAgriculture = {'FSH': 0.2, 'REH': 0.2, 'SAH': 0.0, 'BAH': 0.0}
+pDHN = {'FSH': 0.1, 'REH': 0.1, 'SAH': 0.1, 'BAH': 0.1}
+pPVplants = 0.2
+pHeatpumps = {'class_1': 0, 'class_2': 0,
+              'class_3': 0, 'class_4': 0.12,
+              'class_5': 0.27}
+pCHP = 0.1
+region = "East"
+
+
+def getCell():
+    return generateGenericCell(nBuildings, pAgents,
+                               pPHHagents, pAgriculture,
+                               pDHN, pPVplants, pHeatpumps, pCHP, pBTypes,
+                               nSepBSLagents, pAgricultureBSLsep,
+                               region, 35136, seed=1, useCache=True)
+
+
+# %%
+# first call generates (and caches) the cell, the second loads it
+cells = []
+for run in ["first", "second"]:
+    startGen = time.perf_counter()
+    cells.append(getCell())
+    print("{} call: {:.3f}s".format(run, time.perf_counter() - startGen))
+
+# %%
+# cached cell must behave like the generated one
+nSteps, time_, SLP, HWP, Weather, Solar = getSimData(start, end, region, 1)
+for cell in cells:
+    simulate(cell, nSteps, SLP, HWP, Weather, Solar, seed=1)
+
+for name in ['gen_e', 'load_e', 'gen_t', 'load_t']:
+    if not np.array_equal(np.asarray(getattr(cells[0], name)),
+                          np.asarray(getattr(cells[1], name))):
+        print("{} of cached cell differs".format(name))
@@ -7,6 +7,7 @@ from GenericModel.Design import generateGenericCell
 from GenericModel.PARAMETER import PBTYPES_NOW as pBTypes
 from SystemComponentsFast import simulate, CellChpSystemThermal
 from PostProcesing import plots
+from IPython.display import display
 import logging
 
 # %% 
@@ -59,6 +60,9 @@ targetUpdate = 100
 nHL1 = 24
 nHL2 = 12
 trainHistSize = 365
+# the decision of the controller is kept for one hour
+ctrlInterval = 4
+nEpochs = 10
 
 visualise = True
 
@@ -89,6 +93,7 @@ controller = CtrlSmart(capacity, batchSize, epsStart, epsMin, epsDecay,
                        MaxPower_e, MaxPower_t, MaxFuelDemand, visualise)
 #controller.loadStats()
 chpSystem.controller = controller
+chpSystem.controller_interval = ctrlInterval
 cell.add_chp_thermal(chpSystem)
 
 
@@ -97,10 +102,9 @@ cell.add_chp_thermal(chpSystem)
 if visualise:
     display(controller.trainVis)
 
-while True:
-
-    simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-             Solar.to_dict('list'))
+# errors of the controller are raised by simulate
+for epoch in range(nEpochs):
+    simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # %%
 
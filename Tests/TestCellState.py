@@ -0,0 +1,118 @@
+# %%
+# Imports
+from BoundaryConditions.Simulation.SimulationData import getSimData
+from GenericModel.Design import generateGenericCell
+from GenericModel.PARAMETER import PBTYPES_NOW as pBTypes
+from SystemComponentsFast import simulate, Cell
+import numpy as np
+import pickle
+import time
+
+# %%
+# set parameters
+start = '01.01.2020'
+end = '01.01.2021'
+nSepBSLagents = 10
+pAgricultureBSLsep = 0.7
+nBuildings = {'FSH': 63, 'REH': 34, 'SAH': 2, 'BAH': 1}
+pAgents = {'FSH': 0.9, 'REH': 0.9, 'SAH': 0.85, 'BAH': 0.75}
+pPHHagents = {'FSH': 0.8, 'REH': 0.8, 'SAH': 0.6, 'BAH': 0.9}
+pAgriculture = {'FSH': 0.2, 'REH': 0.2, 'SAH': 0.0, 'BAH': 0.0}
+pDHN = {'FSH': 0.1, 'REH': 0.1, 'SAH': 0.1, 'BAH': 0.1}
+pPVplants = 0.2
+pHeatpumps = {'class_1': 0, 'class_2': 0,
+              'class_3': 0, 'class_4': 0.12,
+              'class_5': 0.27}
+pCHP = 0.1
+region = "East"
+fileName = "./Tests/Data/cellState.bin"
+
+# %%
+# prepare simulation
+nSteps, time_, SLP, HWP, Weather, Solar = getSimData(start, end, region, 1)
+# spin up period, where the state is saved
+nSpinUp = nSteps // 2
+
+startGen = time.perf_counter()
+cell = generateGenericCell(nBuildings, pAgents,
+                           pPHHagents, pAgriculture,
+                           pDHN, pPVplants, pHeatpumps, pCHP, pBTypes,
+                           nSepBSLagents, pAgricultureBSLsep,
+                           region, nSteps, seed=1)
+print("generation: {:.3f}s".format(time.perf_counter() - startGen))
+
+# %%
+# spin up and save state
+simulate(cell, nSpinUp, SLP, HWP, Weather, Solar, seed=1)
+cell.save(fileName)
+
+startLoad = time.perf_counter()
+loaded = Cell.load(fileName)
+print("load: {:.3f}s".format(time.perf_counter() - startLoad))
+
+# pickle is supported as well (e.g. to send cells to worker processes)
+unpickled = pickle.loads(pickle.dumps(cell))
+
+# %%
+# continue both cells, results must be identical
+rest = slice(nSpinUp, nSteps)
+for model in [cell, loaded, unpickled]:
+    simulate(model, nSteps - nSpinUp, SLP[rest], HWP[rest], Weather[rest],
+             Solar[rest])
+
+for name in ['gen_e', 'load_e', 'gen_t', 'load_t']:
+    reference = np.asarray(getattr(cell, name))
+    for model in [loaded, unpickled]:
+        if not np.array_equal(reference, np.asarray(getattr(model, name))):
+            print("{} of restored cell differs".format(name))
+
+# %%
+# exported histories can't be replaced, while numpy views exist
+memory = pickle.loads(pickle.dumps(cell.gen_e))
+view = np.asarray(memory)
+try:
+    memory.__setstate__(loaded.gen_e.copy().__getstate__())
+    print("exported history memory was replaced")
+except BufferError:
+    pass
+del view
+memory.__setstate__(loaded.gen_e.copy().__getstate__())
+
+# history getters return views bound to the cell, so numpy arrays read
+# the memory of the cell and block replacing its state
+view = np.asarray(cell.gen_e)
+if not np.array_equal(view, cell.gen_e.get_memory()):
+    print("history view doesn't read the memory of the cell")
+try:
+    cell.__setstate__(loaded.__getstate__())
+    print("cell state was replaced, while a history view exists")
+except BufferError:
+    pass
+del view
+cell.__setstate__(loaded.__getstate__())
+
+# buildings with exported history memories can't be replaced
+view = np.asarray(cell.building_handle(0).gen_e)
+for replace in [cell.replace_building, cell.update_building]:
+    try:
+        replace(0, loaded.building(0))
+        print("building was replaced, while a history view exists")
+    except BufferError:
+        pass
+del view
+cell.replace_building(0, loaded.building(0))
+try:
+    cell.replace_building(sum(nBuildings.values()), loaded.building(0))
+    print("building was added by replace_building")
+except IndexError:
+    pass
+
+# handles of buildings, which don't exist anymore, raise an IndexError
+copied = pickle.loads(pickle.dumps(cell))
+handle = copied.building_handle(0)
+copied.__setstate__(Cell(1000., -12., 0).__getstate__())
+try:
+    handle.q_hln
+    print("handle read a removed building")
+except IndexError:
+    pass
@@ -84,8 +84,7 @@ pvPlant.size_cell_pv(100.)
 cell.add_pv(pvPlant)
 # %%
 # run the simulation
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # %%
 plots.cellPowerBalance(cell, time)
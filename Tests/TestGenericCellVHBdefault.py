@@ -3,10 +3,10 @@
 # %%
 # Imports
 from BoundaryConditions.Simulation.SimulationData import getSimData
-from Controller.Cell.CHP_SystemThermal import CtrlDefault
 from GenericModel.Design import generateGenericCell
 from GenericModel.PARAMETER import PBTYPES_NOW as pBTypes
 from SystemComponentsFast import simulate, CellChpSystemThermal
+from SystemComponentsFast import StorageController
 from PostProcesing import plots
 import plotly.graph_objs as go
 import numpy as np
@@ -42,8 +42,14 @@ pCHP = 0
 # environment
 region = "East"
 
-# set controller to use it or set variable to None
-controller = CtrlDefault()
+# native rule based controller (storage levels of hysteresis)
+controller = StorageController(level_hh=0.95, level_h=0.3,
+                               level_l=0.2, level_ll=0.05)
+try:
+    StorageController(level_hh=0.2, level_h=0.3)
+    print("unordered storage levels were accepted")
+except ValueError:
+    pass
 
 # %%
 # prepare simulation
@@ -56,6 +62,15 @@ cell = generateGenericCell(nBuildings, pAgents,
                            pDHN, pPVplants, pHeatpumps, pCHP, pBTypes,
                            nSepBSLagents, pAgricultureBSLsep,
                            region, nSteps)
+# chp systems of buildings are created in the cell, so their controller
+# is set in place (building.chp_system only returns a copy)
+nChanged = cell.set_rule_controller(controller)
+for building in cell.iter_buildings():
+    if building.has_chp():
+        chpController = building.get().chp_system.rule_controller
+        if chpController.level_l != controller.level_l:
+            print("controller of building chp system wasn't set")
+print("{} building chp systems with native controller".format(nChanged))
 
 # get dhn demand
 demand = cell.get_thermal_demand(True)
@@ -63,14 +78,13 @@ demand = cell.get_thermal_demand(True)
 chpSystem = CellChpSystemThermal(demand, 0.35, 2*demand, 0.05,
                                  0.98, 0.98, nSteps)
 
-chpSystem.controller = controller
+chpSystem.rule_controller = controller
 cell.add_chp_thermal(chpSystem)
 
 
 # %%
 # run the simulation
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 
 # %%
@@ -101,8 +101,7 @@ cell.add_chp_thermal(chpSystem)
 
 # %%
 # run the simulation
-# simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-#          Solar.to_dict('list'))
+# simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # simulate
 
@@ -111,8 +110,7 @@ if visualise:
 
 for i in range(25):
 
-    simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-             Solar.to_dict('list'))
+    simulate(cell, nSteps, SLP, HWP, Weather, Solar)
     # plots.cellPowerBalance(cell, time)
     # plots.cellEnergyBalance(cell, time)
     # plots.chargeState(cell.get_thermal_chp_system().storage, time)
@@ -4,10 +4,10 @@
 # Imports
 
 from BoundaryConditions.Simulation.SimulationData import getSimData
-from Controller.Cell.CHP_SystemThermal import CtrlDefault
 from GenericModel.Design import generateGenericCell
 from GenericModel.PARAMETER import PBTYPES_NOW as pBTypes
 from SystemComponentsFast import simulate, CellChpSystemThermal, Wind
+from SystemComponentsFast import StorageController
 from PostProcesing import plots, dataCollection
 import logging
 import plotly.graph_objs as go
@@ -43,8 +43,9 @@ pCHP = 0.1
 # environment
 region = "East"
 
-# set controller to use it or set variable to None
-controller = CtrlDefault()
+# native rule based controller (storage levels of hysteresis)
+controller = StorageController(level_hh=0.95, level_h=0.3,
+                               level_l=0.2, level_ll=0.05)
 
 # %%
 # prepare simulation
@@ -60,15 +61,14 @@ cell = generateGenericCell(nBuildings, pAgents,
 demand = cell.get_thermal_demand(True)
 chpSystem = CellChpSystemThermal(demand, 0.75, 2*demand, 0.,
                                  0.98, 0.98, nSteps)
-chpSystem.controller = controller
+chpSystem.rule_controller = controller
 cell.add_chp_thermal(chpSystem)
 # Add the wind turbine
 windTurbine = Wind(160., 80., 4., 30., 0.4, nSteps)
 cell.add_wind_turbine(windTurbine)
 
 # %%
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # %%
 plots.cellPowerBalance(cell, time)
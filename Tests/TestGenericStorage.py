@@ -1,12 +1,13 @@
 # %% imports
 import numpy as np
-from SystemComponentsFast import GenericStorage, test_generic_storage
+from SystemComponentsFast import (GenericStorage, get_time_step,
+                                  test_generic_storage)
 
 import os
 print(os.getpid())
 
 # %% Parameter
-dt = 0.25  # h
+dt = get_time_step()  # h
 cap = 100.  # Wh
 maxPow = 10.  # W
 eff = 0.95  # -
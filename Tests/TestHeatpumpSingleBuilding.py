@@ -106,10 +106,9 @@ cell.add_building(building)
 
 
 # %%
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 # get objects with sim results
-b = cell.buildings[0]
+b = cell.building(0)
 hpSys = b.get_hp_system()
 
 # %% yearly power factor
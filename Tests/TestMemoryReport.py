@@ -0,0 +1,59 @@
+# %%
+# Imports
+from BoundaryConditions.Simulation.SimulationData import getSimData
+from GenericModel.Design import estimateCellMemory, generateGenericCell
+from GenericModel.PARAMETER import PBTYPES_NOW as pBTypes
+from SystemComponentsFast import Cell, Recorder, RecordingRule
+
+# %%
+# set parameters
+start = '01.01.2020'
+end = '01.01.2021'
+nSepBSLagents = 100
+pAgricultureBSLsep = 0.7
+nBuildings = {'FSH': 505, 'REH': 1425, 'SAH': 78, 'BAH': 55}
+pAgents = {'FSH': 0.9, 'REH': 0.9, 'SAH': 0.85, 'BAH': 0.75}
+pPHHagents = {'FSH': 0.8, 'REH': 0.8, 'SAH': 0.6, 'BAH': 0.9}
+pAgriculture = {'FSH': 0.2, 'REH': 0.2, 'SAH': 0.0, 'BAH': 0.0}
+pDHN = {'FSH': 0.1, 'REH': 0.1, 'SAH': 0.1, 'BAH': 0.1}
+pPVplants = 0.2
+pHeatpumps = {'class_1': 0, 'class_2': 0,
+              'class_3': 0, 'class_4': 0.12,
+              'class_5': 0.27}
+pCHP = 0.1
+region = "East"
+
+recording = [RecordingRule(False),
+             RecordingRule(True, entity="cell"),
+             RecordingRule(True, entity="building", component="building",
+                           quantity="load_e", recorder=Recorder.daily("mean"))]
+
+nSteps, time_, SLP, HWP, Weather, Solar = getSimData(start, end, region, 1)
+
+# %%
+# compare estimate (before generation) with generated cells
+for spec in [None, recording]:
+    estimate = estimateCellMemory(nBuildings, pAgents, pPVplants,
+                                  pHeatpumps, pCHP, pBTypes, nSepBSLagents,
+                                  nSteps, spec)
+    cell = generateGenericCell(nBuildings, pAgents,
+                               pPHHagents, pAgriculture,
+                               pDHN, pPVplants, pHeatpumps, pCHP, pBTypes,
+                               nSepBSLagents, pAgricultureBSLsep,
+                               region, nSteps, seed=1, recording=spec)
+    report = cell.memory_report()
+
+    print("recording spec: {}".format(spec is not None))
+    print("{:>16} {:>14} {:>14}".format("part", "estimate [MB]",
+                                        "report [MB]"))
+    for part in report.keys():
+        print("{:>16} {:>14.2f} {:>14.2f}".format(part,
+                                                 estimate[part] / 1024**2,
+                                                 report[part] / 1024**2))
+
+# %%
+# the estimate uses the names of the visited history memories, which
+# must be unique within an equipment (e.g. both storages of chp systems)
+for equipment, names in Cell.history_names().items():
+    if len(set(names)) != len(names):
+        print("history names of {} aren't unique".format(equipment))
@@ -0,0 +1,112 @@
+# %%
+# Imports
+from BoundaryConditions.Simulation.SimulationData import (getPeriodSteps,
+                                                           getSimData)
+from GenericModel.Design import generateGenericCell
+from GenericModel.PARAMETER import PBTYPES_NOW as pBTypes
+from SystemComponentsFast import get_time_step, simulate, Recorder
+import numpy as np
+
+# %%
+# set parameters
+start = '01.01.2020'
+end = '01.01.2021'
+nSepBSLagents = 10
+pAgricultureBSLsep = 0.7
+nBuildings = {'FSH': 63, 'REH': 34, 'SAH': 2, 'BAH': 1}
+pAgents = {'FSH': 0.9, 'REH': 0.9, 'SAH': 0.85, 'BAH': 0.75}
+pPHHagents = {'FSH': 0.8, 'REH': 0.8, 'SAH': 0.6, 'BAH': 0.9}
+pAgriculture = {'FSH': 0.2, 'REH': 0.2, 'SAH': 0.0, 'BAH': 0.0}
+pDHN = {'FSH': 0.1, 'REH': 0.1, 'SAH': 0.1, 'BAH': 0.1}
+pPVplants = 0.2
+pHeatpumps = {'class_1': 0, 'class_2': 0,
+              'class_3': 0, 'class_4': 0.12,
+              'class_5': 0.27}
+pCHP = 0.1
+region = "East"
+
+# %%
+# prepare simulation
+nSteps, time_, SLP, HWP, Weather, Solar = getSimData(start, end, region, 1)
+monthSteps = getPeriodSteps(start, end, 'M')
+
+
+def getCell():
+    return generateGenericCell(nBuildings, pAgents,
+                               pPHHagents, pAgriculture,
+                               pDHN, pPVplants, pHeatpumps, pCHP, pBTypes,
+                               nSepBSLagents, pAgricultureBSLsep,
+                               region, nSteps, seed=1)
+
+
+# %%
+# record each step for reference, and aggregated values
+reference = getCell()
+cell = getCell()
+cell.set_recorder(Recorder("mean", 4), component="cell")
+cell.set_recorder(Recorder.daily("energy"), component="building",
+                  quantity="load_t")
+cell.set_recorder(Recorder("energy", periods=monthSteps), component="pv")
+cell.set_recorder(Recorder.daily("envelope"), component="building",
+                  quantity="temperature_hist")
+
+for model in [reference, cell]:
+    simulate(model, nSteps, SLP, HWP, Weather, Solar, seed=1)
+
+# %%
+# compare with aggregation of each step
+stepsPerDay = int(round(24. / get_time_step()))
+raw = reference.building(0)
+agg = cell.building(0)
+
+hourly = np.asarray(reference.load_e).reshape(-1, 4).mean(axis=1)
+print("hourly mean load_e of cell:",
+      np.allclose(hourly, np.asarray(cell.load_e), rtol=1e-5))
+
+daily = (np.asarray(raw.load_t).reshape(-1, stepsPerDay).sum(axis=1) *
+         get_time_step())
+print("daily load_t of building [Wh]:",
+      np.allclose(daily, np.asarray(agg.load_t), rtol=1e-5))
+
+temperature = np.asarray(raw.temperature_hist).reshape(-1, stepsPerDay)
+envelope = np.asarray(agg.temperature_hist).reshape(-1, 2)
+print("daily temperature envelope of building:",
+      np.allclose(temperature.min(axis=1), envelope[:, 0]) and
+      np.allclose(temperature.max(axis=1), envelope[:, 1]))
+
+if raw.pv is not None:
+    monthly = [part.sum() * get_time_step() for part in
+               np.split(np.asarray(raw.pv.gen_e), np.cumsum(monthSteps)[:-1])]
+    print("monthly pv gen_e of building [Wh]:",
+          np.allclose(monthly, np.asarray(agg.pv.gen_e), rtol=1e-5))
+
+print("memory of cell history: {} -> {} values"
+      .format(np.asarray(reference.load_e).size,
+              np.asarray(cell.load_e).size))
+
+# %%
+# a trailing period, which isn't completed, is not saved
+for recorder in [Recorder("mean", 7), Recorder("envelope", 7),
+                 Recorder("energy", periods=monthSteps + [1])]:
+    expected = nSteps // 7 if recorder.periods is None else len(monthSteps)
+    if recorder.mode == "envelope":
+        expected *= 2
+    if recorder.get_size(nSteps) != expected:
+        print("{} recorder reserves memory for an incomplete period"
+              .format(recorder.mode))
+
+# %%
+# a wrapped ring isn't rotated while it is exported, so existing views
+# keep their order and new views get the values in chronological order
+view = np.asarray(reference.load_e)
+simulate(reference, 10, SLP, HWP, Weather, Solar)
+before = view.copy()
+wrapped = np.asarray(reference.load_e)
+if not np.array_equal(view, before):
+    print("existing view of history memory was reordered")
+if not np.array_equal(wrapped, reference.load_e.get_memory()):
+    print("view of wrapped history memory isn't chronological")
+del view, wrapped
+if not np.array_equal(np.asarray(reference.load_e),
+                      reference.load_e.get_memory()):
+    print("unwrapped history memory isn't chronological")
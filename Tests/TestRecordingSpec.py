@@ -0,0 +1,71 @@
+# %%
+# Imports
+from BoundaryConditions.Simulation.SimulationData import getSimData
+from GenericModel.Design import generateGenericCell
+from GenericModel.PARAMETER import PBTYPES_NOW as pBTypes
+from SystemComponentsFast import (get_time_step, simulate, Recorder,
+                                  RecordingRule)
+import numpy as np
+
+# %%
+# set parameters
+start = '01.01.2020'
+end = '01.01.2021'
+nSepBSLagents = 100
+pAgricultureBSLsep = 0.7
+nBuildings = {'FSH': 505, 'REH': 1425, 'SAH': 78, 'BAH': 55}
+pAgents = {'FSH': 0.9, 'REH': 0.9, 'SAH': 0.85, 'BAH': 0.75}
+pPHHagents = {'FSH': 0.8, 'REH': 0.8, 'SAH': 0.6, 'BAH': 0.9}
+pAgriculture = {'FSH': 0.2, 'REH': 0.2, 'SAH': 0.0, 'BAH': 0.0}
+pDHN = {'FSH': 0.1, 'REH': 0.1, 'SAH': 0.1, 'BAH': 0.1}
+pPVplants = 0.2
+pHeatpumps = {'class_1': 0, 'class_2': 0,
+              'class_3': 0, 'class_4': 0.12,
+              'class_5': 0.27}
+pCHP = 0.1
+region = "East"
+
+# record only what the analysis needs:
+# everything of the cell itself, load_e of all buildings,
+# daily mean COP of heatpumps and every 100th building fully
+recording = [RecordingRule(False),
+             RecordingRule(True, entity="cell"),
+             RecordingRule(True, entity="building", component="building",
+                           quantity="load_e"),
+             RecordingRule(True, component="heatpump", quantity="cop_hist",
+                           recorder=Recorder.daily("mean")),
+             RecordingRule(True, entity="building", every=100)]
+
+# %%
+# prepare simulation
+nSteps, time_, SLP, HWP, Weather, Solar = getSimData(start, end, region, 1)
+
+cell = generateGenericCell(nBuildings, pAgents,
+                           pPHHagents, pAgriculture,
+                           pDHN, pPVplants, pHeatpumps, pCHP, pBTypes,
+                           nSepBSLagents, pAgricultureBSLsep,
+                           region, nSteps, seed=1, recording=recording)
+
+# the spec can also be changed before the simulation,
+# e.g. to add probe buildings
+nRecorded = cell.set_recording(
+    recording + [RecordingRule(True, entity="building", positions=[7, 42])],
+    nSteps)
+print("recorded histories: {}".format(nRecorded))
+
+# %%
+simulate(cell, nSteps, SLP, HWP, Weather, Solar, seed=1)
+
+histories = cell.get_history_matrices()
+for quantity, (matrix, index) in histories.items():
+    print("{}: {} x {}".format(quantity, *matrix.shape))
+print("cell load_e: {:.2f} MWh".format(
+      np.asarray(cell.load_e).sum() * get_time_step() * 1e-6))
+
+# single quantities can be collected or summed up directly
+matrix, index = cell.get_history_matrices(['building load_t'])[
+    'building load_t']
+summed = cell.sum_history('building load_t')
+if summed is not None and not np.allclose(matrix.sum(axis=0), summed,
+                                          rtol=1e-5):
+    print("summed history differs from history matrix")
@@ -65,8 +65,7 @@ _addAgents(building, 1., 1., 0.)
 cell.add_building(building)
 
 # %% Run simulation
-simulate(cell, nSteps, SLP.to_dict('list'), HWP, Weather.to_dict('list'),
-         Solar.to_dict('list'))
+simulate(cell, nSteps, SLP, HWP, Weather, Solar)
 
 # %%
 plots.cellPowerBalance(cell, time)
@@ -80,7 +79,7 @@ plots.arbitraryBalance(gen_t*1e-3, load_t*1e-3, time, 'k',
                        'Thermal balance in test building')
 
 # %%
-b = cell.buildings[0]
+b = cell.building(0)
 plots.buildingTemperature(b, time, Weather['T [degC]'])
 
 # %%
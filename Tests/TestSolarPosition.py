@@ -0,0 +1,40 @@
+# %% imports
+from BoundaryConditions.Simulation.SimulationData import (getSolarPositions,
+                                                          _getTimeRange)
+import numpy as np
+import pvlib as pv
+
+# %% Parameter
+start = "01.01.1995"
+end = "01.01.2035"
+# locations (latitude, longitude) used for test
+locations = [(51.164305, 10.4541205),  # Mittelpunkt Deutschland
+             (47.5, 7.6),
+             (54.8, 13.9),
+             ]
+# max. deviation to NREL SPA in degree
+tolElevation = 0.02
+tolAzimuth = 0.03
+
+# %% compare with pvlib
+time = _getTimeRange(start, end)
+elevation, azimuth = getSolarPositions(start, end,
+                                       [loc[0] for loc in locations],
+                                       [loc[1] for loc in locations])
+
+for idx, (latitude, longitude) in enumerate(locations):
+    ref = pv.solarposition.get_solarposition(time, latitude, longitude)
+    diffElevation = np.abs(elevation[idx, :] - ref.elevation.values)
+    # azimuth of sim data is shifted by 180 degree
+    diffAzimuth = np.abs((azimuth[idx, :] - ref.azimuth.values) % 360. -
+                         180.)
+
+    print("Location ({:.2f}, {:.2f}): max. deviation elevation {:.4f}, "
+          "azimuth {:.4f} degree".format(latitude, longitude,
+                                         diffElevation.max(),
+                                         diffAzimuth.max()))
+    if diffElevation.max() > tolElevation:
+        print("Elevation exceeds tolerance of {} degree"
+              .format(tolElevation))
+    if diffAzimuth.max() > tolAzimuth:
+        print("Azimuth exceeds tolerance of {} degree".format(tolAzimuth))
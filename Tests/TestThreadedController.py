@@ -0,0 +1,77 @@
+# %%
+# Imports
+from BoundaryConditions.Simulation.SimulationData import getSimData
+from Controller.Cell.CHP_SystemThermal import CtrlDefault
+from GenericModel.Design import generateGenericCell
+from GenericModel.PARAMETER import PBTYPES_NOW as pBTypes
+from SystemComponentsFast import simulate, CellChpSystemThermal
+import numpy as np
+import time
+
+# %%
+# set parameters
+start = '01.01.2020'
+end = '01.02.2020'
+nSepBSLagents = 10
+pAgricultureBSLsep = 0.7
+nBuildings = {'FSH': 63, 'REH': 34, 'SAH': 2, 'BAH': 1}
+pAgents = {'FSH': 0.9, 'REH': 0.9, 'SAH': 0.85, 'BAH': 0.75}
+pPHHagents = {'FSH': 0.8, 'REH': 0.8, 'SAH': 0.6, 'BAH': 0.9}
+pAgriculture = {'FSH': 0.2, 'REH': 0.2, 'SAH': 0.0, 'BAH': 0.0}
+pDHN = {'FSH': 0.5, 'REH': 0.5, 'SAH': 0.5, 'BAH': 0.5}
+pPVplants = 0.2
+pHeatpumps = {'class_1': 0, 'class_2': 0,
+              'class_3': 0, 'class_4': 0.12,
+              'class_5': 0.27}
+pCHP = 0.1
+region = "East"
+nSubCells = 3
+nThreads = 4
+
+# %%
+# prepare simulation
+nSteps, time_, SLP, HWP, Weather, Solar = getSimData(start, end, region)
+
+
+def getCell():
+    """ Generate main cell with sub cells, where all cells have
+    a chp system with python controller
+    """
+    def addChpSystem(cell):
+        demand = cell.get_thermal_demand(True)
+        chpSystem = CellChpSystemThermal(demand, 0.75, 2*demand, 0.,
+                                         0.98, 0.98, nSteps)
+        chpSystem.controller = CtrlDefault()
+        cell.add_chp_thermal(chpSystem)
+
+    cells = [generateGenericCell(nBuildings, pAgents,
+                                 pPHHagents, pAgriculture,
+                                 pDHN, pPVplants, pHeatpumps, pCHP, pBTypes,
+                                 nSepBSLagents, pAgricultureBSLsep,
+                                 region, nSteps, seed=nr)
+             for nr in range(nSubCells + 1)]
+    for cell in cells:
+        addChpSystem(cell)
+    for subCell in cells[1:]:
+        cells[0].add_cell(subCell)
+
+    return cells[0]
+
+
+# %%
+# python controllers must work in threaded runs, since the GIL is
+# released while the cells are calculated in the thread pool
+results = dict()
+for threads in [0, nThreads]:
+    cell = getCell()
+    cell.set_n_threads(threads)
+    startSim = time.perf_counter()
+    simulate(cell, nSteps, SLP, HWP, Weather, Solar, seed=1)
+    print("{} threads: {:.3f}s".format(threads,
+                                       time.perf_counter() - startSim))
+    results[threads] = [np.asarray(getattr(cell, name)).copy()
+                        for name in ['gen_e', 'load_e', 'gen_t', 'load_t']]
+
+for serial, threaded in zip(results[0], results[nThreads]):
+    if not np.array_equal(serial, threaded):
+        print("threaded run differs from serial run")